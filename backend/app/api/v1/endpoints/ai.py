@@ -1,11 +1,13 @@
 from fastapi import APIRouter, HTTPException, Depends, Body, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 import time
 import os
 import json
 
 from app.core.database import get_async_db
+from app.core.streaming import ndjson_response
 from app.services.ai_service import ai_service
 from app.schemas.ai import (
     ExtractionRequest, 
@@ -34,7 +36,7 @@ async def extract_obligations(
     
     try:
         # Extract obligations using AI service
-        extracted_obligations = ai_service.extract_obligations(request)
+        extracted_obligations = await ai_service.extract_obligations_async(request)
         
         processing_time = time.time() - start_time
         
@@ -50,6 +52,15 @@ async def extract_obligations(
             detail=f"Error extracting obligations: {str(e)}"
         )
 
+@router.post("/extract-obligations/stream")
+async def extract_obligations_stream(request: ExtractionRequest):
+    """
+    Extract obligations as NDJSON, emitting each one as soon as its chunk completes.
+
+    The stream ends with a {"type": "done"} trailer carrying total_extracted and processing_time.
+    """
+    return ndjson_response(ai_service.iter_obligations_async(request))
+
 @router.post("/summarize", response_model=SummarizationResponse)
 async def summarize_text(
     request: SummarizationRequest,
@@ -60,7 +71,7 @@ async def summarize_text(
     """
     try:
         # Generate summary using AI service
-        result = ai_service.summarize_text(request)
+        result = await ai_service.summarize_text_async(request)
         
         return SummarizationResponse(
             summary=result["summary"],
@@ -74,67 +85,78 @@ async def summarize_text(
             detail=f"Error generating summary: {str(e)}"
         ) 
 
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Hit/miss/eviction counters for the Gemini response cache"""
+    if ai_service.cache is None:
+        return {"enabled": False}
+    # stats() counts the SQLite tier, which is blocking I/O
+    return {"enabled": True, **(await run_in_threadpool(ai_service.cache.stats))}
+
+@router.delete("/cache")
+async def clear_cache():
+    """Drop every cached Gemini response from both tiers"""
+    if ai_service.cache is not None:
+        await run_in_threadpool(ai_service.cache.clear)
+    return {"message": "AI response cache cleared"}
+
 @router.post("/propose-reorg")
 async def propose_reorg(folder_path: str = "test_documents"):
     """Analyze folder and propose reorganization plan using AI"""
-    result = ai_service.analyze_and_propose_reorg(folder_path)
+    result = await ai_service.analyze_and_propose_reorg_async(folder_path)
     return result 
 
+@router.post("/propose-reorg/stream")
+async def propose_reorg_stream(folder_path: str = "test_documents"):
+    """Same as /propose-reorg, streamed as NDJSON: per-file summaries with progress, then the plan"""
+    return ndjson_response(ai_service.iter_reorg_events(folder_path))
+
 @router.post("/chat-reorg")
 async def chat_reorg(
     message: str = Body(..., embed=True),
-    folder_path: str = "test_documents"
+    session_id: Optional[str] = Body(None, embed=True),
+    folder_path: Optional[str] = None
 ):
-    """Chat-driven AI reorg: user command + folder context -> AI diff"""
-    folder_tree = {}
-    file_summaries = {}
-    for root, dirs, files in os.walk(folder_path):
-        rel_root = os.path.relpath(root, folder_path)
-        folder_tree[rel_root] = files
-        for file in files:
-            file_path = os.path.join(root, file)
-            try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read(2000)
-            except Exception as e:
-                content = f"[Error reading file: {e}]"
-            summary_prompt = f"Summarize the following file for project management, compliance, and PMO context.\n\nFILENAME: {file}\nCONTENT:\n{content}\n\nReturn a 1-2 sentence summary."
-            try:
-                model = ai_service.model
-                gen_model = ai_service.model
-                model = ai_service.model
-                response = ai_service.model.generate_content(summary_prompt)
-                summary = response.text.strip()
-            except Exception as e:
-                summary = f"[AI summary error: {e}]"
-            file_summaries[file_path] = summary
-    chat_prompt = (
-        "You are an expert in project management and compliance document organization. "
-        "Given the following folder structure and file summaries, and the following user command, propose a JSON diff of changes to apply. "
-        "Do not include markdown or code blocks.\n\n"
-        f"FOLDER TREE: {folder_tree}\n\nFILE SUMMARIES: {file_summaries}\n\nUSER COMMAND: {message}\n\n"
-        "Return a JSON array of changes, where each change is an object with 'action' (move, rename, create), 'source', 'destination', and 'details' fields as needed."
-    )
-    try:
-        model = ai_service.model
-        gen_model = ai_service.model
-        model = ai_service.model
-        response = ai_service.model.generate_content(chat_prompt)
-        plan = response.text.strip()
-        try:
-            plan_json = json.loads(plan)
-        except Exception as e:
-            print(f"JSON parsing error in chat-reorg plan: {e}\nRaw response: {plan}")
-            plan_json = plan
-        return {
-            "folder_tree": folder_tree,
-            "file_summaries": file_summaries,
-            "user_message": message,
-            "proposed_changes": plan_json
-        }
-    except Exception as e:
-        print(f"Gemini API error in chat-reorg: {e}")
-        return {"error": str(e)} 
+    """
+    Chat-driven AI reorg: user command + folder context -> AI diff
+
+    The first call scans the folder (test_documents by default) and returns a
+    session_id; send it back on later messages to reuse the scanned context
+    and the previous plan. A session cannot be continued on another folder.
+    """
+    folder_path = await _resolve_reorg_folder(session_id, folder_path)
+    return await ai_service.chat_reorg_async(folder_path, message, session_id)
+
+@router.post("/chat-reorg/stream")
+async def chat_reorg_stream(
+    message: str = Body(..., embed=True),
+    session_id: Optional[str] = Body(None, embed=True),
+    folder_path: Optional[str] = None
+):
+    """Same as /chat-reorg, streamed as NDJSON: per-file summaries with progress, then the plan"""
+    folder_path = await _resolve_reorg_folder(session_id, folder_path)
+    return ndjson_response(ai_service.iter_chat_reorg_events(folder_path, message, session_id))
+
+@router.delete("/chat-reorg/{session_id}")
+async def end_chat_reorg(session_id: str):
+    """Discard a chat-reorg session and its cached folder context"""
+    if not await run_in_threadpool(ai_service.reorg_sessions.delete, session_id):
+        raise HTTPException(status_code=404, detail="Reorg session not found or expired")
+    return {"message": "Reorg session ended"}
+
+async def _resolve_reorg_folder(session_id: Optional[str], folder_path: Optional[str]) -> str:
+    """Folder a chat-reorg turn runs on; a session is bound to the folder it was opened for"""
+    if session_id is None:
+        return folder_path or "test_documents"
+    session = await run_in_threadpool(ai_service.reorg_sessions.get, session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Reorg session not found or expired")
+    if folder_path is not None and os.path.normpath(folder_path) != os.path.normpath(session.folder_path):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Reorg session belongs to folder {session.folder_path}, not {folder_path}; start a new session for that folder"
+        )
+    return session.folder_path
 
 @router.post("/upload-folder")
 async def upload_folder(files: List[UploadFile] = File(...), relative_paths: List[str] = Form(...)):
@@ -155,7 +177,7 @@ async def analyze_document_structure(
     start_time = time.time()
     
     try:
-        result = ai_service.analyze_document_structure(request.text, request.document_type)
+        result = await ai_service.analyze_document_structure_async(request.text, request.document_type)
         
         if "error" in result:
             raise HTTPException(status_code=500, detail=result["error"])
@@ -185,7 +207,7 @@ async def generate_compliance_mapping(
     start_time = time.time()
     
     try:
-        result = ai_service.generate_compliance_mapping(
+        result = await ai_service.generate_compliance_mapping_async(
             request.obligation_text, 
             request.existing_controls
         )
@@ -1,18 +1,34 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Header, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional, Tuple
+import asyncio
+import hashlib
 import os
 import uuid
 from datetime import datetime
 
 from app.core.database import get_async_db
+from app.core.conditional import conditional_get
 from app.core.config import settings
-from app.schemas.document import DocumentCreate, Document, DocumentInDB
+from app.core.pagination import PageParams
+from app.core.responses import fast_json, json_rows_response
+from app.schemas.document import DocumentCreate, Document, DocumentInDB, DocumentListItem
 from app.models.document import Document as DocumentModel
 from app.models.user import User as UserModel
+from app.services.storage import get_storage
+from app.services.text_extraction import extract_document_text
 
 router = APIRouter()
 
+FILE_MEDIA_TYPES = {
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "txt": "text/plain",
+}
+
 @router.post("/upload", response_model=Document)
 async def upload_document(
     file: UploadFile = File(...),
@@ -32,82 +48,178 @@ async def upload_document(
             detail=f"File type not allowed. Allowed types: {', '.join(allowed_extensions)}"
         )
     
-    # Validate file size
-    if file.size > settings.MAX_FILE_SIZE:
+    # The request body is capped by BodySizeLimitMiddleware; this is the exact per-file limit
+    if file.size is not None and file.size > settings.MAX_FILE_SIZE:
         raise HTTPException(
-            status_code=400,
+            status_code=413,
             detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE / (1024*1024)}MB"
         )
     
     try:
-        # Generate unique filename
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
+        # Stage on local disk: the content hash decides the blob key, and extraction needs a file
+        staging_dir = os.path.join(settings.LOCAL_STORAGE_DIR, ".incoming")
+        os.makedirs(staging_dir, exist_ok=True)
+        incoming_path = os.path.join(staging_dir, f"{uuid.uuid4()}{file_extension}")
+        file_size, content_hash = await _stream_upload_to_disk(file, incoming_path)
         
-        # TODO: Upload to S3
-        # For now, save locally (in production, use S3)
-        upload_dir = "uploads"
-        os.makedirs(upload_dir, exist_ok=True)
-        file_path = os.path.join(upload_dir, unique_filename)
-        
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        try:
+            # Byte-identical content was uploaded before: link to it and reuse its blob, text, summary and obligations
+            result = await db.execute(
+                text("""
+                    SELECT id FROM documents
+                    WHERE content_hash = :content_hash AND canonical_document_id IS NULL
+                    ORDER BY id LIMIT 1
+                """),
+                {"content_hash": content_hash}
+            )
+            canonical = result.fetchone()
+            if canonical:
+                document = await _insert_duplicate_document(
+                    db, canonical.id, title=title, filename=file.filename, uploaded_by=1  # TODO: Get from auth
+                )
+                await db.commit()
+                return document
+            
+            # Store the content-addressed blob while the staged copy is parsed in the extraction pool
+            file_path, extracted = await asyncio.gather(
+                get_storage().put_file(incoming_path, f"{content_hash}{file_extension}"),
+                _extract_text(incoming_path, file_extension, file.filename),
+            )
+        finally:
+            if os.path.exists(incoming_path):
+                os.remove(incoming_path)
         
         # Create document record
-        # TODO: Extract text content using OCR/document processing
-        document_data = DocumentCreate(
-            title=title,
-            filename=file.filename,
-            file_path=file_path,
-            file_size=file.size,
-            file_type=file_extension[1:],  # Remove the dot
-            uploaded_by=1  # TODO: Get from auth
+        result = await db.execute(
+            text("""
+                INSERT INTO documents (title, filename, file_path, file_size, file_type, content_hash, content, page_offsets, uploaded_by)
+                VALUES (:title, :filename, :file_path, :file_size, :file_type, :content_hash, :content, :page_offsets, :uploaded_by)
+                RETURNING *
+            """),
+            {
+                "title": title,
+                "filename": file.filename,
+                "file_path": file_path,
+                "file_size": file_size,
+                "file_type": file_extension[1:],  # Remove the dot
+                "content_hash": content_hash,
+                "content": extracted.text if extracted else None,
+                "page_offsets": extracted.page_offsets if extracted else None,
+                "uploaded_by": 1  # TODO: Get from auth
+            }
         )
-        
-        document = DocumentModel(**document_data.dict())
-        db.add(document)
+        document = result.fetchone()
         await db.commit()
-        await db.refresh(document)
         
         return Document.from_orm(document)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error uploading document: {str(e)}"
         )
 
-@router.get("/", response_model=List[Document])
+async def _extract_text(file_path: str, file_extension: str, filename: str):
+    """Parse PDF/DOCX/TXT page by page in the extraction process pool; None if parsing fails"""
+    try:
+        return await extract_document_text(file_path, file_extension)
+    except Exception as e:
+        print(f"Text extraction failed for {filename}: {e}")
+        return None
+
+async def _insert_duplicate_document(
+    db: AsyncSession,
+    canonical_id: int,
+    title: str,
+    filename: str,
+    uploaded_by: int
+):
+    """
+    Create a document row for a re-upload of canonical_id's content.
+
+    Only the row is inserted: it shares the canonical blob and points at the
+    canonical document through canonical_document_id, which is where its
+    text, summary and obligations are read from (see CANONICAL_DOCUMENT_ID_SQL).
+    """
+    result = await db.execute(
+        text("""
+            INSERT INTO documents (
+                title, filename, file_path, file_size, file_type, content_hash,
+                canonical_document_id, uploaded_by
+            )
+            SELECT
+                :title, :filename, file_path, file_size, file_type, content_hash,
+                id, :uploaded_by
+            FROM documents
+            WHERE id = :canonical_id
+            RETURNING id
+        """),
+        {"title": title, "filename": filename, "uploaded_by": uploaded_by, "canonical_id": canonical_id}
+    )
+    return await _fetch_document(db, result.scalar_one())
+
+async def _stream_upload_to_disk(file: UploadFile, file_path: str) -> Tuple[int, str]:
+    """
+    Copy an upload to disk in UPLOAD_CHUNK_SIZE pieces, hashing as it goes.
+
+    Memory per upload stays at one chunk regardless of file size. A file over
+    MAX_FILE_SIZE is rejected with 413 and the partial copy removed.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(file_path, "wb") as buffer:
+            while True:
+                chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > settings.MAX_FILE_SIZE:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE / (1024*1024)}MB"
+                    )
+                digest.update(chunk)
+                await run_in_threadpool(buffer.write, chunk)
+    except BaseException:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    return size, digest.hexdigest()
+
+@router.get("/", response_model=List[DocumentListItem], dependencies=[Depends(conditional_get("documents"))])
 async def list_documents(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    fast: bool = Depends(fast_json),
     db: AsyncSession = Depends(get_async_db)
 ):
     """
-    List all documents
+    List documents, newest first, one page at a time (see X-Next-Cursor)
     """
     try:
-        # TODO: Add pagination and filtering
+        where, params = page.where()
         result = await db.execute(
-            "SELECT * FROM documents ORDER BY created_at DESC"
+            text(f"""
+                SELECT id, title, filename, file_path, file_size, file_type, content_hash,
+                       canonical_document_id, summary, uploaded_by, created_at, updated_at
+                FROM documents
+                WHERE {where}
+                {page.order_by()}
+            """),
+            params
         )
-        documents = result.fetchall()
+        documents = page.page(result.fetchall(), response)
         
-        return [
-            Document(
-                id=doc.id,
-                title=doc.title,
-                filename=doc.filename,
-                file_path=doc.file_path,
-                file_size=doc.file_size,
-                file_type=doc.file_type,
-                content=doc.content,
-                summary=doc.summary,
-                uploaded_by=doc.uploaded_by,
-                created_at=doc.created_at.isoformat(),
-                updated_at=doc.updated_at.isoformat() if doc.updated_at else None
-            )
-            for doc in documents
-        ]
+        if fast:
+            return await json_rows_response(request, response, (doc._mapping for doc in documents))
+        return [DocumentListItem.from_orm(doc) for doc in documents]
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -122,9 +234,75 @@ async def get_document(
     """
     Get a specific document by ID
     """
+    try:
+        document = await _fetch_document(db, document_id)
+        
+        if not document:
+            raise HTTPException(
+                status_code=404,
+                detail="Document not found"
+            )
+        
+        return document
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error fetching document: {str(e)}"
+        ) 
+
+async def _fetch_document(db: AsyncSession, document_id: int) -> Optional[Document]:
+    """Load a document; a re-upload's text, page offsets and summary come from its canonical document"""
+    result = await db.execute(
+        text("""
+            SELECT
+                d.id, d.title, d.filename, d.file_path, d.file_size, d.file_type,
+                d.content_hash, d.canonical_document_id,
+                COALESCE(c.content, d.content) AS content,
+                COALESCE(c.page_offsets, d.page_offsets) AS page_offsets,
+                COALESCE(c.summary, d.summary) AS summary,
+                d.uploaded_by, d.created_at, d.updated_at
+            FROM documents d
+            LEFT JOIN documents c ON c.id = d.canonical_document_id
+            WHERE d.id = :id
+        """),
+        {"id": document_id}
+    )
+    document = result.fetchone()
+    if not document:
+        return None
+    
+    return Document(
+        id=document.id,
+        title=document.title,
+        filename=document.filename,
+        file_path=document.file_path,
+        file_size=document.file_size,
+        file_type=document.file_type,
+        content_hash=document.content_hash,
+        canonical_document_id=document.canonical_document_id,
+        content=document.content,
+        page_offsets=document.page_offsets,
+        summary=document.summary,
+        uploaded_by=document.uploaded_by,
+        created_at=document.created_at.isoformat(),
+        updated_at=document.updated_at.isoformat() if document.updated_at else None
+    )
+
+@router.get("/{document_id}/file")
+async def download_document_file(
+    document_id: int,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Stream the original uploaded file from blob storage (supports a single bytes= Range)
+    """
     try:
         result = await db.execute(
-            "SELECT * FROM documents WHERE id = :id",
+            text("SELECT filename, file_path, file_size, file_type FROM documents WHERE id = :id"),
             {"id": document_id}
         )
         document = result.fetchone()
@@ -135,18 +313,23 @@ async def get_document(
                 detail="Document not found"
             )
         
-        return Document(
-            id=document.id,
-            title=document.title,
-            filename=document.filename,
-            file_path=document.file_path,
-            file_size=document.file_size,
-            file_type=document.file_type,
-            content=document.content,
-            summary=document.summary,
-            uploaded_by=document.uploaded_by,
-            created_at=document.created_at.isoformat(),
-            updated_at=document.updated_at.isoformat() if document.updated_at else None
+        start, end = 0, document.file_size
+        headers = {
+            "Accept-Ranges": "bytes",
+            "Content-Disposition": f'attachment; filename="{document.filename}"',
+        }
+        status_code = 200
+        if range_header:
+            start, end = _parse_range(range_header, document.file_size)
+            headers["Content-Range"] = f"bytes {start}-{end - 1}/{document.file_size}"
+            status_code = 206
+        headers["Content-Length"] = str(end - start)
+        
+        return StreamingResponse(
+            get_storage().iter_chunks(document.file_path, start, end),
+            status_code=status_code,
+            media_type=FILE_MEDIA_TYPES.get(document.file_type, "application/octet-stream"),
+            headers=headers
         )
         
     except HTTPException:
@@ -154,5 +337,28 @@ async def get_document(
     except Exception as e:
         raise HTTPException(
             status_code=500,
-            detail=f"Error fetching document: {str(e)}"
-        ) 
\ No newline at end of file
+            detail=f"Error fetching document file: {str(e)}"
+        )
+
+def _parse_range(range_header: str, size: int) -> Tuple[int, int]:
+    """Parse "bytes=a-b" / "bytes=a-" / "bytes=-n" into a half-open [start, end) range"""
+    try:
+        unit, _, spec = range_header.partition("=")
+        if unit.strip() != "bytes" or "," in spec:
+            raise ValueError
+        first, _, last = spec.strip().partition("-")
+        if first:
+            start = int(first)
+            end = int(last) + 1 if last else size
+        else:
+            start = max(0, size - int(last))
+            end = size
+    except ValueError:
+        start, end = size, size
+    end = min(end, size)
+    if start >= end:
+        raise HTTPException(
+            status_code=416,
+            detail=f"Requested range not satisfiable (file size {size} bytes)"
+        )
+    return start, end
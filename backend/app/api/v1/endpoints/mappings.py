@@ -1,50 +1,185 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+import json
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, Header
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+from app.core.conditional import parse_if_match, raise_write_failure, version_etag
 from app.core.database import get_async_db
-from app.schemas.mapping import Mapping, MappingCreate, MappingUpdate
-from app.models.mapping import Mapping as MappingModel, MappingTypeEnum
+from app.core.pagination import PageParams
+from app.core.responses import fast_json, json_rows_response
+from app.schemas.mapping import (
+    Mapping, MappingCreate, MappingUpdate,
+    MappingBatchCreate, MappingBatchDelete, MappingBatchItemResult, MappingBatchResult
+)
+from app.models.mapping import MappingTypeEnum
 
 router = APIRouter()
 
+# Columns the mapping API returns; listings never drag along anything wider
+MAPPING_COLUMNS = (
+    "id, obligation_id, mapping_type, external_id, external_name, external_url, "
+    "notes, mapped_by, version, created_at, updated_at"
+)
+
 @router.post("/", response_model=Mapping)
 async def create_mapping(
     mapping: MappingCreate,
+    response: Response,
     db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Create a new mapping
+    Create a new mapping (the ETag header carries its version for If-Match)
     """
     try:
-        # TODO: Validate that obligation exists
         # TODO: Validate that user exists
+        data = mapping.dict()
+        data["mapping_type"] = mapping.mapping_type.value
+        fields = ", ".join(data)
         
-        mapping_data = MappingModel(**mapping.dict())
-        db.add(mapping_data)
+        # The obligation check and the insert are one statement: no row back means no obligation
+        result = await db.execute(
+            text(f"""
+                INSERT INTO mappings ({fields})
+                SELECT {', '.join(f':{field}' for field in data)}
+                WHERE EXISTS (SELECT 1 FROM obligations WHERE id = :obligation_id)
+                RETURNING {MAPPING_COLUMNS}
+            """),
+            data
+        )
+        created = result.fetchone()
+        if not created:
+            raise HTTPException(
+                status_code=404,
+                detail="Obligation not found"
+            )
         await db.commit()
-        await db.refresh(mapping_data)
         
-        return Mapping.from_orm(mapping_data)
+        response.headers["ETag"] = version_etag(created.version)
+        return _mapping_from_row(created)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error creating mapping: {str(e)}"
         )
 
+@router.post("/batch", response_model=MappingBatchResult)
+async def create_mappings_batch(
+    batch: MappingBatchCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Create many mappings in one transaction; items whose obligation does not exist are reported, not created
+    """
+    try:
+        fields = ["obligation_id", "mapping_type", "external_id", "external_name", "external_url", "notes", "mapped_by"]
+        items = []
+        # RETURNING order is not guaranteed, so each returned row is matched back
+        # to its item by the values it was inserted with; identical items share
+        # a key and take the returned rows in turn
+        pending = {}
+        for index, mapping in enumerate(batch.mappings):
+            data = mapping.dict()
+            data["mapping_type"] = mapping.mapping_type.value
+            items.append({field: data[field] for field in fields})
+            pending.setdefault(tuple(data[field] for field in fields), []).append(index)
+        
+        # One statement checks the obligations and inserts: the items are typed by the
+        # mappings row type, the join drops items whose obligation does not exist, and
+        # FOR KEY SHARE keeps a concurrent delete from removing a joined obligation
+        result = await db.execute(
+            text(f"""
+                INSERT INTO mappings ({', '.join(fields)})
+                SELECT {', '.join(f'm.{field}' for field in fields)}
+                FROM jsonb_populate_recordset(CAST(NULL AS mappings), CAST(:items AS jsonb)) m
+                JOIN obligations o ON o.id = m.obligation_id
+                FOR KEY SHARE OF o
+                RETURNING {MAPPING_COLUMNS}
+            """),
+            {"items": json.dumps(items)}
+        )
+        results = [None] * len(batch.mappings)
+        created = result.fetchall()
+        for m in created:
+            index = pending[tuple(getattr(m, field) for field in fields)].pop(0)
+            results[index] = MappingBatchItemResult(
+                index=index, status="created", id=m.id, mapping=Mapping.from_orm(m)
+            )
+        await db.commit()
+        
+        for index, mapping in enumerate(batch.mappings):
+            if results[index] is None:
+                results[index] = MappingBatchItemResult(
+                    index=index, status="invalid", error=f"Obligation {mapping.obligation_id} not found"
+                )
+        
+        return MappingBatchResult(
+            succeeded=len(created),
+            failed=len(batch.mappings) - len(created),
+            results=results
+        )
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error creating mappings: {str(e)}"
+        )
+
+@router.post("/batch/delete", response_model=MappingBatchResult)
+async def delete_mappings_batch(
+    batch: MappingBatchDelete,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Delete many mappings with one statement; ids that do not exist are reported as not_found
+    """
+    try:
+        result = await db.execute(
+            text("DELETE FROM mappings WHERE id = ANY(:ids) RETURNING id"),
+            {"ids": list(set(batch.ids))}
+        )
+        deleted = {row.id for row in result.fetchall()}
+        await db.commit()
+        
+        results = [
+            MappingBatchItemResult(index=index, status="deleted", id=mapping_id)
+            if mapping_id in deleted else
+            MappingBatchItemResult(index=index, status="not_found", id=mapping_id, error="Mapping not found")
+            for index, mapping_id in enumerate(batch.ids)
+        ]
+        succeeded = sum(1 for item in results if item.status == "deleted")
+        
+        return MappingBatchResult(
+            succeeded=succeeded,
+            failed=len(results) - succeeded,
+            results=results
+        )
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error deleting mappings: {str(e)}"
+        )
+
 @router.get("/", response_model=List[Mapping])
 async def list_mappings(
+    request: Request,
+    response: Response,
     obligation_id: Optional[int] = Query(None, description="Filter by obligation ID"),
     mapping_type: Optional[MappingTypeEnum] = Query(None, description="Filter by mapping type"),
+    page: PageParams = Depends(),
+    fast: bool = Depends(fast_json),
     db: AsyncSession = Depends(get_async_db)
 ):
     """
-    List mappings with optional filtering
+    List mappings with optional filtering, newest first, one page at a time (see X-Next-Cursor)
     """
     try:
         # Build query
-        query = "SELECT * FROM mappings WHERE 1=1"
-        params = {}
+        where, params = page.where()
+        query = f"SELECT {MAPPING_COLUMNS} FROM mappings WHERE {where}"
         
         if obligation_id:
             query += " AND obligation_id = :obligation_id"
@@ -54,53 +189,138 @@ async def list_mappings(
             query += " AND mapping_type = :mapping_type"
             params["mapping_type"] = mapping_type.value
             
-        query += " ORDER BY created_at DESC"
+        query += f" {page.order_by()}"
         
-        result = await db.execute(query, params)
-        mappings = result.fetchall()
+        result = await db.execute(text(query), params)
+        mappings = page.page(result.fetchall(), response)
         
+        if fast:
+            return await json_rows_response(request, response, (m._mapping for m in mappings))
         return [
-            Mapping(
-                id=m.id,
-                obligation_id=m.obligation_id,
-                mapping_type=MappingTypeEnum(m.mapping_type),
-                external_id=m.external_id,
-                external_name=m.external_name,
-                external_url=m.external_url,
-                notes=m.notes,
-                mapped_by=m.mapped_by,
-                created_at=m.created_at.isoformat(),
-                updated_at=m.updated_at.isoformat() if m.updated_at else None
-            )
+            _mapping_from_row(m)
             for m in mappings
         ]
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error fetching mappings: {str(e)}"
         )
 
-@router.delete("/{mapping_id}")
-async def delete_mapping(
+@router.get("/{mapping_id}", response_model=Mapping)
+async def get_mapping(
     mapping_id: int,
+    response: Response,
     db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Delete a mapping
+    Get a specific mapping by ID (the ETag header carries its version for If-Match)
     """
     try:
         result = await db.execute(
-            "DELETE FROM mappings WHERE id = :id",
+            text(f"SELECT {MAPPING_COLUMNS} FROM mappings WHERE id = :id"),
             {"id": mapping_id}
         )
+        mapping = result.fetchone()
         
-        if result.rowcount == 0:
+        if not mapping:
             raise HTTPException(
                 status_code=404,
                 detail="Mapping not found"
             )
         
+        response.headers["ETag"] = version_etag(mapping.version)
+        return _mapping_from_row(mapping)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error fetching mapping: {str(e)}"
+        )
+
+@router.put("/{mapping_id}", response_model=Mapping)
+async def update_mapping(
+    mapping_id: int,
+    updates: MappingUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None, alias="If-Match"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Update a mapping; with If-Match, only if it is still at that version (412 otherwise)
+    """
+    try:
+        # Build update query
+        update_fields = []
+        params = {"id": mapping_id}
+        
+        for field, value in updates.dict(exclude_none=True).items():
+            update_fields.append(f"{field} = :{field}")
+            params[field] = value.value if isinstance(value, MappingTypeEnum) else value
+        
+        if not update_fields:
+            raise HTTPException(
+                status_code=400,
+                detail="No fields to update"
+            )
+        
+        update_fields.append("updated_at = NOW()")
+        update_fields.append("version = version + 1")
+        
+        query = f"UPDATE mappings SET {', '.join(update_fields)} WHERE id = :id"
+        expected_versions = parse_if_match(if_match)
+        if expected_versions is not None:
+            query += " AND version = ANY(:expected_versions)"
+            params["expected_versions"] = expected_versions
+        query += f" RETURNING {MAPPING_COLUMNS}"
+        
+        result = await db.execute(text(query), params)
+        mapping = result.fetchone()
+        if not mapping:
+            await raise_write_failure(
+                db, "mappings", mapping_id, "Mapping", conditional=expected_versions is not None
+            )
+        await db.commit()
+        
+        response.headers["ETag"] = version_etag(mapping.version)
+        return _mapping_from_row(mapping)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error updating mapping: {str(e)}"
+        )
+
+@router.delete("/{mapping_id}")
+async def delete_mapping(
+    mapping_id: int,
+    if_match: Optional[str] = Header(None, alias="If-Match"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Delete a mapping; with If-Match, only if it is still at that version (412 otherwise)
+    """
+    try:
+        query = "DELETE FROM mappings WHERE id = :id"
+        params = {"id": mapping_id}
+        expected_versions = parse_if_match(if_match)
+        if expected_versions is not None:
+            query += " AND version = ANY(:expected_versions)"
+            params["expected_versions"] = expected_versions
+        
+        result = await db.execute(text(query + " RETURNING id"), params)
+        
+        if not result.fetchone():
+            await raise_write_failure(
+                db, "mappings", mapping_id, "Mapping", conditional=expected_versions is not None
+            )
+        
         await db.commit()
         return {"message": "Mapping deleted successfully"}
         
@@ -110,4 +330,19 @@ async def delete_mapping(
         raise HTTPException(
             status_code=500,
             detail=f"Error deleting mapping: {str(e)}"
-        ) 
\ No newline at end of file
+        )
+
+def _mapping_from_row(m) -> Mapping:
+    return Mapping(
+        id=m.id,
+        obligation_id=m.obligation_id,
+        mapping_type=MappingTypeEnum(m.mapping_type),
+        external_id=m.external_id,
+        external_name=m.external_name,
+        external_url=m.external_url,
+        notes=m.notes,
+        mapped_by=m.mapped_by,
+        version=m.version,
+        created_at=m.created_at.isoformat(),
+        updated_at=m.updated_at.isoformat() if m.updated_at else None
+    )
@@ -1,29 +1,49 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, Header
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+import time
+from app.core.conditional import conditional_get, parse_if_match, raise_write_failure, version_etag
 from app.core.database import get_async_db
-from app.schemas.obligation import Obligation, ObligationCreate, ObligationUpdate
+from app.core.pagination import PageParams
+from app.core.schema import CANONICAL_DOCUMENT_ID_SQL
+from app.core.responses import fast_json, json_rows_response
+from app.schemas.obligation import (
+    Obligation, ObligationCreate, ObligationUpdate, ObligationBulkIngest, ObligationBulkIngestResult
+)
 from app.models.obligation import Obligation as ObligationModel, CategoryEnum, PriorityEnum
+from app.services.obligation_ingest import bulk_ingest_obligations
+from app.services.vector_index import index_obligations, unindex_obligations
 
 router = APIRouter()
 
-@router.get("/", response_model=List[Obligation])
+# Columns the obligation API returns; listings never drag along anything wider
+OBLIGATION_COLUMNS = (
+    "id, text, category, priority, source_section, confidence_score, "
+    "document_id, extracted_by, version, created_at, updated_at"
+)
+
+@router.get("/", response_model=List[Obligation], dependencies=[Depends(conditional_get("obligations"))])
 async def list_obligations(
+    request: Request,
+    response: Response,
     document_id: Optional[int] = Query(None, description="Filter by document ID"),
     category: Optional[CategoryEnum] = Query(None, description="Filter by category"),
     priority: Optional[PriorityEnum] = Query(None, description="Filter by priority"),
+    page: PageParams = Depends(),
+    fast: bool = Depends(fast_json),
     db: AsyncSession = Depends(get_async_db)
 ):
     """
-    List obligations with optional filtering
+    List obligations with optional filtering, newest first, one page at a time (see X-Next-Cursor)
     """
     try:
         # Build query
-        query = "SELECT * FROM obligations WHERE 1=1"
-        params = {}
+        where, params = page.where()
+        query = f"SELECT {OBLIGATION_COLUMNS} FROM obligations WHERE {where}"
         
         if document_id:
-            query += " AND document_id = :document_id"
+            query += f" AND document_id = {CANONICAL_DOCUMENT_ID_SQL}"
             params["document_id"] = document_id
             
         if category:
@@ -34,65 +54,61 @@ async def list_obligations(
             query += " AND priority = :priority"
             params["priority"] = priority.value
             
-        query += " ORDER BY created_at DESC"
+        query += f" {page.order_by()}"
         
-        result = await db.execute(query, params)
-        obligations = result.fetchall()
+        result = await db.execute(text(query), params)
+        obligations = page.page(result.fetchall(), response)
         
+        if fast:
+            return await json_rows_response(request, response, (ob._mapping for ob in obligations))
         return [
-            Obligation(
-                id=ob.id,
-                text=ob.text,
-                category=CategoryEnum(ob.category),
-                priority=PriorityEnum(ob.priority) if ob.priority else None,
-                source_section=ob.source_section,
-                confidence_score=ob.confidence_score,
-                document_id=ob.document_id,
-                extracted_by=ob.extracted_by,
-                created_at=ob.created_at.isoformat(),
-                updated_at=ob.updated_at.isoformat() if ob.updated_at else None
-            )
+            _obligation_from_row(ob)
             for ob in obligations
         ]
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error fetching obligations: {str(e)}"
         )
 
-@router.get("/{obligation_id}", response_model=Obligation)
-async def get_obligation(
-    obligation_id: int,
+@router.post("/bulk", response_model=ObligationBulkIngestResult)
+async def ingest_obligations(
+    request: ObligationBulkIngest,
     db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get a specific obligation by ID
+    Store a batch of extracted obligations for a document in one transaction
+
+    Obligations for a re-uploaded document are stored on its canonical
+    document, whose id is returned.
     """
+    start_time = time.time()
+    
     try:
         result = await db.execute(
-            "SELECT * FROM obligations WHERE id = :id",
-            {"id": obligation_id}
+            text(f"SELECT {CANONICAL_DOCUMENT_ID_SQL} AS id"),
+            {"document_id": request.document_id}
         )
-        obligation = result.fetchone()
-        
-        if not obligation:
+        document_id = result.scalar_one()
+        if document_id is None:
             raise HTTPException(
                 status_code=404,
-                detail="Obligation not found"
+                detail="Document not found"
             )
         
-        return Obligation(
-            id=obligation.id,
-            text=obligation.text,
-            category=CategoryEnum(obligation.category),
-            priority=PriorityEnum(obligation.priority) if obligation.priority else None,
-            source_section=obligation.source_section,
-            confidence_score=obligation.confidence_score,
-            document_id=obligation.document_id,
-            extracted_by=obligation.extracted_by,
-            created_at=obligation.created_at.isoformat(),
-            updated_at=obligation.updated_at.isoformat() if obligation.updated_at else None
+        ingest = await bulk_ingest_obligations(db, document_id, request.extracted_by, request.obligations)
+        await db.commit()
+        
+        return ObligationBulkIngestResult(
+            document_id=document_id,
+            received=ingest.received,
+            inserted=ingest.inserted,
+            skipped=ingest.skipped,
+            duplicates=ingest.duplicates,
+            processing_time=time.time() - start_time
         )
         
     except HTTPException:
@@ -100,22 +116,21 @@ async def get_obligation(
     except Exception as e:
         raise HTTPException(
             status_code=500,
-            detail=f"Error fetching obligation: {str(e)}"
+            detail=f"Error ingesting obligations: {str(e)}"
         )
 
-@router.put("/{obligation_id}", response_model=Obligation)
-async def update_obligation(
+@router.get("/{obligation_id}", response_model=Obligation)
+async def get_obligation(
     obligation_id: int,
-    updates: ObligationUpdate,
+    response: Response,
     db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Update an obligation
+    Get a specific obligation by ID (the ETag header carries its version for If-Match)
     """
     try:
-        # Check if obligation exists
         result = await db.execute(
-            "SELECT * FROM obligations WHERE id = :id",
+            text(f"SELECT {OBLIGATION_COLUMNS} FROM obligations WHERE id = :id"),
             {"id": obligation_id}
         )
         obligation = result.fetchone()
@@ -126,6 +141,29 @@ async def update_obligation(
                 detail="Obligation not found"
             )
         
+        response.headers["ETag"] = version_etag(obligation.version)
+        return _obligation_from_row(obligation)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error fetching obligation: {str(e)}"
+        )
+
+@router.put("/{obligation_id}", response_model=Obligation)
+async def update_obligation(
+    obligation_id: int,
+    updates: ObligationUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None, alias="If-Match"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Update an obligation; with If-Match, only if it is still at that version (412 otherwise)
+    """
+    try:
         # Build update query
         update_fields = []
         params = {"id": obligation_id}
@@ -157,13 +195,28 @@ async def update_obligation(
             )
         
         update_fields.append("updated_at = NOW()")
+        update_fields.append("version = version + 1")
         
+        # Existence check, version check, write and read-back in one statement
         query = f"UPDATE obligations SET {', '.join(update_fields)} WHERE id = :id"
-        await db.execute(query, params)
+        expected_versions = parse_if_match(if_match)
+        if expected_versions is not None:
+            query += " AND version = ANY(:expected_versions)"
+            params["expected_versions"] = expected_versions
+        query += f" RETURNING {OBLIGATION_COLUMNS}"
+        
+        result = await db.execute(text(query), params)
+        obligation = result.fetchone()
+        if not obligation:
+            await raise_write_failure(
+                db, "obligations", obligation_id, "Obligation", conditional=expected_versions is not None
+            )
         await db.commit()
         
-        # Return updated obligation
-        return await get_obligation(obligation_id, db)
+        if updates.text is not None:
+            await index_obligations([obligation.id], [obligation.text])
+        response.headers["ETag"] = version_etag(obligation.version)
+        return _obligation_from_row(obligation)
         
     except HTTPException:
         raise
@@ -176,24 +229,29 @@ async def update_obligation(
 @router.delete("/{obligation_id}")
 async def delete_obligation(
     obligation_id: int,
+    if_match: Optional[str] = Header(None, alias="If-Match"),
     db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Delete an obligation
+    Delete an obligation; with If-Match, only if it is still at that version (412 otherwise)
     """
     try:
-        result = await db.execute(
-            "DELETE FROM obligations WHERE id = :id",
-            {"id": obligation_id}
-        )
+        query = "DELETE FROM obligations WHERE id = :id"
+        params = {"id": obligation_id}
+        expected_versions = parse_if_match(if_match)
+        if expected_versions is not None:
+            query += " AND version = ANY(:expected_versions)"
+            params["expected_versions"] = expected_versions
         
-        if result.rowcount == 0:
-            raise HTTPException(
-                status_code=404,
-                detail="Obligation not found"
+        result = await db.execute(text(query + " RETURNING id"), params)
+        
+        if not result.fetchone():
+            await raise_write_failure(
+                db, "obligations", obligation_id, "Obligation", conditional=expected_versions is not None
             )
         
         await db.commit()
+        await unindex_obligations([obligation_id])
         return {"message": "Obligation deleted successfully"}
         
     except HTTPException:
@@ -202,4 +260,19 @@ async def delete_obligation(
         raise HTTPException(
             status_code=500,
             detail=f"Error deleting obligation: {str(e)}"
-        ) 
\ No newline at end of file
+        )
+
+def _obligation_from_row(ob) -> Obligation:
+    return Obligation(
+        id=ob.id,
+        text=ob.text,
+        category=CategoryEnum(ob.category),
+        priority=PriorityEnum(ob.priority) if ob.priority else None,
+        source_section=ob.source_section,
+        confidence_score=ob.confidence_score,
+        document_id=ob.document_id,
+        extracted_by=ob.extracted_by,
+        version=ob.version,
+        created_at=ob.created_at.isoformat(),
+        updated_at=ob.updated_at.isoformat() if ob.updated_at else None
+    )
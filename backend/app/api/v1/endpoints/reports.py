@@ -1,98 +1,68 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional, Dict, Any
+from typing import List, Literal, Optional, Dict, Any
+from datetime import datetime, timezone
+from app.core.conditional import conditional_get
+from app.core.config import settings
 from app.core.database import get_async_db
+from app.core.pagination import PageParams
+from app.core.schema import CANONICAL_DOCUMENT_ID_SQL
+from app.core.responses import fast_json, json_rows_response
+from app.services.report_export import export_response
 
 router = APIRouter()
 
-@router.get("/gap-analysis")
+@router.get("/gap-analysis", dependencies=[Depends(conditional_get("obligations", "mappings"))])
 async def generate_gap_analysis(
     document_id: Optional[int] = Query(None, description="Filter by document ID"),
     db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Generate gap analysis report showing unmapped obligations
+    Generate gap analysis summary and breakdowns
+
+    The obligations themselves are listed by /gap-analysis/unmapped and
+    /gap-analysis/mapped.
     """
     try:
-        # Build query to get obligations and their mapping status
+        # One pass over the trigger-maintained counters yields the overall totals
+        # and both breakdowns; the obligations table is never scanned. With no
+        # matching rows the () grouping set still returns one row, of NULL sums
         query = """
-            SELECT 
-                o.id,
-                o.text,
-                o.category,
-                o.priority,
-                o.source_section,
-                d.title as document_title,
-                COUNT(m.id) as mapping_count
-            FROM obligations o
-            JOIN documents d ON o.document_id = d.id
-            LEFT JOIN mappings m ON o.id = m.obligation_id
+            SELECT
+                GROUPING(category) AS all_categories,
+                GROUPING(priority) AS all_priorities,
+                category,
+                priority,
+                COALESCE(SUM(total), 0) AS total,
+                COALESCE(SUM(mapped), 0) AS mapped
+            FROM obligation_gap_stats
+            WHERE total > 0
         """
         
         params = {}
         if document_id:
-            query += " WHERE o.document_id = :document_id"
+            query += f" AND document_id = {CANONICAL_DOCUMENT_ID_SQL}"
             params["document_id"] = document_id
             
-        query += """
-            GROUP BY o.id, o.text, o.category, o.priority, o.source_section, d.title
-            ORDER BY mapping_count ASC, o.created_at DESC
-        """
+        query += " GROUP BY GROUPING SETS ((), (category), (priority))"
         
-        result = await db.execute(query, params)
-        obligations = result.fetchall()
-        
-        # Categorize obligations
-        mapped_obligations = []
-        unmapped_obligations = []
-        
-        for ob in obligations:
-            obligation_data = {
-                "id": ob.id,
-                "text": ob.text,
-                "category": ob.category,
-                "priority": ob.priority,
-                "source_section": ob.source_section,
-                "document_title": ob.document_title,
-                "mapping_count": ob.mapping_count
-            }
-            
-            if ob.mapping_count > 0:
-                mapped_obligations.append(obligation_data)
-            else:
-                unmapped_obligations.append(obligation_data)
+        result = await db.execute(text(query), params)
         
-        # Calculate statistics
-        total_obligations = len(obligations)
-        total_mapped = len(mapped_obligations)
-        total_unmapped = len(unmapped_obligations)
-        mapping_rate = (total_mapped / total_obligations * 100) if total_obligations > 0 else 0
-        
-        # Category breakdown
+        total_obligations = total_mapped = 0
         category_stats = {}
-        for ob in obligations:
-            category = ob.category
-            if category not in category_stats:
-                category_stats[category] = {"total": 0, "mapped": 0, "unmapped": 0}
-            
-            category_stats[category]["total"] += 1
-            if ob.mapping_count > 0:
-                category_stats[category]["mapped"] += 1
-            else:
-                category_stats[category]["unmapped"] += 1
-        
-        # Priority breakdown
         priority_stats = {}
-        for ob in obligations:
-            priority = ob.priority or "unknown"
-            if priority not in priority_stats:
-                priority_stats[priority] = {"total": 0, "mapped": 0, "unmapped": 0}
-            
-            priority_stats[priority]["total"] += 1
-            if ob.mapping_count > 0:
-                priority_stats[priority]["mapped"] += 1
+        for row in result.fetchall():
+            counts = {"total": row.total, "mapped": row.mapped, "unmapped": row.total - row.mapped}
+            if not row.all_categories:
+                category_stats[row.category] = counts
+            elif not row.all_priorities:
+                priority_stats[row.priority] = counts
             else:
-                priority_stats[priority]["unmapped"] += 1
+                total_obligations, total_mapped = row.total, row.mapped
+        
+        total_unmapped = total_obligations - total_mapped
+        mapping_rate = (total_mapped / total_obligations * 100) if total_obligations > 0 else 0
         
         return {
             "summary": {
@@ -103,9 +73,7 @@ async def generate_gap_analysis(
             },
             "category_breakdown": category_stats,
             "priority_breakdown": priority_stats,
-            "unmapped_obligations": unmapped_obligations,
-            "mapped_obligations": mapped_obligations,
-            "generated_at": "2024-01-01T00:00:00Z"  # TODO: Use actual timestamp
+            "generated_at": datetime.now(timezone.utc).isoformat()
         }
         
     except Exception as e:
@@ -114,7 +82,166 @@ async def generate_gap_analysis(
             detail=f"Error generating gap analysis: {str(e)}"
         )
 
-@router.get("/mapping-summary")
+@router.get("/gap-analysis/unmapped")
+async def list_unmapped_obligations(
+    request: Request,
+    response: Response,
+    document_id: Optional[int] = Query(None, description="Filter by document ID"),
+    page: PageParams = Depends(),
+    fast: bool = Depends(fast_json),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Obligations with no mappings, newest first, one page at a time (see X-Next-Cursor)
+    """
+    try:
+        obligations = await _gap_obligations(db, response, page, document_id, mapped=False)
+        if fast:
+            return await json_rows_response(request, response, obligations)
+        return obligations
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error fetching unmapped obligations: {str(e)}"
+        )
+
+@router.get("/gap-analysis/mapped")
+async def list_mapped_obligations(
+    request: Request,
+    response: Response,
+    document_id: Optional[int] = Query(None, description="Filter by document ID"),
+    page: PageParams = Depends(),
+    fast: bool = Depends(fast_json),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Obligations with at least one mapping, newest first, one page at a time (see X-Next-Cursor)
+    """
+    try:
+        obligations = await _gap_obligations(db, response, page, document_id, mapped=True)
+        if fast:
+            return await json_rows_response(request, response, obligations)
+        return obligations
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error fetching mapped obligations: {str(e)}"
+        )
+
+async def _gap_obligations(
+    db: AsyncSession,
+    response: Response,
+    page: PageParams,
+    document_id: Optional[int],
+    mapped: bool
+) -> List[Dict[str, Any]]:
+    where, params = page.where("o")
+    query = f"""
+        SELECT 
+            o.id,
+            o.text,
+            o.category,
+            o.priority,
+            o.source_section,
+            d.title as document_title,
+            o.mapping_count,
+            o.created_at
+        FROM obligations o
+        JOIN documents d ON o.document_id = d.id
+        WHERE {where} AND o.mapping_count {'>' if mapped else '='} 0
+    """
+    
+    if document_id:
+        query += f" AND o.document_id = {CANONICAL_DOCUMENT_ID_SQL}"
+        params["document_id"] = document_id
+        
+    query += f" {page.order_by('o')}"
+    
+    result = await db.execute(text(query), params)
+    
+    return [
+        {
+            "id": ob.id,
+            "text": ob.text,
+            "category": ob.category,
+            "priority": ob.priority,
+            "source_section": ob.source_section,
+            "document_title": ob.document_title,
+            "mapping_count": ob.mapping_count
+        }
+        for ob in page.page(result.fetchall(), response)
+    ]
+
+@router.get("/gap-analysis/export")
+async def export_gap_analysis(
+    format: Literal["csv", "xlsx"] = Query("csv", description="csv or xlsx"),
+    document_id: Optional[int] = Query(None, description="Filter by document ID"),
+    status: Literal["all", "mapped", "unmapped"] = Query("all", description="Which obligations to include"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Download every obligation with its mapping status as a spreadsheet
+    """
+    query = """
+        SELECT
+            o.id,
+            d.title AS document_title,
+            o.category,
+            o.priority,
+            o.source_section,
+            o.text,
+            o.mapping_count,
+            CASE WHEN o.mapping_count > 0 THEN 'mapped' ELSE 'unmapped' END AS status,
+            o.created_at
+        FROM obligations o
+        JOIN documents d ON o.document_id = d.id
+        WHERE TRUE
+    """
+    
+    params = {}
+    if document_id:
+        query += f" AND o.document_id = {CANONICAL_DOCUMENT_ID_SQL}"
+        params["document_id"] = document_id
+        
+    if status != "all":
+        query += f" AND o.mapping_count {'>' if status == 'mapped' else '='} 0"
+        
+    query += " ORDER BY o.id"
+    
+    return await export_response(
+        format,
+        "gap-analysis",
+        ["obligation_id", "document_title", "category", "priority", "source_section",
+         "text", "mapping_count", "status", "created_at"],
+        _stream_rows(db, query, params),
+        sheet_name="Gap Analysis"
+    )
+
+@router.post("/gap-analysis/refresh")
+async def refresh_gap_analysis_stats(
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Recompute the trigger-maintained gap-analysis counters from scratch
+    """
+    try:
+        await db.execute(text("SELECT refresh_obligation_gap_stats()"))
+        await db.commit()
+        return {"message": "Gap analysis statistics refreshed"}
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error refreshing gap analysis statistics: {str(e)}"
+        )
+
+@router.get("/mapping-summary", dependencies=[Depends(conditional_get("mappings", "obligations"))])
 async def get_mapping_summary(
     document_id: Optional[int] = Query(None, description="Filter by document ID"),
     db: AsyncSession = Depends(get_async_db)
@@ -133,15 +260,15 @@ async def get_mapping_summary(
         
         params = {}
         if document_id:
-            query += """
+            query += f"""
                 JOIN obligations o ON m.obligation_id = o.id
-                WHERE o.document_id = :document_id
+                WHERE o.document_id = {CANONICAL_DOCUMENT_ID_SQL}
             """
             params["document_id"] = document_id
             
         query += " GROUP BY m.mapping_type ORDER BY count DESC"
         
-        result = await db.execute(query, params)
+        result = await db.execute(text(query), params)
         mappings = result.fetchall()
         
         return {
@@ -159,4 +286,54 @@ async def get_mapping_summary(
         raise HTTPException(
             status_code=500,
             detail=f"Error generating mapping summary: {str(e)}"
-        ) 
\ No newline at end of file
+        )
+
+@router.get("/mapping-summary/export")
+async def export_mapping_summary(
+    format: Literal["csv", "xlsx"] = Query("csv", description="csv or xlsx"),
+    document_id: Optional[int] = Query(None, description="Filter by document ID"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Download every mapping with its obligation as a spreadsheet
+    """
+    query = """
+        SELECT
+            m.id,
+            m.mapping_type,
+            m.external_id,
+            m.external_name,
+            m.external_url,
+            m.obligation_id,
+            o.text AS obligation_text,
+            d.title AS document_title,
+            m.mapped_by,
+            m.created_at
+        FROM mappings m
+        JOIN obligations o ON m.obligation_id = o.id
+        JOIN documents d ON o.document_id = d.id
+    """
+    
+    params = {}
+    if document_id:
+        query += f" WHERE o.document_id = {CANONICAL_DOCUMENT_ID_SQL}"
+        params["document_id"] = document_id
+        
+    query += " ORDER BY m.id"
+    
+    return await export_response(
+        format,
+        "mapping-summary",
+        ["mapping_id", "mapping_type", "external_id", "external_name", "external_url",
+         "obligation_id", "obligation_text", "document_title", "mapped_by", "created_at"],
+        _stream_rows(db, query, params),
+        sheet_name="Mappings"
+    )
+
+def _stream_rows(db: AsyncSession, query: str, params: Dict[str, Any]):
+    """Row batches from a server-side cursor, so no more than EXPORT_BATCH_SIZE rows are held at once"""
+    async def batches():
+        result = await db.stream(text(query), params)
+        async for rows in result.partitions(settings.EXPORT_BATCH_SIZE):
+            yield rows
+    return batches 
\ No newline at end of file
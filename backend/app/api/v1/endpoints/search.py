@@ -1,69 +1,53 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Literal, Optional
 import time
+from app.core.conditional import read_change_markers
+from app.core.config import settings
 from app.core.database import get_async_db
 from app.schemas.ai import SearchRequest, SearchResponse, SearchResult
 from app.models.obligation import CategoryEnum, PriorityEnum
+from app.services.search_cache import search_cache
+from app.services.vector_index import get_obligation_index, refresh_obligation_index
 
 router = APIRouter()
 
+# Tables whose writes change search results
+SEARCH_TABLES = ("documents", "obligations")
+
 @router.get("/", response_model=SearchResponse)
 async def search_obligations(
-    query: str = Query(..., description="Search query"),
-    limit: Optional[int] = Query(10, description="Maximum number of results"),
+    query: str = Query(..., min_length=1, description="Search query"),
+    limit: Optional[int] = Query(10, ge=1, le=100, description="Maximum number of results"),
     category_filter: Optional[CategoryEnum] = Query(None, description="Filter by category"),
     priority_filter: Optional[PriorityEnum] = Query(None, description="Filter by priority"),
+    mode: Literal["keyword", "semantic"] = Query("keyword", description="keyword (full-text) or semantic (vector index)"),
     db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Search obligations using semantic search
+    Search obligations, best matches first
     """
     start_time = time.time()
     
     try:
-        # TODO: Implement semantic search using Pinecone
-        # For now, use basic text search
-        
-        # Build search query
-        search_query = """
-            SELECT o.*, d.title as document_title
-            FROM obligations o
-            JOIN documents d ON o.document_id = d.id
-            WHERE LOWER(o.text) LIKE LOWER(:search_term)
-        """
-        
-        params = {"search_term": f"%{query}%"}
-        
-        if category_filter:
-            search_query += " AND o.category = :category"
-            params["category"] = category_filter.value
-            
-        if priority_filter:
-            search_query += " AND o.priority = :priority"
-            params["priority"] = priority_filter.value
-            
-        search_query += " ORDER BY o.created_at DESC LIMIT :limit"
-        params["limit"] = limit
+        # Identical searches are served from memory until the next obligation/document write, in any process
+        search_results = None
+        if settings.SEARCH_CACHE_ENABLED:
+            version = await read_change_markers(db, SEARCH_TABLES)
+            cache_key = search_cache.make_key(
+                query, mode=mode, limit=limit, category=category_filter, priority=priority_filter
+            )
+            search_results = search_cache.get(cache_key, version)
         
-        result = await db.execute(search_query, params)
-        obligations = result.fetchall()
-        
-        # Convert to search results
-        search_results = []
-        for ob in obligations:
-            # Calculate a simple similarity score (in production, use vector similarity)
-            similarity_score = 0.8  # Placeholder
-            
-            search_results.append(SearchResult(
-                obligation_id=ob.id,
-                text=ob.text,
-                category=CategoryEnum(ob.category),
-                priority=PriorityEnum(ob.priority) if ob.priority else None,
-                source_section=ob.source_section,
-                document_title=ob.document_title,
-                similarity_score=similarity_score
-            ))
+        if search_results is None:
+            if mode == "semantic":
+                search_results = await _semantic_search(db, query, limit, category_filter, priority_filter)
+            else:
+                search_results = await _keyword_search(db, query, limit, category_filter, priority_filter)
+            if settings.SEARCH_CACHE_ENABLED:
+                search_cache.set(cache_key, search_results, version)
         
         processing_time = time.time() - start_time
         
@@ -77,4 +61,115 @@ async def search_obligations(
         raise HTTPException(
             status_code=500,
             detail=f"Error searching obligations: {str(e)}"
-        ) 
\ No newline at end of file
+        )
+
+@router.get("/cache/stats")
+async def get_search_cache_stats():
+    """Hit/miss counters and current data version of the search result cache"""
+    return {"enabled": settings.SEARCH_CACHE_ENABLED, **search_cache.stats()}
+
+async def _keyword_search(
+    db: AsyncSession,
+    query: str,
+    limit: int,
+    category_filter: Optional[CategoryEnum],
+    priority_filter: Optional[PriorityEnum]
+) -> List[SearchResult]:
+    """
+    Full-text + fuzzy search over obligations.search_vector and the trigram index.
+
+    A row matches if its tsvector matches the websearch-style query or the
+    query is word-similar to its text (catches typos and partial words).
+    similarity_score is the larger of the normalized cover-density rank
+    (ts_rank_cd with normalization 32, in [0, 1)) and trigram word similarity.
+    """
+    search_query = """
+        WITH q AS (SELECT websearch_to_tsquery('english', :query) AS tsq)
+        SELECT o.id, o.text, o.category, o.priority, o.source_section, d.title AS document_title,
+               GREATEST(
+                   ts_rank_cd(o.search_vector, q.tsq, 32),
+                   word_similarity(:query, o.text)
+               ) AS score
+        FROM q, obligations o
+        JOIN documents d ON o.document_id = d.id
+        WHERE (o.search_vector @@ q.tsq OR :query <% o.text)
+    """
+    params = {"query": query}
+    
+    if category_filter:
+        search_query += " AND o.category = :category"
+        params["category"] = category_filter.value
+        
+    if priority_filter:
+        search_query += " AND o.priority = :priority"
+        params["priority"] = priority_filter.value
+        
+    search_query += " ORDER BY score DESC, o.id DESC LIMIT :limit"
+    params["limit"] = limit
+    
+    result = await db.execute(text(search_query), params)
+    
+    return [
+        SearchResult(
+            obligation_id=ob.id,
+            text=ob.text,
+            category=CategoryEnum(ob.category),
+            priority=PriorityEnum(ob.priority) if ob.priority else None,
+            source_section=ob.source_section,
+            document_title=ob.document_title,
+            similarity_score=round(float(ob.score), 4)
+        )
+        for ob in result.fetchall()
+    ]
+
+async def _semantic_search(
+    db: AsyncSession,
+    query: str,
+    limit: int,
+    category_filter: Optional[CategoryEnum],
+    priority_filter: Optional[PriorityEnum]
+) -> List[SearchResult]:
+    """
+    Nearest obligations to the query in the local vector index.
+
+    The index is caught up with recent writes first. It only knows ids, so
+    filters are applied in SQL to an over-fetched candidate list.
+    """
+    await refresh_obligation_index(db)
+    candidates = limit * 10 if category_filter or priority_filter else limit
+    hits = await run_in_threadpool(get_obligation_index().search, query, candidates)
+    if not hits:
+        return []
+    scores = dict(hits)
+    
+    search_query = """
+        SELECT o.id, o.text, o.category, o.priority, o.source_section, d.title AS document_title
+        FROM obligations o
+        JOIN documents d ON o.document_id = d.id
+        WHERE o.id = ANY(:ids)
+    """
+    params = {"ids": list(scores)}
+    
+    if category_filter:
+        search_query += " AND o.category = :category"
+        params["category"] = category_filter.value
+        
+    if priority_filter:
+        search_query += " AND o.priority = :priority"
+        params["priority"] = priority_filter.value
+    
+    result = await db.execute(text(search_query), params)
+    obligations = sorted(result.fetchall(), key=lambda ob: scores[ob.id], reverse=True)[:limit]
+    
+    return [
+        SearchResult(
+            obligation_id=ob.id,
+            text=ob.text,
+            category=CategoryEnum(ob.category),
+            priority=PriorityEnum(ob.priority) if ob.priority else None,
+            source_section=ob.source_section,
+            document_title=ob.document_title,
+            similarity_score=round(max(0.0, scores[ob.id]), 4)
+        )
+        for ob in obligations
+    ]
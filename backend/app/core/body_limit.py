@@ -0,0 +1,48 @@
+from typing import Iterable
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+class BodySizeLimitMiddleware:
+    """
+    Cap request body size on selected paths while the body is being received.
+
+    Starlette parses multipart uploads to a spooled temp file before the
+    endpoint runs, so a size check in the endpoint only fires after the whole
+    body has been read. Here a declared Content-Length over the limit is
+    answered with 413 without reading the body, and a chunked body is cut off
+    with 413 on the first message that crosses the limit.
+    """
+
+    def __init__(self, app, paths: Iterable[str], max_body_size: int):
+        self.app = app
+        self.paths = set(paths)
+        self.max_body_size = max_body_size
+
+    def _too_large(self) -> str:
+        return f"Request body too large. Maximum size: {self.max_body_size / (1024*1024):.1f}MB"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_body_size:
+            response = JSONResponse(status_code=413, content={"detail": self._too_large()})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    # Raised inside body parsing, so FastAPI turns it into the 413 response
+                    raise HTTPException(status_code=413, detail=self._too_large())
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,93 @@
+import hashlib
+from typing import List, Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_async_db
+
+def version_etag(version: int) -> str:
+    """Strong ETag for a single row at a given row version"""
+    return f'"v{version}"'
+
+def parse_if_match(if_match: Optional[str]) -> Optional[List[int]]:
+    """
+    Row versions an If-Match header accepts, or None for an unconditional write.
+
+    "*" only requires the row to exist, so it is unconditional here too; the
+    write still 404s on a missing row. Weak or foreign tags can never match.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    versions = []
+    for tag in if_match.split(","):
+        tag = tag.strip()
+        if tag.startswith('"v') and tag.endswith('"') and tag[2:-1].isdigit():
+            versions.append(int(tag[2:-1]))
+    return versions
+
+async def raise_write_failure(db: AsyncSession, table: str, row_id: int, label: str, conditional: bool) -> None:
+    """
+    Explain why a conditional UPDATE/DELETE ... RETURNING touched no row.
+
+    Only runs on the failure path: 404 if the row is gone, otherwise 412
+    with the row's current ETag so the client can re-read and retry.
+    """
+    current = None
+    if conditional:
+        result = await db.execute(text(f"SELECT version FROM {table} WHERE id = :id"), {"id": row_id})
+        current = result.fetchone()
+    if current is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"{label} not found"
+        )
+    raise HTTPException(
+        status_code=412,
+        detail=f"{label} was modified by someone else; re-read it and retry",
+        headers={"ETag": version_etag(current.version)}
+    )
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison, as If-None-Match requires"""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+async def read_change_markers(db: AsyncSession, tables) -> str:
+    """Current table_change_markers versions of the given tables, e.g. "mappings:12,obligations:40"""
+    result = await db.execute(
+        text("SELECT table_name, version FROM table_change_markers WHERE table_name = ANY(:tables) ORDER BY table_name"),
+        {"tables": list(tables)}
+    )
+    return ",".join(f"{row.table_name}:{row.version}" for row in result.fetchall())
+
+def conditional_get(*tables: str):
+    """
+    Dependency adding a weak ETag to a read endpoint and answering If-None-Match.
+
+    The ETag is derived from the table_change_markers versions of the tables
+    the endpoint reads (bumped by statement-level triggers on every write)
+    plus the query string. When it matches If-None-Match, a 304 is returned
+    before the endpoint's own query runs.
+    """
+    async def dependency(
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_async_db)
+    ) -> str:
+        markers = await read_change_markers(db, tables)
+        digest = hashlib.sha1(f"{request.url.path}?{request.url.query}|{markers}".encode("utf-8")).hexdigest()[:20]
+        etag = f'W/"{digest}"'
+        
+        # Let browsers cache the body but revalidate it on every request
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, etag):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+        return etag
+
+    return dependency
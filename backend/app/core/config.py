@@ -33,20 +33,74 @@ class Settings(BaseSettings):
     PINECONE_ENVIRONMENT: str = ""
     PINECONE_INDEX_NAME: str = "intelidoc-embeddings"
     
+    # Search Result Cache
+    SEARCH_CACHE_ENABLED: bool = True
+    SEARCH_CACHE_MAX_ENTRIES: int = 1024
+    SEARCH_CACHE_TTL_SECONDS: int = 300  # How long an unused result is kept; writes invalidate through table_change_markers
+    
+    # Local Vector Index (semantic search without a hosted vector DB)
+    VECTOR_INDEX_DIR: str = "cache/vector_index"  # Memory-mapped index files
+    VECTOR_DIM: int = 512  # Hashing embedder dimensions; changing it rebuilds the index
+    VECTOR_IVF_LISTS: int = 64  # Coarse clusters once the index is large enough; 0 keeps exact search
+    VECTOR_IVF_PROBES: int = 8  # Clusters scanned per query
+    VECTOR_EMBED_BATCH_SIZE: int = 256
+    
     # AWS S3
     AWS_ACCESS_KEY_ID: str = ""
     AWS_SECRET_ACCESS_KEY: str = ""
     AWS_S3_BUCKET: str = ""
     AWS_REGION: str = "us-east-1"
+    AWS_S3_ENDPOINT_URL: str = ""  # e.g. http://localhost:9000 for MinIO/LocalStack; empty uses AWS
+    S3_MULTIPART_THRESHOLD: int = 8 * 1024 * 1024  # Larger files are uploaded in parts
+    S3_PART_SIZE: int = 8 * 1024 * 1024  # Multipart part / ranged download size (S3 minimum is 5MB)
+    S3_MAX_CONCURRENCY: int = 8  # Parts in flight per transfer
+    
+    # Blob Storage
+    STORAGE_BACKEND: str = "local"  # "local" or "s3"
+    LOCAL_STORAGE_DIR: str = "uploads"  # Root for the local backend, also staging for incoming uploads
+    STORAGE_READ_CHUNK_SIZE: int = 1024 * 1024  # Bytes per ranged read when streaming files back
+    
+    # Pagination
+    DEFAULT_PAGE_SIZE: int = 50
+    MAX_PAGE_SIZE: int = 200  # Upper bound on ?limit= for list endpoints
+    
+    # Response Encoding
+    FAST_JSON_DEFAULT: bool = True  # List endpoints encode rows with orjson unless ?serializer=pydantic
+    COMPRESSION_MIN_SIZE: int = 1024  # Bodies smaller than this are sent uncompressed
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4  # Used when the optional Brotli package is installed
+    
+    # Report Export
+    EXPORT_BATCH_SIZE: int = 1000  # Rows fetched from the server-side cursor per step
     
     # File Upload
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # Bytes read per step when streaming uploads to disk
+    UPLOAD_FORM_OVERHEAD: int = 64 * 1024  # Multipart boundaries and form fields allowed on top of MAX_FILE_SIZE
     ALLOWED_FILE_TYPES: List[str] = [".pdf", ".docx", ".txt"]
+    TEXT_EXTRACTION_WORKERS: int = 0  # Processes for parsing uploads; 0 means one per CPU
+    PDF_PAGES_PER_TASK: int = 25  # Page range handed to each extraction worker
     
     # AI Processing
     CHUNK_SIZE: int = 1000
     CHUNK_OVERLAP: int = 200
     MAX_CHUNKS_PER_DOCUMENT: int = 50
+    AI_MAX_CONCURRENCY: int = 8  # In-flight Gemini calls per worker process
+
+    # AI Response Cache
+    AI_CACHE_ENABLED: bool = True
+    AI_CACHE_MAX_ENTRIES: int = 2048
+    AI_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # 64MB in-process
+    AI_CACHE_TTL_SECONDS: int = 60 * 60 * 24 * 7  # 7 days
+    AI_CACHE_DB_PATH: str = "cache/ai_responses.sqlite3"  # Empty disables the disk tier
+
+    # Folder Reorganization
+    REORG_MANIFEST_DIR: str = "cache/reorg_manifests"  # Per-folder file summary manifests
+    REORG_SESSION_DIR: str = "cache/reorg_sessions"  # Chat-reorg sessions; shared by every API worker
+    REORG_SESSION_TTL_SECONDS: int = 30 * 60  # Idle chat-reorg sessions expire after 30 minutes
+    REORG_MAX_SESSIONS: int = 256
+    REORG_SESSION_HISTORY_TURNS: int = 5  # Earlier user commands replayed in follow-up prompts
+    REORG_PROMPT_TOKEN_BUDGET: int = 24000  # Tokens for folder context, plus the previous proposal in follow-ups
     
     class Config:
         env_file = ".env"
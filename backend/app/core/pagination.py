@@ -0,0 +1,66 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query, Response
+
+from app.core.config import settings
+
+# Response header carrying the cursor for the next page; absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+class PageParams:
+    """
+    Keyset pagination on (created_at, id), newest first.
+
+    Use as a dependency: `page: PageParams = Depends()`. The cursor is the
+    opaque value of the previous response's X-Next-Cursor header.
+    """
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
+        limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE, description="Page size"),
+    ):
+        self.cursor = decode_cursor(cursor) if cursor else None
+        self.limit = limit
+
+    def where(self, alias: str = "") -> Tuple[str, Dict[str, Any]]:
+        """SQL condition selecting rows after the cursor (or TRUE) and its parameters"""
+        if self.cursor is None:
+            return "TRUE", {}
+        prefix = f"{alias}." if alias else ""
+        created_at, row_id = self.cursor
+        return (
+            f"({prefix}created_at, {prefix}id) < (:cursor_created_at, :cursor_id)",
+            {"cursor_created_at": created_at, "cursor_id": row_id},
+        )
+
+    def order_by(self, alias: str = "") -> str:
+        prefix = f"{alias}." if alias else ""
+        return f"ORDER BY {prefix}created_at DESC, {prefix}id DESC LIMIT {self.limit + 1}"
+
+    def page(self, rows: Sequence[Any], response: Response) -> List[Any]:
+        """Trim the extra look-ahead row and set X-Next-Cursor if there is another page"""
+        rows = list(rows)
+        if len(rows) > self.limit:
+            rows = rows[:self.limit]
+            last = rows[-1]
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+        return rows
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    payload = json.dumps([created_at.isoformat(), row_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(payload)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid pagination cursor"
+        )
@@ -0,0 +1,132 @@
+import gzip
+from typing import Any, Dict, Iterable, Literal, Mapping, Optional
+
+from fastapi import Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.core.config import settings
+
+try:
+    import orjson
+except ImportError:  # Endpoints fall back to the pydantic path
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+def fast_json(
+    serializer: Optional[Literal["orjson", "pydantic"]] = Query(
+        None, description="Response encoder: orjson writes rows straight to bytes, pydantic validates them through the response model"
+    )
+) -> bool:
+    """Dependency: whether this request should take the orjson path"""
+    if orjson is None:
+        return False
+    if serializer is None:
+        return settings.FAST_JSON_DEFAULT
+    return serializer == "orjson"
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    encodings = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            encodings[name.strip().lower()] = quality
+    return encodings
+
+def _negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """br or gzip, whichever the client accepts and this process can produce, preferring br"""
+    accepted = _accepted_encodings(accept_encoding)
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.GZIP_LEVEL)
+
+async def encoded_response(
+    request: Request,
+    body: bytes,
+    media_type: str,
+    headers: Optional[Mapping[str, str]] = None
+) -> Response:
+    """Response with body compressed as br or gzip when the client accepts it and it is large enough"""
+    headers = {name: value for name, value in (headers or {}).items() if name.lower() != "content-length"}
+    headers["Vary"] = "Accept-Encoding"
+    if len(body) >= settings.COMPRESSION_MIN_SIZE:
+        encoding = _negotiate_encoding(request.headers.get("accept-encoding", ""))
+        if encoding:
+            body = await run_in_threadpool(_compress, body, encoding)
+            headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=media_type, headers=headers)
+
+async def json_rows_response(request: Request, response: Response, rows: Iterable[Mapping[str, Any]]) -> Response:
+    """
+    Encode DB rows as a JSON array with orjson, bypassing response_model.
+
+    Headers already set on the injected response (ETag, X-Next-Cursor)
+    are carried over. datetimes, enums and None are encoded natively.
+    """
+    body = orjson.dumps([dict(row) for row in rows], option=orjson.OPT_NON_STR_KEYS)
+    return await encoded_response(request, body, "application/json", response.headers)
+
+class CompressionMiddleware:
+    """
+    Compress every other response the way encoded_response does.
+
+    Endpoints that return models (including ?serializer=pydantic) go through
+    here. Responses that already carry a Content-Encoding pass through as they
+    are. So do streamed responses (NDJSON events, exports), whose body arrives
+    in several messages and is sent as it is produced.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = _negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        start_message = None
+        streaming = False
+
+        async def compressing_send(message):
+            nonlocal start_message, streaming
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or streaming:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            raw_headers = start_message["headers"] = list(start_message.get("headers", []))
+            headers = MutableHeaders(raw=raw_headers)
+            if message.get("more_body", False):
+                streaming = True
+            elif "content-encoding" not in headers:
+                headers.add_vary_header("Accept-Encoding")
+                if encoding and len(body) >= settings.COMPRESSION_MIN_SIZE:
+                    body = await run_in_threadpool(_compress, body, encoding)
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(body))
+                    message = {**message, "body": body}
+            await send(start_message)
+            await send(message)
+
+        await self.app(scope, receive, compressing_send)
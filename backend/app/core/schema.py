@@ -0,0 +1,184 @@
+from sqlalchemy import text
+
+# Idempotent DDL applied after Base.metadata.create_all. Columns and objects
+# that the endpoints reach through raw SQL are declared here, in order.
+SCHEMA_UPGRADES = [
+    # Per-page character offsets into documents.content
+    "ALTER TABLE documents ADD COLUMN IF NOT EXISTS page_offsets INTEGER[]",
+    # SHA-256 of the uploaded bytes, computed while streaming to disk
+    "ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)",
+    "CREATE INDEX IF NOT EXISTS ix_documents_content_hash ON documents (content_hash)",
+    # Re-uploads of identical bytes point at the document whose artifacts they reuse
+    "ALTER TABLE documents ADD COLUMN IF NOT EXISTS canonical_document_id INTEGER REFERENCES documents (id)",
+    # Keyset pagination walks (created_at, id) newest first, optionally within a parent
+    "CREATE INDEX IF NOT EXISTS ix_documents_created_at_id ON documents (created_at DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_obligations_created_at_id ON obligations (created_at DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_obligations_document_created_at_id ON obligations (document_id, created_at DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_mappings_created_at_id ON mappings (created_at DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_mappings_obligation_created_at_id ON mappings (obligation_id, created_at DESC, id DESC)",
+    # Full-text search: weighted tsvector kept current by Postgres, plus trigrams for fuzzy matches
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    ALTER TABLE obligations ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(text, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(source_section, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_obligations_search_vector ON obligations USING GIN (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_obligations_text_trgm ON obligations USING GIN (text gin_trgm_ops)",
+    # Incremental vector index refreshes read rows changed since a watermark
+    "CREATE INDEX IF NOT EXISTS ix_obligations_changed_at ON obligations ((COALESCE(updated_at, created_at)))",
+    # Row versions for optimistic concurrency (If-Match on writes)
+    "ALTER TABLE obligations ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1",
+    "ALTER TABLE mappings ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1",
+    # Gap-analysis aggregates, maintained by triggers so reports never scan obligations:
+    # obligations.mapping_count tracks mappings rows, and obligation_gap_stats holds
+    # total/mapped counters per (document, category, priority)
+    "ALTER TABLE obligations ADD COLUMN IF NOT EXISTS mapping_count INTEGER NOT NULL DEFAULT 0",
+    """
+    CREATE TABLE IF NOT EXISTS obligation_gap_stats (
+        document_id INTEGER NOT NULL,
+        category VARCHAR(50) NOT NULL,
+        priority VARCHAR(50) NOT NULL,
+        total INTEGER NOT NULL DEFAULT 0,
+        mapped INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (document_id, category, priority)
+    )
+    """,
+    """
+    CREATE OR REPLACE FUNCTION obligation_gap_stats_apply(
+        p_document_id INTEGER, p_category TEXT, p_priority TEXT, p_total INTEGER, p_mapped INTEGER
+    ) RETURNS void AS $$
+    BEGIN
+        INSERT INTO obligation_gap_stats AS s (document_id, category, priority, total, mapped)
+        VALUES (p_document_id, p_category, COALESCE(p_priority, 'unknown'), p_total, p_mapped)
+        ON CONFLICT (document_id, category, priority) DO UPDATE
+        SET total = s.total + EXCLUDED.total, mapped = s.mapped + EXCLUDED.mapped;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION obligations_gap_stats_trigger() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('DELETE', 'UPDATE') THEN
+            PERFORM obligation_gap_stats_apply(
+                OLD.document_id, OLD.category::text, OLD.priority::text,
+                -1, CASE WHEN OLD.mapping_count > 0 THEN -1 ELSE 0 END
+            );
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM obligation_gap_stats_apply(
+                NEW.document_id, NEW.category::text, NEW.priority::text,
+                1, CASE WHEN NEW.mapping_count > 0 THEN 1 ELSE 0 END
+            );
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS obligations_gap_stats ON obligations",
+    """
+    CREATE TRIGGER obligations_gap_stats
+    AFTER INSERT OR DELETE OR UPDATE OF document_id, category, priority, mapping_count ON obligations
+    FOR EACH ROW EXECUTE FUNCTION obligations_gap_stats_trigger()
+    """,
+    """
+    CREATE OR REPLACE FUNCTION mappings_mapping_count_trigger() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'UPDATE' AND OLD.obligation_id = NEW.obligation_id THEN
+            RETURN NULL;
+        END IF;
+        IF TG_OP IN ('DELETE', 'UPDATE') THEN
+            UPDATE obligations SET mapping_count = mapping_count - 1 WHERE id = OLD.obligation_id;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            UPDATE obligations SET mapping_count = mapping_count + 1 WHERE id = NEW.obligation_id;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS mappings_mapping_count ON mappings",
+    """
+    CREATE TRIGGER mappings_mapping_count
+    AFTER INSERT OR DELETE OR UPDATE OF obligation_id ON mappings
+    FOR EACH ROW EXECUTE FUNCTION mappings_mapping_count_trigger()
+    """,
+    # Recompute every counter from scratch; run as a backfill and if the counters are ever in doubt
+    """
+    CREATE OR REPLACE FUNCTION refresh_obligation_gap_stats() RETURNS void AS $$
+    BEGIN
+        LOCK TABLE obligation_gap_stats IN EXCLUSIVE MODE;
+        UPDATE obligations o
+        SET mapping_count = COALESCE(m.mapping_count, 0)
+        FROM obligations o2
+        LEFT JOIN (
+            SELECT obligation_id, COUNT(*) AS mapping_count FROM mappings GROUP BY obligation_id
+        ) m ON m.obligation_id = o2.id
+        WHERE o.id = o2.id AND o.mapping_count IS DISTINCT FROM COALESCE(m.mapping_count, 0);
+        DELETE FROM obligation_gap_stats;
+        INSERT INTO obligation_gap_stats (document_id, category, priority, total, mapped)
+        SELECT document_id, category::text, COALESCE(priority::text, 'unknown'),
+               COUNT(*), COUNT(*) FILTER (WHERE mapping_count > 0)
+        FROM obligations
+        GROUP BY 1, 2, 3;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "SELECT refresh_obligation_gap_stats()",
+    # Per-table change counters behind the weak ETags of polled read endpoints;
+    # one bump per write statement, not per row. Each table's counter is a single
+    # hot row, so concurrent write transactions on the same table queue on its row
+    # lock until the earlier one commits. That is acceptable for this app's write
+    # rate (uploads, edits, batch ingests); a write-heavy table should move to a
+    # sequence or per-session counter rows summed on read instead.
+    """
+    CREATE TABLE IF NOT EXISTS table_change_markers (
+        table_name VARCHAR(63) PRIMARY KEY,
+        version BIGINT NOT NULL DEFAULT 0,
+        changed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    )
+    """,
+    "INSERT INTO table_change_markers (table_name) VALUES ('documents'), ('obligations'), ('mappings') ON CONFLICT DO NOTHING",
+    """
+    CREATE OR REPLACE FUNCTION bump_table_change_marker() RETURNS trigger AS $$
+    BEGIN
+        UPDATE table_change_markers SET version = version + 1, changed_at = NOW()
+        WHERE table_name = TG_TABLE_NAME;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS documents_change_marker ON documents",
+    """
+    CREATE TRIGGER documents_change_marker
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON documents
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_change_marker()
+    """,
+    "DROP TRIGGER IF EXISTS obligations_change_marker ON obligations",
+    """
+    CREATE TRIGGER obligations_change_marker
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON obligations
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_change_marker()
+    """,
+    "DROP TRIGGER IF EXISTS mappings_change_marker ON mappings",
+    """
+    CREATE TRIGGER mappings_change_marker
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON mappings
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_change_marker()
+    """,
+    # Paged mapped/unmapped gap-analysis lists
+    "CREATE INDEX IF NOT EXISTS ix_obligations_unmapped_created_at_id ON obligations (created_at DESC, id DESC) WHERE mapping_count = 0",
+    "CREATE INDEX IF NOT EXISTS ix_obligations_mapped_created_at_id ON obligations (created_at DESC, id DESC) WHERE mapping_count > 0",
+]
+
+async def apply_schema_upgrades(conn):
+    """Run every statement in SCHEMA_UPGRADES on an open async connection"""
+    for statement in SCHEMA_UPGRADES:
+        await conn.execute(text(statement))
+
+# A re-upload of identical bytes is only a documents row pointing at its
+# canonical document, which owns the text, summary and obligations. Queries
+# filtering by a caller-supplied :document_id resolve it through this.
+CANONICAL_DOCUMENT_ID_SQL = "(SELECT COALESCE(canonical_document_id, id) FROM documents WHERE id = :document_id)"
@@ -0,0 +1,23 @@
+import json
+from typing import Any, AsyncIterator, Dict
+
+from fastapi.responses import StreamingResponse
+
+async def _ndjson_lines(events: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    try:
+        async for event in events:
+            yield json.dumps(event, default=str) + "\n"
+    except Exception as e:
+        # Headers are already sent, so report the failure in-band as the last line
+        yield json.dumps({"type": "error", "error": str(e)}) + "\n"
+
+def ndjson_response(events: AsyncIterator[Dict[str, Any]]) -> StreamingResponse:
+    """Stream dict events as newline-delimited JSON, one event per line"""
+    return StreamingResponse(
+        _ndjson_lines(events),
+        media_type="application/x-ndjson",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Stop nginx from buffering the stream
+        },
+    )
@@ -3,8 +3,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import uvicorn
 
+from app.core.body_limit import BodySizeLimitMiddleware
 from app.core.config import settings
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.responses import CompressionMiddleware
 from app.api.v1.api import api_router
+from app.services.text_extraction import shutdown_extraction_pool
 
 app = FastAPI(
     title="InteliDoc API",
@@ -14,6 +18,14 @@ app = FastAPI(
     redoc_url="/redoc",
 )
 
+# Reject oversized uploads while they are received, not after Starlette has spooled them
+# (added first so CORS still wraps the 413)
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    paths=["/api/v1/documents/upload"],
+    max_body_size=settings.MAX_FILE_SIZE + settings.UPLOAD_FORM_OVERHEAD,
+)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -21,11 +33,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
+# Compress responses that did not go through encoded_response (added last so it is outermost)
+app.add_middleware(CompressionMiddleware)
+
 # Include API routes
 app.include_router(api_router, prefix="/api/v1")
 
+@app.on_event("shutdown")
+async def shutdown():
+    shutdown_extraction_pool()
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to InteliDoc API", "version": "1.0.0"}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class DocumentBase(BaseModel):
@@ -19,7 +19,10 @@ class DocumentUpdate(BaseModel):
 
 class DocumentInDB(DocumentBase):
     id: int
+    content_hash: Optional[str] = None  # SHA-256 of the uploaded bytes
+    canonical_document_id: Optional[int] = None  # First upload of the same bytes, if this is a re-upload
     content: Optional[str] = None
+    page_offsets: Optional[List[int]] = None  # Offset into content where each page starts
     summary: Optional[str] = None
     uploaded_by: int
     created_at: datetime
@@ -29,4 +32,17 @@ class DocumentInDB(DocumentBase):
         from_attributes = True
 
 class Document(DocumentInDB):
-    pass 
\ No newline at end of file
+    pass 
+
+class DocumentListItem(DocumentBase):
+    """Row of the document listing; content and page offsets come from the detail endpoint"""
+    id: int
+    content_hash: Optional[str] = None
+    canonical_document_id: Optional[int] = None
+    summary: Optional[str] = None
+    uploaded_by: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 from datetime import datetime
 from app.models.mapping import MappingTypeEnum
 
@@ -24,6 +24,7 @@ class MappingUpdate(BaseModel):
 class MappingInDB(MappingBase):
     id: int
     mapped_by: int
+    version: Optional[int] = None  # Row version; sent back as If-Match on writes
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -31,4 +32,25 @@ class MappingInDB(MappingBase):
         from_attributes = True
 
 class Mapping(MappingInDB):
-    pass 
\ No newline at end of file
+    pass 
+
+# Largest batch accepted by the batch endpoints; each batch is a single statement
+MAPPING_BATCH_MAX_ITEMS = 1000
+
+class MappingBatchCreate(BaseModel):
+    mappings: List[MappingCreate] = Field(..., min_length=1, max_length=MAPPING_BATCH_MAX_ITEMS)
+
+class MappingBatchDelete(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=MAPPING_BATCH_MAX_ITEMS)
+
+class MappingBatchItemResult(BaseModel):
+    index: int  # Position of the item in the request
+    status: Literal["created", "deleted", "not_found", "invalid"]
+    id: Optional[int] = None
+    mapping: Optional[Mapping] = None
+    error: Optional[str] = None
+
+class MappingBatchResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[MappingBatchItemResult]
@@ -2,6 +2,7 @@ from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
 from app.models.obligation import PriorityEnum, CategoryEnum
+from app.schemas.ai import ExtractedObligation
 
 class ObligationBase(BaseModel):
     text: str
@@ -21,10 +22,24 @@ class ObligationUpdate(BaseModel):
     source_section: Optional[str] = None
     confidence_score: Optional[int] = None
 
+class ObligationBulkIngest(BaseModel):
+    document_id: int
+    extracted_by: int
+    obligations: List[ExtractedObligation]
+
+class ObligationBulkIngestResult(BaseModel):
+    document_id: int
+    received: int
+    inserted: int
+    skipped: int  # Blank obligation text
+    duplicates: int  # Repeated in the request or already stored for the document
+    processing_time: float
+
 class ObligationInDB(ObligationBase):
     id: int
     document_id: int
     extracted_by: int
+    version: Optional[int] = None  # Row version; sent back as If-Match on writes
     created_at: datetime
     updated_at: Optional[datetime] = None
 
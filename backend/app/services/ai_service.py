@@ -1,26 +1,177 @@
 import google.generativeai as genai
+import asyncio
+import functools
 import time
 import json
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, List, Dict, Any, Optional, Tuple
 from app.core.config import settings
 from app.schemas.ai import ExtractionRequest, ExtractedObligation, SummarizationRequest
+from app.services.chunking import ObligationMerger, TextChunk, split_into_chunks
+from app.services.folder_manifest import FolderManifest, PendingFile
+from app.services.prompt_compaction import compact_changes, compact_folder_context, count_tokens
+from app.services.reorg_sessions import ReorgSession, ReorgSessionStore
+from app.services.response_cache import ResponseCache
 from app.models.obligation import CategoryEnum, PriorityEnum
 import re
 import os
 
+def _is_json(content: str) -> bool:
+    """Cache predicate for prompts whose response must parse as JSON"""
+    try:
+        json.loads(content)
+    except ValueError:
+        return False
+    return True
+
 class AIService:
     def __init__(self):
         genai.configure(api_key=settings.GEMINI_API_KEY)
         self.model = settings.GEMINI_MODEL
         self.max_tokens = settings.GEMINI_MAX_TOKENS
         self.temperature = settings.GEMINI_TEMPERATURE
+        # Dedicated pool for blocking Gemini calls, shared by the sync and async surfaces
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.AI_MAX_CONCURRENCY,
+            thread_name_prefix="gemini"
+        )
+        self.cache = ResponseCache(
+            max_entries=settings.AI_CACHE_MAX_ENTRIES,
+            max_bytes=settings.AI_CACHE_MAX_BYTES,
+            ttl_seconds=settings.AI_CACHE_TTL_SECONDS,
+            db_path=settings.AI_CACHE_DB_PATH or None
+        ) if settings.AI_CACHE_ENABLED else None
+        self.reorg_sessions = ReorgSessionStore(
+            settings.REORG_SESSION_DIR,
+            ttl_seconds=settings.REORG_SESSION_TTL_SECONDS,
+            max_sessions=settings.REORG_MAX_SESSIONS
+        )
+
+    def extract_obligations(self, request: ExtractionRequest, raise_errors: bool = False) -> List[ExtractedObligation]:
+        """
+        Extract obligations/requirements from text using enhanced enterprise-focused prompts.
+
+        Long documents are split into overlapping, section-aligned chunks that are
+        extracted concurrently and merged, so latency is bounded by the slowest chunk.
+        By default a chunk that fails contributes no obligations; with raise_errors
+        the first API or parse error is raised instead.
+        """
+        chunks = self._chunk_text(request.text)
+        if not chunks:
+            return []
+
+        merger = ObligationMerger()
+        futures = [
+            self._executor.submit(self._extract_from_chunk, request, chunk, len(chunks), raise_errors)
+            for chunk in chunks
+        ]
+        # Merge in document order so the earliest copy of a duplicate wins ties
+        for future in futures:
+            merger.extend(future.result())
+
+        return merger.obligations
 
-    def extract_obligations(self, request: ExtractionRequest) -> List[ExtractedObligation]:
+    async def extract_obligations_async(self, request: ExtractionRequest) -> List[ExtractedObligation]:
         """
-        Extract obligations/requirements from text using enhanced enterprise-focused prompts
+        Non-blocking variant of extract_obligations; chunks are awaited concurrently
+        """
+        chunks = self._chunk_text(request.text)
+        if not chunks:
+            return []
+
+        results = await asyncio.gather(*[
+            self._extract_from_chunk_async(request, chunk, len(chunks))
+            for chunk in chunks
+        ])
+
+        # Merging compares texts pairwise; run it off the event loop
+        merger = ObligationMerger()
+        loop = asyncio.get_running_loop()
+        for obligations in results:
+            await loop.run_in_executor(None, merger.extend, obligations)
+
+        return merger.obligations
+
+    async def iter_obligations_async(self, request: ExtractionRequest) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Extract obligations and yield them as soon as each chunk finishes.
+
+        Emits a "start" event with the chunk count, "obligation" events for
+        each obligation not already seen in an earlier-finishing chunk,
+        a "progress" event per completed chunk, and a closing "done" trailer
+        with totals and processing_time.
         """
         start_time = time.time()
-        
+        chunks = self._chunk_text(request.text)
+        yield {"type": "start", "total_chunks": len(chunks)}
+
+        async def extract(chunk: TextChunk):
+            return chunk, await self._extract_from_chunk_async(request, chunk, len(chunks))
+
+        merger = ObligationMerger()
+        loop = asyncio.get_running_loop()
+        completed = 0
+        for next_done in asyncio.as_completed([extract(chunk) for chunk in chunks]):
+            chunk, obligations = await next_done
+            completed += 1
+            # Merging compares texts pairwise; run it off the event loop
+            for obligation in await loop.run_in_executor(None, merger.extend, obligations):
+                yield {
+                    "type": "obligation",
+                    "chunk_index": chunk.index,
+                    "obligation": obligation.model_dump(mode="json")
+                }
+            yield {"type": "progress", "completed_chunks": completed, "total_chunks": len(chunks)}
+
+        yield {
+            "type": "done",
+            "total_extracted": len(merger.obligations),
+            "total_chunks": len(chunks),
+            "processing_time": time.time() - start_time
+        }
+
+    def _chunk_text(self, text: str) -> List[TextChunk]:
+        return split_into_chunks(
+            text,
+            chunk_size=settings.CHUNK_SIZE,
+            chunk_overlap=settings.CHUNK_OVERLAP,
+            max_chunks=settings.MAX_CHUNKS_PER_DOCUMENT,
+        )
+
+    def _extract_from_chunk(self, request: ExtractionRequest, chunk: TextChunk, total_chunks: int, raise_errors: bool = False) -> List[ExtractedObligation]:
+        """Run extraction for a single chunk; errors are logged and yield no obligations unless raise_errors"""
+        try:
+            content = self._generate(
+                self._build_extraction_prompt(request, chunk, total_chunks),
+                max_output_tokens=self.max_tokens,
+                temperature=self.temperature,
+                cacheable=_is_json
+            )
+        except Exception as e:
+            print(f"Gemini API error on chunk {chunk.index + 1}/{total_chunks}: {e}")
+            if raise_errors:
+                raise
+            return []
+
+        print(f"Gemini raw response (chunk {chunk.index + 1}/{total_chunks}):", content)
+        return self._parse_obligations(content, chunk, raise_errors)
+
+    async def _extract_from_chunk_async(self, request: ExtractionRequest, chunk: TextChunk, total_chunks: int) -> List[ExtractedObligation]:
+        try:
+            content = await self._generate_async(
+                self._build_extraction_prompt(request, chunk, total_chunks),
+                max_output_tokens=self.max_tokens,
+                temperature=self.temperature,
+                cacheable=_is_json
+            )
+        except Exception as e:
+            print(f"Gemini API error on chunk {chunk.index + 1}/{total_chunks}: {e}")
+            return []
+
+        print(f"Gemini raw response (chunk {chunk.index + 1}/{total_chunks}):", content)
+        return self._parse_obligations(content, chunk)
+
+    def _build_extraction_prompt(self, request: ExtractionRequest, chunk: TextChunk, total_chunks: int) -> str:
         # Enhanced system prompt for enterprise use cases
         system_prompt = """You are an enterprise compliance and requirements intelligence expert specializing in PMO, GRC, and product management. Your role is to extract actionable obligations, requirements, and compliance items from unstructured documents and transform them into structured, traceable data.
 
@@ -55,6 +206,16 @@ Priorities:
 
 Return ONLY a valid JSON array with no additional text."""
 
+        if total_chunks > 1:
+            chunk_context = (
+                f"Excerpt: part {chunk.index + 1} of {total_chunks} (characters {chunk.start}-{chunk.end}). "
+                "Only extract items stated in this excerpt; neighbouring parts are processed separately.\n"
+            )
+            if chunk.section:
+                chunk_context += f"Section in effect at the start of this excerpt: {chunk.section}\n"
+        else:
+            chunk_context = ""
+
         # Enhanced user prompt with enterprise context
         user_prompt = f"""Extract obligations, requirements, or compliance items from the following enterprise document. Focus on items that can be:
 1. Mapped to internal policies, controls, or Jira tickets
@@ -65,7 +226,7 @@ Return ONLY a valid JSON array with no additional text."""
 Document Title: {request.document_title or 'Unknown'}
 Document Type: {request.document_type or 'General'}
 Business Context: {getattr(request, 'business_context', 'Enterprise document analysis')}
-
+{chunk_context}
 For each item, provide:
 - obligation_text: Specific, actionable requirement or obligation
 - category: Best-fit category for enterprise systems
@@ -75,7 +236,7 @@ For each item, provide:
 - compliance_framework: Relevant compliance framework if applicable (optional)
 
 TEXT:
-{request.text}
+{chunk.text}
 
 Return as JSON array:
 [
@@ -89,61 +250,151 @@ Return as JSON array:
   }}
 ]"""
 
+        return f"{system_prompt}\n\n{user_prompt}"
+
+    def _parse_obligations(self, content: str, chunk: Optional[TextChunk] = None, raise_errors: bool = False) -> List[ExtractedObligation]:
+        """Parse a Gemini JSON array response into ExtractedObligation records"""
         try:
-            model = genai.GenerativeModel(self.model)
-            response = model.generate_content(
-                f"{system_prompt}\n\n{user_prompt}",
-                generation_config=genai.types.GenerationConfig(
-                    max_output_tokens=self.max_tokens,
-                    temperature=self.temperature
-                )
-            )
-            
-            content = response.text.strip()
-            print("Gemini raw response:", content)
-            
-            # Parse JSON response
-            try:
-                obligations_data = json.loads(content)
-            except Exception as e:
-                print(f"JSON parsing error: {e}\nRaw response: {content}")
-                return []
-                
-            if not isinstance(obligations_data, list):
-                obligations_data = [obligations_data]
-                
-            extracted_obligations = []
-            for item in obligations_data:
-                # Validate and convert category
-                category_str = item.get("category", "other").lower()
-                category = self._map_category(category_str)
-                
-                # Validate and convert priority
-                priority_str = item.get("priority", "medium").lower()
-                priority = self._map_priority(priority_str)
-                
-                extracted_obligations.append(ExtractedObligation(
-                    obligation_text=item.get("obligation_text", ""),
-                    category=category,
-                    priority=priority,
-                    source_section=item.get("source_section"),
-                    confidence_score=85,  # Default confidence for Gemini
-                    business_impact=item.get("business_impact"),
-                    compliance_framework=item.get("compliance_framework")
-                ))
-            
-            return extracted_obligations
-                
+            obligations_data = json.loads(content)
         except Exception as e:
-            print(f"Gemini API error: {e}")
+            print(f"JSON parsing error: {e}\nRaw response: {content}")
+            if raise_errors:
+                raise ValueError(f"Unparseable extraction response: {e}") from e
             return []
 
+        if not isinstance(obligations_data, list):
+            obligations_data = [obligations_data]
+
+        extracted_obligations = []
+        for item in obligations_data:
+            if not isinstance(item, dict):
+                continue
+
+            # Validate and convert category
+            category_str = item.get("category", "other").lower()
+            category = self._map_category(category_str)
+
+            # Validate and convert priority
+            priority_str = item.get("priority", "medium").lower()
+            priority = self._map_priority(priority_str)
+
+            extracted_obligations.append(ExtractedObligation(
+                obligation_text=item.get("obligation_text", ""),
+                category=category,
+                priority=priority,
+                source_section=item.get("source_section") or (chunk.section if chunk else None),
+                confidence_score=85,  # Default confidence for Gemini
+                business_impact=item.get("business_impact"),
+                compliance_framework=item.get("compliance_framework")
+            ))
+
+        return extracted_obligations
+
+    def _generate(
+        self,
+        prompt: str,
+        max_output_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        cacheable: Optional[Callable[[str], bool]] = None
+    ) -> str:
+        """
+        Blocking Gemini call returning the stripped response text, served from cache when possible.
+
+        A response is only cached if it is non-empty and passes cacheable, so a
+        malformed answer is retried on the next call instead of being replayed.
+        """
+        cache_key = self._cache_key(prompt, max_output_tokens, temperature)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        content = self._call_model(prompt, max_output_tokens, temperature)
+        if cache_key is not None and self._should_cache(content, cacheable):
+            self.cache.set(cache_key, content)
+        return content
+
+    async def _generate_async(
+        self,
+        prompt: str,
+        max_output_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        cacheable: Optional[Callable[[str], bool]] = None
+    ) -> str:
+        """
+        Run a Gemini call on the dedicated executor so the event loop stays free.
+
+        The executor has AI_MAX_CONCURRENCY workers, which caps in-flight calls
+        per process; excess requests queue instead of piling onto the API.
+        Cache reads and writes can hit the SQLite tier, so they run on the
+        default executor rather than the loop or a Gemini slot.
+        """
+        loop = asyncio.get_running_loop()
+        cache_key = self._cache_key(prompt, max_output_tokens, temperature)
+        if cache_key is not None:
+            cached = await loop.run_in_executor(None, self.cache.get, cache_key)
+            if cached is not None:
+                return cached
+
+        content = await loop.run_in_executor(
+            self._executor,
+            functools.partial(self._call_model, prompt, max_output_tokens, temperature)
+        )
+        if cache_key is not None and self._should_cache(content, cacheable):
+            await loop.run_in_executor(None, self.cache.set, cache_key, content)
+        return content
+
+    @staticmethod
+    def _should_cache(content: str, cacheable: Optional[Callable[[str], bool]]) -> bool:
+        if not content:
+            return False
+        return cacheable is None or cacheable(content)
+
+    def _call_model(self, prompt: str, max_output_tokens: Optional[int], temperature: Optional[float]) -> str:
+        generation_config = None
+        if max_output_tokens is not None or temperature is not None:
+            generation_config = genai.types.GenerationConfig(
+                max_output_tokens=max_output_tokens,
+                temperature=temperature
+            )
+        model = genai.GenerativeModel(self.model)
+        response = model.generate_content(prompt, generation_config=generation_config)
+        return response.text.strip()
+
+    def _cache_key(self, prompt: str, max_output_tokens: Optional[int], temperature: Optional[float]) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return ResponseCache.make_key(
+            self.model,
+            prompt,
+            {"max_output_tokens": max_output_tokens, "temperature": temperature}
+        )
+
     def summarize_text(self, request: SummarizationRequest) -> Dict[str, Any]:
         """
         Generate a summary of the provided text
         """
         start_time = time.time()
-        
+        try:
+            content = self._generate(self._build_summary_prompt(request), max_output_tokens=1000, temperature=0.3, cacheable=_is_json)
+        except Exception as e:
+            print(f"Gemini API error: {e}")
+            return self._summary_error(start_time)
+        return self._parse_summary(content, start_time)
+
+    async def summarize_text_async(self, request: SummarizationRequest) -> Dict[str, Any]:
+        """
+        Non-blocking variant of summarize_text
+        """
+        start_time = time.time()
+        try:
+            content = await self._generate_async(self._build_summary_prompt(request), max_output_tokens=1000, temperature=0.3, cacheable=_is_json)
+        except Exception as e:
+            print(f"Gemini API error: {e}")
+            return self._summary_error(start_time)
+        return self._parse_summary(content, start_time)
+
+    def _build_summary_prompt(self, request: SummarizationRequest) -> str:
         system_prompt = """You are an expert at summarizing documents and extracting key points. Provide clear, concise summaries that capture the main requirements, obligations, and important details."""
 
         user_prompt = f"""Summarize the following text in {request.max_length} words or less. Also extract 3-5 key points.
@@ -157,47 +408,61 @@ Provide your response as JSON:
   "key_points": ["Point 1", "Point 2", "Point 3"]
 }}"""
 
+        return f"{system_prompt}\n\n{user_prompt}"
+
+    def _parse_summary(self, content: str, start_time: float) -> Dict[str, Any]:
+        print("Gemini raw response:", content)
+
         try:
-            model = genai.GenerativeModel(self.model)
-            response = model.generate_content(
-                f"{system_prompt}\n\n{user_prompt}",
-                generation_config=genai.types.GenerationConfig(
-                    max_output_tokens=1000,
-                    temperature=0.3
-                )
-            )
-            
-            content = response.text.strip()
-            print("Gemini raw response:", content)
-            
-            try:
-                result = json.loads(content)
-                return {
-                    "summary": result.get("summary", ""),
-                    "key_points": result.get("key_points", []),
-                    "processing_time": time.time() - start_time
-                }
-            except Exception as e:
-                # Fallback: treat as plain text
-                print(f"JSON parsing error: {e}\nRaw response: {content}")
-                return {
-                    "summary": content,
-                    "key_points": [],
-                    "processing_time": time.time() - start_time
-                }
-                
+            result = json.loads(content)
+            return {
+                "summary": result.get("summary", ""),
+                "key_points": result.get("key_points", []),
+                "processing_time": time.time() - start_time
+            }
         except Exception as e:
-            print(f"Gemini API error: {e}")
+            # Fallback: treat as plain text
+            print(f"JSON parsing error: {e}\nRaw response: {content}")
             return {
-                "summary": "Error generating summary",
+                "summary": content,
                 "key_points": [],
                 "processing_time": time.time() - start_time
             }
 
+    def _summary_error(self, start_time: float) -> Dict[str, Any]:
+        return {
+            "summary": "Error generating summary",
+            "key_points": [],
+            "processing_time": time.time() - start_time
+        }
+
     def analyze_document_structure(self, text: str, document_type: str = "general") -> Dict[str, Any]:
         """
         Analyze document structure and extract metadata for enterprise document management
         """
+        try:
+            content = self._generate(
+                self._build_structure_prompt(text, document_type), max_output_tokens=1000, temperature=0.3, cacheable=_is_json
+            )
+        except Exception as e:
+            print(f"Document structure analysis error: {e}")
+            return {"error": "Failed to analyze document structure"}
+        return self._parse_structure(content)
+
+    async def analyze_document_structure_async(self, text: str, document_type: str = "general") -> Dict[str, Any]:
+        """
+        Non-blocking variant of analyze_document_structure
+        """
+        try:
+            content = await self._generate_async(
+                self._build_structure_prompt(text, document_type), max_output_tokens=1000, temperature=0.3, cacheable=_is_json
+            )
+        except Exception as e:
+            print(f"Document structure analysis error: {e}")
+            return {"error": "Failed to analyze document structure"}
+        return self._parse_structure(content)
+
+    def _build_structure_prompt(self, text: str, document_type: str) -> str:
         system_prompt = """You are an expert in enterprise document analysis and information governance. Analyze the structure and content of documents to extract metadata useful for PMO, compliance, and project management."""
 
         user_prompt = f"""Analyze the following document and extract structural metadata:
@@ -219,31 +484,48 @@ Provide analysis as JSON:
   "summary": "Brief document summary"
 }}"""
 
+        return f"{system_prompt}\n\n{user_prompt}"
+
+    def _parse_structure(self, content: str) -> Dict[str, Any]:
         try:
-            model = genai.GenerativeModel(self.model)
-            response = model.generate_content(
-                f"{system_prompt}\n\n{user_prompt}",
-                generation_config=genai.types.GenerationConfig(
-                    max_output_tokens=1000,
-                    temperature=0.3
-                )
-            )
-            
-            content = response.text.strip()
-            try:
-                return json.loads(content)
-            except Exception as e:
-                print(f"JSON parsing error: {e}")
-                return {"error": "Failed to parse document structure"}
-                
+            return json.loads(content)
         except Exception as e:
-            print(f"Document structure analysis error: {e}")
-            return {"error": "Failed to analyze document structure"}
+            print(f"JSON parsing error: {e}")
+            return {"error": "Failed to parse document structure"}
 
     def generate_compliance_mapping(self, obligation_text: str, existing_controls: List[str]) -> Dict[str, Any]:
         """
         Generate compliance mapping suggestions for obligations
         """
+        try:
+            content = self._generate(
+                self._build_compliance_mapping_prompt(obligation_text, existing_controls),
+                max_output_tokens=1000,
+                temperature=0.3,
+                cacheable=_is_json
+            )
+        except Exception as e:
+            print(f"Compliance mapping error: {e}")
+            return {"error": "Failed to generate compliance mapping"}
+        return self._parse_compliance_mapping(content)
+
+    async def generate_compliance_mapping_async(self, obligation_text: str, existing_controls: List[str]) -> Dict[str, Any]:
+        """
+        Non-blocking variant of generate_compliance_mapping
+        """
+        try:
+            content = await self._generate_async(
+                self._build_compliance_mapping_prompt(obligation_text, existing_controls),
+                max_output_tokens=1000,
+                temperature=0.3,
+                cacheable=_is_json
+            )
+        except Exception as e:
+            print(f"Compliance mapping error: {e}")
+            return {"error": "Failed to generate compliance mapping"}
+        return self._parse_compliance_mapping(content)
+
+    def _build_compliance_mapping_prompt(self, obligation_text: str, existing_controls: List[str]) -> str:
         system_prompt = """You are a GRC expert specializing in mapping requirements to internal controls and compliance frameworks."""
 
         user_prompt = f"""Given this obligation: "{obligation_text}"
@@ -261,77 +543,264 @@ Suggest mappings and identify gaps. Return as JSON:
   "compliance_frameworks": ["framework1", "framework2"]
 }}"""
 
+        return f"{system_prompt}\n\n{user_prompt}"
+
+    def _parse_compliance_mapping(self, content: str) -> Dict[str, Any]:
         try:
-            model = genai.GenerativeModel(self.model)
-            response = model.generate_content(
-                f"{system_prompt}\n\n{user_prompt}",
-                generation_config=genai.types.GenerationConfig(
-                    max_output_tokens=1000,
-                    temperature=0.3
-                )
-            )
-            
-            content = response.text.strip()
-            try:
-                return json.loads(content)
-            except Exception as e:
-                print(f"Compliance mapping error: {e}")
-                return {"error": "Failed to generate compliance mapping"}
-                
+            return json.loads(content)
         except Exception as e:
             print(f"Compliance mapping error: {e}")
             return {"error": "Failed to generate compliance mapping"}
 
-    def analyze_and_propose_reorg(self, folder_path: str) -> dict:
+    def analyze_and_propose_reorg(self, folder_path: str, message: Optional[str] = None) -> dict:
         """Scan folder, summarize files, and propose a reorganization plan using Gemini."""
-        folder_tree = {}
-        file_summaries = {}
-        # Recursively scan folder
-        for root, dirs, files in os.walk(folder_path):
-            rel_root = os.path.relpath(root, folder_path)
-            folder_tree[rel_root] = files
-            for file in files:
-                file_path = os.path.join(root, file)
-                try:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read(2000)  # Read first 2KB for summary
-                except Exception as e:
-                    content = f"[Error reading file: {e}]"
-                # Summarize file
-                summary_prompt = f"Summarize the following file for project management, compliance, and PMO context.\n\nFILENAME: {file}\nCONTENT:\n{content}\n\nReturn a 1-2 sentence summary."
-                try:
-                    model = genai.GenerativeModel(self.model)
-                    response = model.generate_content(summary_prompt)
-                    summary = response.text.strip()
-                except Exception as e:
-                    summary = f"[AI summary error: {e}]"
-                file_summaries[file_path] = summary
-        # Build prompt for reorganization
-        reorg_prompt = (
+        folder_tree, file_summaries = self.scan_folder(folder_path)
+        try:
+            plan = self._generate(self._build_reorg_prompt(folder_path, folder_tree, file_summaries, message), cacheable=_is_json)
+        except Exception as e:
+            print(f"Gemini API error in reorg: {e}")
+            return {"error": str(e)}
+        return self._reorg_result(folder_tree, file_summaries, message, plan)
+
+    async def analyze_and_propose_reorg_async(self, folder_path: str, message: Optional[str] = None) -> dict:
+        """Non-blocking variant of analyze_and_propose_reorg"""
+        result = {}
+        async for event in self.iter_reorg_events(folder_path, message):
+            if event["type"] in ("plan", "error"):
+                result = {key: value for key, value in event.items() if key != "type"}
+        return result
+
+    async def iter_reorg_events(self, folder_path: str, message: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Scan, summarize and plan, yielding progress events along the way.
+
+        Emits one "scan" event with counts, one "file_summary" event per file
+        (stored summaries first, then fresh ones as they finish), and finally
+        a "plan" event with the same payload as analyze_and_propose_reorg.
+        """
+        loop = asyncio.get_running_loop()
+        manifest = FolderManifest(folder_path, settings.REORG_MANIFEST_DIR)
+        # Walking and hashing is blocking disk I/O; keep it off both the loop and the Gemini pool
+        scan = await loop.run_in_executor(None, manifest.scan)
+
+        total = scan.unchanged + len(scan.pending)
+        yield {
+            "type": "scan",
+            "total_files": total,
+            "to_summarize": len(scan.pending),
+            "unchanged": scan.unchanged,
+            "removed": len(scan.removed)
+        }
+
+        pending_paths = {pending.file_path for pending in scan.pending}
+        completed = 0
+        for file_path, summary in manifest.summaries().items():
+            if file_path in pending_paths:
+                continue
+            completed += 1
+            yield {
+                "type": "file_summary",
+                "path": file_path,
+                "summary": summary,
+                "cached": True,
+                "completed": completed,
+                "total": total
+            }
+
+        errors = {}
+        for next_done in asyncio.as_completed([self._summarize_file_async(pending) for pending in scan.pending]):
+            pending, summary, ok = await next_done
+            if ok:
+                pending.entry.summary = summary
+                pending.entry.summarized_at = time.time()
+            else:
+                errors[pending.file_path] = summary
+            completed += 1
+            yield {
+                "type": "file_summary",
+                "path": pending.file_path,
+                "summary": summary,
+                "cached": False,
+                "completed": completed,
+                "total": total
+            }
+
+        await loop.run_in_executor(None, manifest.save)
+        file_summaries = manifest.summaries()
+        file_summaries.update(errors)
+
+        try:
+            plan = await self._generate_async(
+                self._build_reorg_prompt(folder_path, scan.folder_tree, file_summaries, message), cacheable=_is_json
+            )
+        except Exception as e:
+            print(f"Gemini API error in reorg: {e}")
+            yield {"type": "error", "error": str(e)}
+            return
+        yield {"type": "plan", **self._reorg_result(scan.folder_tree, file_summaries, message, plan)}
+
+    async def chat_reorg_async(self, folder_path: str, message: str, session_id: Optional[str] = None) -> dict:
+        """Chat-driven reorg turn; see iter_chat_reorg_events"""
+        result = {}
+        async for event in self.iter_chat_reorg_events(folder_path, message, session_id):
+            if event["type"] in ("plan", "error"):
+                result = {key: value for key, value in event.items() if key != "type"}
+        return result
+
+    async def iter_chat_reorg_events(self, folder_path: str, message: str, session_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run one chat-reorg turn, yielding progress events.
+
+        Without a session_id the folder is scanned and a session is opened that
+        keeps the scanned context and plan history. With one, the folder is not
+        rescanned: the prompt carries the session's compacted folder context,
+        earlier commands, the previous plan and the user's new message. A
+        session only continues on the folder it was opened for.
+        """
+        # Sessions live on disk so any worker can continue them; keep their file I/O off the loop
+        loop = asyncio.get_running_loop()
+        if session_id is None:
+            async for event in self.iter_reorg_events(folder_path, message):
+                if event["type"] == "plan":
+                    session = await loop.run_in_executor(
+                        None, self.reorg_sessions.create, folder_path, event["folder_tree"], event["file_summaries"]
+                    )
+                    turn = session.add_turn(message, event["proposed_changes"])
+                    await loop.run_in_executor(None, self.reorg_sessions.save, session)
+                    event = {**event, "session_id": session.id, "context_ref": session.context_ref, "turn": turn}
+                yield event
+            return
+
+        session = await loop.run_in_executor(None, self.reorg_sessions.get, session_id)
+        if session is None:
+            yield {"type": "error", "error": f"Reorg session {session_id} not found or expired"}
+            return
+        if os.path.normpath(folder_path) != os.path.normpath(session.folder_path):
+            yield {"type": "error", "error": f"Reorg session {session_id} belongs to folder {session.folder_path}, not {folder_path}"}
+            return
+
+        try:
+            plan = await self._generate_async(self._build_followup_reorg_prompt(session, message), cacheable=_is_json)
+        except Exception as e:
+            print(f"Gemini API error in chat-reorg: {e}")
+            yield {"type": "error", "error": str(e)}
+            return
+
+        result = self._reorg_result(session.folder_tree, session.file_summaries, message, plan)
+        turn = session.add_turn(message, result["proposed_changes"])
+        await loop.run_in_executor(None, self.reorg_sessions.save, session)
+        yield {
+            "type": "plan",
+            "session_id": session.id,
+            "context_ref": session.context_ref,
+            "turn": turn,
+            "user_message": message,
+            "proposed_changes": result["proposed_changes"]
+        }
+
+    def _build_followup_reorg_prompt(self, session: ReorgSession, message: str) -> str:
+        # Every turn is a fresh request, so the folder context is sent again. The previous
+        # proposal and earlier commands share REORG_PROMPT_TOKEN_BUDGET with it; the
+        # proposal may take at most half.
+        budget = settings.REORG_PROMPT_TOKEN_BUDGET
+        previous_proposal = compact_changes(session.last_plan, budget // 2)
+        earlier_requests = "\n".join(
+            f"- {turn.message}" for turn in session.turns[-settings.REORG_SESSION_HISTORY_TURNS:]
+        )
+        folder_context = compact_folder_context(
+            session.folder_path,
+            session.folder_tree,
+            session.file_summaries,
+            max(0, budget - count_tokens(previous_proposal) - count_tokens(earlier_requests))
+        )
+        return (
+            "You are an expert in project management and compliance document organization, continuing a folder reorganization conversation. "
+            "Given the following folder structure and file summaries, the earlier user commands and your previous proposal, "
+            "revise the proposal according to the new user command. "
+            "Do not include markdown or code blocks.\n\n"
+            f"FOLDER CONTENTS ({len(session.file_summaries)} files, paths relative to the folder root):\n{folder_context}\n\n"
+            f"EARLIER USER COMMANDS:\n{earlier_requests}\n\n"
+            f"PREVIOUS PROPOSAL: {previous_proposal}\n\n"
+            f"USER COMMAND: {message}\n\n"
+            "Return the complete updated JSON array of changes, where each change is an object with 'action' (move, rename, create), 'source', 'destination', and 'details' fields as needed."
+        )
+
+    def scan_folder(self, folder_path: str) -> Tuple[Dict[str, List[str]], Dict[str, str]]:
+        """
+        Return (folder_tree, file_summaries) for a folder.
+
+        Summaries come from the folder's persisted manifest; only new or changed
+        files are sent to Gemini, concurrently on the AI executor, and deleted
+        files are dropped from the manifest.
+        """
+        manifest = FolderManifest(folder_path, settings.REORG_MANIFEST_DIR)
+        scan = manifest.scan()
+        errors = {}
+        for pending, (summary, ok) in zip(scan.pending, self._executor.map(self._summarize_file, scan.pending)):
+            if ok:
+                pending.entry.summary = summary
+                pending.entry.summarized_at = time.time()
+            else:
+                errors[pending.file_path] = summary
+        manifest.save()
+
+        file_summaries = manifest.summaries()
+        file_summaries.update(errors)
+        return scan.folder_tree, file_summaries
+
+    def _summarize_file(self, pending: PendingFile) -> Tuple[str, bool]:
+        """Summarize one file; returns (summary, ok) so failures are not persisted"""
+        try:
+            return self._generate(self._build_file_summary_prompt(pending)), True
+        except Exception as e:
+            return f"[AI summary error: {e}]", False
+
+    async def _summarize_file_async(self, pending: PendingFile) -> Tuple[PendingFile, str, bool]:
+        try:
+            return pending, await self._generate_async(self._build_file_summary_prompt(pending)), True
+        except Exception as e:
+            return pending, f"[AI summary error: {e}]", False
+
+    def _build_file_summary_prompt(self, pending: PendingFile) -> str:
+        file = os.path.basename(pending.file_path)
+        return f"Summarize the following file for project management, compliance, and PMO context.\n\nFILENAME: {file}\nCONTENT:\n{pending.preview}\n\nReturn a 1-2 sentence summary."
+
+    def _build_reorg_prompt(self, folder_path: str, folder_tree: Dict[str, List[str]], file_summaries: Dict[str, str], message: Optional[str] = None) -> str:
+        # Bounded by REORG_PROMPT_TOKEN_BUDGET however large the folder is
+        folder_context = compact_folder_context(
+            folder_path, folder_tree, file_summaries, settings.REORG_PROMPT_TOKEN_BUDGET
+        )
+        if message is None:
+            return (
+                "You are an expert in project management and compliance document organization. "
+                "Given the following folder structure and file summaries, propose a new, more organized structure and naming convention. "
+                "Output a JSON diff of moves, renames, and new files to create. "
+                "Do not include markdown or code blocks.\n\n"
+                f"FOLDER CONTENTS (paths relative to the folder root):\n{folder_context}\n\n"
+                "Return a JSON array of changes, where each change is an object with 'action' (move, rename, create), 'source', 'destination', and 'details' fields as needed."
+            )
+        return (
             "You are an expert in project management and compliance document organization. "
-            "Given the following folder structure and file summaries, propose a new, more organized structure and naming convention. "
-            "Output a JSON diff of moves, renames, and new files to create. "
+            "Given the following folder structure and file summaries, and the following user command, propose a JSON diff of changes to apply. "
             "Do not include markdown or code blocks.\n\n"
-            f"FOLDER TREE: {folder_tree}\n\nFILE SUMMARIES: {file_summaries}\n\n"
+            f"FOLDER CONTENTS (paths relative to the folder root):\n{folder_context}\n\nUSER COMMAND: {message}\n\n"
             "Return a JSON array of changes, where each change is an object with 'action' (move, rename, create), 'source', 'destination', and 'details' fields as needed."
         )
+
+    def _reorg_result(self, folder_tree: Dict[str, List[str]], file_summaries: Dict[str, str], message: Optional[str], plan: str) -> dict:
         try:
-            model = genai.GenerativeModel(self.model)
-            response = model.generate_content(reorg_prompt)
-            plan = response.text.strip()
-            try:
-                plan_json = json.loads(plan)
-            except Exception as e:
-                print(f"JSON parsing error in reorg plan: {e}\nRaw response: {plan}")
-                plan_json = plan
-            return {
-                "folder_tree": folder_tree,
-                "file_summaries": file_summaries,
-                "proposed_changes": plan_json
-            }
+            plan_json = json.loads(plan)
         except Exception as e:
-            print(f"Gemini API error in reorg: {e}")
-            return {"error": str(e)}
+            print(f"JSON parsing error in reorg plan: {e}\nRaw response: {plan}")
+            plan_json = plan
+        result = {
+            "folder_tree": folder_tree,
+            "file_summaries": file_summaries,
+        }
+        if message is not None:
+            result["user_message"] = message
+        result["proposed_changes"] = plan_json
+        return result
 
     def _map_category(self, category_str: str) -> CategoryEnum:
         """Map string category to CategoryEnum"""
@@ -0,0 +1,233 @@
+import re
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from app.schemas.ai import ExtractedObligation
+
+# Lines that open a new section: "Section 3", "ARTICLE IV", "2.1 Scope", "# Heading", "SECURITY REQUIREMENTS"
+KEYWORD_HEADING_RE = re.compile(r"^(?:section|article|chapter|part|appendix|schedule|annex|§)\s*[\dIVXLC]+\b", re.IGNORECASE)
+OUTLINE_HEADING_RE = re.compile(r"^\d+(?:\.\d+)*[.)]?\s+[A-Z][^.!?]{0,80}$")
+MARKDOWN_HEADING_RE = re.compile(r"^#{1,6}\s+\S")
+UPPERCASE_HEADING_RE = re.compile(r"^[A-Z][A-Z0-9 ,&/:()'\-]{3,80}$")
+PARAGRAPH_BREAK_RE = re.compile(r"\n[ \t]*\n")
+SENTENCE_BREAK_RE = re.compile(r"[.!?;:][\"')\]]?\s+")
+
+DUPLICATE_SIMILARITY = 0.9
+# Near-duplicates differ by a few words; a pair whose differing words hold more than
+# this many times the characters the similarity threshold allows to differ is not compared
+DUPLICATE_WORD_SLACK = 3.0
+
+@dataclass
+class TextChunk:
+    index: int
+    text: str
+    start: int
+    end: int
+    section: Optional[str] = None
+
+def _is_heading(line: str) -> bool:
+    stripped = line.strip()
+    if not stripped or len(stripped) > 120:
+        return False
+    return bool(
+        KEYWORD_HEADING_RE.match(stripped)
+        or OUTLINE_HEADING_RE.match(stripped)
+        or MARKDOWN_HEADING_RE.match(stripped)
+        or UPPERCASE_HEADING_RE.match(stripped)
+    )
+
+def find_section_starts(text: str) -> List[int]:
+    """Return the character offsets of every line that looks like a section heading"""
+    starts = []
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        if _is_heading(line):
+            starts.append(offset)
+        offset += len(line)
+    return starts
+
+def _best_break(text: str, lower: int, upper: int, section_starts: List[int]) -> int:
+    """Pick the most natural split point in (lower, upper]: section > paragraph > line > sentence > word"""
+    for start in reversed(section_starts):
+        if lower < start <= upper:
+            return start
+
+    window = text[lower:upper]
+    paragraphs = [m.end() for m in PARAGRAPH_BREAK_RE.finditer(window)]
+    if paragraphs:
+        return lower + paragraphs[-1]
+
+    newline = window.rfind("\n")
+    if newline != -1:
+        return lower + newline + 1
+
+    sentences = [m.end() for m in SENTENCE_BREAK_RE.finditer(window)]
+    if sentences:
+        return lower + sentences[-1]
+
+    space = window.rfind(" ")
+    if space != -1:
+        return lower + space + 1
+
+    return upper
+
+def _section_for(offset: int, text: str, section_starts: List[int]) -> Optional[str]:
+    heading_start = None
+    for start in section_starts:
+        if start > offset:
+            break
+        heading_start = start
+    if heading_start is None:
+        return None
+    line_end = text.find("\n", heading_start)
+    heading = text[heading_start:line_end if line_end != -1 else len(text)]
+    return heading.strip().lstrip("#").strip() or None
+
+def split_into_chunks(
+    text: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    max_chunks: int,
+) -> List[TextChunk]:
+    """
+    Split text into overlapping chunks, preferring to cut on section boundaries.
+
+    If the document would need more than max_chunks chunks at chunk_size, the
+    chunk size is grown so the whole document is still covered. Each cut is
+    kept late enough that the rest still fits in the chunks left, so no
+    chunk (including the last) is longer than the grown chunk size.
+    """
+    text = text or ""
+    length = len(text)
+    if length == 0:
+        return []
+
+    chunk_overlap = max(0, min(chunk_overlap, chunk_size // 2))
+    stride = chunk_size - chunk_overlap
+    if max_chunks > 0 and length > chunk_size + stride * (max_chunks - 1):
+        stride = -(-(length - chunk_overlap) // max_chunks)
+        chunk_size = stride + chunk_overlap
+
+    section_starts = find_section_starts(text)
+    chunks: List[TextChunk] = []
+    position = 0
+
+    while position < length:
+        upper = position + chunk_size
+        remaining = max_chunks - len(chunks)
+        if upper >= length or (max_chunks > 0 and remaining <= 1):
+            end = length
+        else:
+            lower = position + chunk_size // 2
+            if max_chunks > 0:
+                # Leave no more text than the remaining chunks can hold
+                lower = max(lower, length - chunk_size - stride * (remaining - 2) + chunk_overlap - 1)
+            end = upper if lower >= upper else _best_break(text, lower, upper, section_starts)
+
+        chunk_text = text[position:end]
+        if chunk_text.strip():
+            chunks.append(TextChunk(
+                index=len(chunks),
+                text=chunk_text,
+                start=position,
+                end=end,
+                section=_section_for(position, text, section_starts),
+            ))
+        if end >= length:
+            break
+
+        # Step back by the overlap, but never start mid-word
+        next_position = max(end - chunk_overlap, position + 1)
+        if next_position < end:
+            space = text.find(" ", next_position, end)
+            newline = text.find("\n", next_position, end)
+            candidates = [c + 1 for c in (space, newline) if c != -1]
+            if candidates:
+                next_position = min(candidates)
+        position = next_position
+
+    return chunks
+
+def _normalize(text: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+def _word_weight(words: Set[str]) -> int:
+    return sum(len(word) + 1 for word in words)
+
+class ObligationMerger:
+    """
+    Merge obligations extracted from overlapping chunks.
+
+    The same sentence in an overlap region is usually extracted twice, often
+    with slightly different wording, so near-identical texts are collapsed
+    and the copy with the higher confidence is kept.
+    """
+
+    def __init__(self, similarity_threshold: float = DUPLICATE_SIMILARITY):
+        self.similarity_threshold = similarity_threshold
+        self._obligations: List[ExtractedObligation] = []
+        self._keys: List[str] = []
+        self._exact: Dict[str, int] = {}
+        # Inverted index from word to the kept keys containing it, and each key's word weight
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self._weights: List[int] = []
+        self._matcher = SequenceMatcher(None)
+
+    def _candidates(self, key: str, words: Set[str]) -> List[int]:
+        """Kept keys sharing enough words with key to possibly reach the threshold"""
+        shared: Dict[int, int] = defaultdict(int)
+        for word in words:
+            for i in self._postings.get(word, ()):
+                shared[i] += len(word) + 1
+        weight = _word_weight(words)
+        budget = DUPLICATE_WORD_SLACK * (1 - self.similarity_threshold)
+        return sorted(
+            i for i, common in shared.items()
+            if weight + self._weights[i] - 2 * common <= budget * (len(key) + len(self._keys[i]))
+        )
+
+    def _find_duplicate(self, key: str, words: Set[str]) -> Optional[int]:
+        if key in self._exact:
+            return self._exact[key]
+        threshold = self.similarity_threshold
+        # seq2 is the side SequenceMatcher indexes, so the new key is indexed once
+        matcher = self._matcher
+        matcher.set_seq2(key)
+        for i in self._candidates(key, words):
+            matcher.set_seq1(self._keys[i])
+            if matcher.real_quick_ratio() >= threshold and matcher.quick_ratio() >= threshold and matcher.ratio() >= threshold:
+                return i
+        return None
+
+    def add(self, obligation: ExtractedObligation) -> bool:
+        """Add an obligation; returns False if it duplicated one already seen"""
+        key = _normalize(obligation.obligation_text)
+        if not key:
+            return False
+
+        words = set(key.split())
+        duplicate = self._find_duplicate(key, words)
+        if duplicate is None:
+            index = len(self._keys)
+            self._exact[key] = index
+            self._obligations.append(obligation)
+            self._keys.append(key)
+            self._weights.append(_word_weight(words))
+            for word in words:
+                self._postings[word].append(index)
+            return True
+
+        kept = self._obligations[duplicate]
+        if (obligation.confidence_score or 0) > (kept.confidence_score or 0):
+            self._obligations[duplicate] = obligation
+        return False
+
+    def extend(self, obligations: List[ExtractedObligation]) -> List[ExtractedObligation]:
+        """Add many obligations; returns the ones that were new"""
+        return [obligation for obligation in obligations if self.add(obligation)]
+
+    @property
+    def obligations(self) -> List[ExtractedObligation]:
+        return list(self._obligations)
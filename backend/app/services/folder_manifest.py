@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+# Bytes of each file handed to the model when summarizing
+PREVIEW_BYTES = 2000
+HASH_BLOCK_SIZE = 1024 * 1024
+MANIFEST_VERSION = 1
+
+@dataclass
+class ManifestEntry:
+    path: str  # Relative to the scanned folder
+    size: int
+    mtime_ns: int
+    sha256: str
+    summary: Optional[str] = None
+    summarized_at: Optional[float] = None
+
+@dataclass
+class PendingFile:
+    entry: ManifestEntry
+    file_path: str
+    preview: str
+
+@dataclass
+class FolderScan:
+    folder_tree: Dict[str, List[str]]
+    pending: List[PendingFile] = field(default_factory=list)
+    removed: Set[str] = field(default_factory=set)
+    unchanged: int = 0
+
+def _hash_file(file_path: str) -> Tuple[str, bytes]:
+    """Return the file's SHA-256 and its first PREVIEW_BYTES in a single read pass"""
+    digest = hashlib.sha256()
+    head = b""
+    with open(file_path, "rb") as f:
+        while True:
+            block = f.read(HASH_BLOCK_SIZE)
+            if not block:
+                break
+            if len(head) < PREVIEW_BYTES:
+                head += block[:PREVIEW_BYTES - len(head)]
+            digest.update(block)
+    return digest.hexdigest(), head
+
+class FolderManifest:
+    """
+    Persisted per-file state for a scanned folder.
+
+    Entries are keyed by relative path and remember size, mtime, content hash
+    and the file's AI summary, so a rescan only has to summarize files that
+    are new or whose content actually changed.
+    """
+
+    def __init__(self, folder_path: str, manifest_dir: str):
+        self.folder_path = folder_path
+        folder_id = hashlib.sha1(os.path.abspath(folder_path).encode("utf-8")).hexdigest()
+        self.manifest_path = os.path.join(manifest_dir, f"{folder_id}.json")
+        self.entries: Dict[str, ManifestEntry] = {}
+        self.load()
+
+    def load(self) -> None:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != MANIFEST_VERSION:
+            return
+        self.entries = {
+            item["path"]: ManifestEntry(**item) for item in data.get("files", [])
+        }
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+        data = {
+            "version": MANIFEST_VERSION,
+            "folder_path": os.path.abspath(self.folder_path),
+            "updated_at": time.time(),
+            "files": [asdict(entry) for entry in self.entries.values()],
+        }
+        # A unique temp file per save: concurrent scans of one folder run on different threads
+        fd, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(self.manifest_path),
+            prefix=os.path.basename(self.manifest_path) + ".",
+            suffix=".tmp",
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.manifest_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def scan(self) -> FolderScan:
+        """
+        Walk the folder and reconcile it with the manifest.
+
+        Files whose size and mtime are unchanged are trusted without reading
+        them; otherwise the content hash decides whether the stored summary
+        is still valid. Files that disappeared are dropped from the manifest.
+        """
+        scan = FolderScan(folder_tree={})
+        current: Dict[str, ManifestEntry] = {}
+
+        for root, dirs, files in os.walk(self.folder_path):
+            dirs.sort()
+            files.sort()
+            rel_root = os.path.relpath(root, self.folder_path)
+            scan.folder_tree[rel_root] = files
+            for file in files:
+                file_path = os.path.join(root, file)
+                rel_path = os.path.normpath(os.path.join(rel_root, file))
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+
+                entry = self.entries.get(rel_path)
+                if (
+                    entry is not None
+                    and entry.summary is not None
+                    and entry.size == stat.st_size
+                    and entry.mtime_ns == stat.st_mtime_ns
+                ):
+                    current[rel_path] = entry
+                    scan.unchanged += 1
+                    continue
+
+                try:
+                    digest, head = _hash_file(file_path)
+                    preview = head.decode("utf-8", errors="ignore")
+                except OSError as e:
+                    digest, preview = "", f"[Error reading file: {e}]"
+
+                if entry is not None and entry.summary is not None and digest and entry.sha256 == digest:
+                    # Touched but not modified: keep the summary, refresh the stat fields
+                    entry.size = stat.st_size
+                    entry.mtime_ns = stat.st_mtime_ns
+                    current[rel_path] = entry
+                    scan.unchanged += 1
+                    continue
+
+                new_entry = ManifestEntry(
+                    path=rel_path,
+                    size=stat.st_size,
+                    mtime_ns=stat.st_mtime_ns,
+                    sha256=digest,
+                )
+                current[rel_path] = new_entry
+                scan.pending.append(PendingFile(entry=new_entry, file_path=file_path, preview=preview))
+
+        scan.removed = set(self.entries) - set(current)
+        self.entries = current
+        return scan
+
+    def summaries(self) -> Dict[str, Optional[str]]:
+        """Summaries keyed by the file's path under folder_path"""
+        return {
+            os.path.join(self.folder_path, rel_path): entry.summary
+            for rel_path, entry in self.entries.items()
+        }
@@ -0,0 +1,97 @@
+from dataclasses import dataclass
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas.ai import ExtractedObligation
+
+INGEST_COLUMNS = [
+    "text", "category", "priority", "source_section", "confidence_score", "document_id", "extracted_by",
+]
+
+# Whitespace- and case-insensitive form of obligation text used for duplicate detection
+NORMALIZED_TEXT_SQL = "lower(regexp_replace(btrim({column}), '\\s+', ' ', 'g'))"
+
+@dataclass
+class IngestResult:
+    received: int
+    inserted: int
+    skipped: int  # Blank obligation text
+    duplicates: int  # Repeated within the batch or already stored for the document
+
+def _normalize(obligation_text: str) -> str:
+    return " ".join(obligation_text.split()).lower()
+
+async def bulk_ingest_obligations(
+    db: AsyncSession,
+    document_id: int,
+    extracted_by: int,
+    obligations: List[ExtractedObligation],
+) -> IngestResult:
+    """
+    Store extracted obligations for a document in one transaction.
+
+    Rows are COPY'd into a temporary table shaped like obligations and moved
+    over with a single INSERT ... SELECT that skips text already stored for
+    the document. The caller commits.
+    """
+    records = []
+    seen = set()
+    skipped = duplicates = 0
+    for obligation in obligations:
+        obligation_text = obligation.obligation_text.strip()
+        if not obligation_text:
+            skipped += 1
+            continue
+        key = _normalize(obligation_text)
+        if key in seen:
+            duplicates += 1
+            continue
+        seen.add(key)
+        records.append((
+            obligation_text,
+            obligation.category.value,
+            obligation.priority.value if obligation.priority else None,
+            obligation.source_section,
+            obligation.confidence_score,
+            document_id,
+            extracted_by,
+        ))
+
+    if not records:
+        return IngestResult(received=len(obligations), inserted=0, skipped=skipped, duplicates=duplicates)
+
+    await db.execute(text("CREATE TEMP TABLE obligation_ingest (LIKE obligations INCLUDING DEFAULTS) ON COMMIT DROP"))
+    # Keep staging rows from drawing ids from the obligations sequence
+    await db.execute(text("ALTER TABLE obligation_ingest ALTER COLUMN id DROP DEFAULT, ALTER COLUMN id DROP NOT NULL"))
+
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        "obligation_ingest", records=records, columns=INGEST_COLUMNS
+    )
+
+    columns = ", ".join(INGEST_COLUMNS)
+    result = await db.execute(text(f"""
+        WITH inserted AS (
+            INSERT INTO obligations ({columns})
+            SELECT {columns}
+            FROM obligation_ingest i
+            WHERE NOT EXISTS (
+                SELECT 1 FROM obligations o
+                WHERE o.document_id = i.document_id
+                AND {NORMALIZED_TEXT_SQL.format(column="o.text")} = {NORMALIZED_TEXT_SQL.format(column="i.text")}
+            )
+            RETURNING id
+        )
+        SELECT COUNT(*) AS inserted FROM inserted
+    """))
+    inserted = result.scalar_one()
+
+    return IngestResult(
+        received=len(obligations),
+        inserted=inserted,
+        skipped=skipped,
+        duplicates=duplicates + len(records) - inserted,
+    )
@@ -0,0 +1,187 @@
+import json
+import os
+import re
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+# Tokenizer used for budgeting. Gemini's tokenizer is not public; cl100k_base
+# tracks it closely enough for sizing prompts.
+TOKEN_ENCODING = "cl100k_base"
+BRIEF_SUMMARY_CHARS = 160
+ROLLUP_SUMMARY_CHARS = 400
+ROLLUP_MAX_NAMES = 12
+
+_encoding = None
+_encoding_failed = False
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken, falling back to a chars/4 estimate if it is unavailable"""
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding(TOKEN_ENCODING)
+        except Exception as e:
+            print(f"tiktoken unavailable, estimating token counts: {e}")
+            _encoding_failed = True
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+def _first_sentence(summary: str, limit: int) -> str:
+    summary = " ".join(summary.split())
+    match = re.match(r"(.+?[.!?])(\s|$)", summary)
+    sentence = match.group(1) if match else summary
+    if len(sentence) > limit:
+        sentence = sentence[:limit - 3].rstrip() + "..."
+    return sentence
+
+def _group_by_directory(
+    folder_path: str,
+    folder_tree: Dict[str, List[str]],
+    file_summaries: Dict[str, Optional[str]],
+) -> "OrderedDict[str, List[Tuple[str, str]]]":
+    summaries = {
+        os.path.normpath(os.path.relpath(path, folder_path)): summary or ""
+        for path, summary in file_summaries.items()
+    }
+    directories: "OrderedDict[str, List[Tuple[str, str]]]" = OrderedDict()
+    for directory in sorted(folder_tree):
+        files = folder_tree[directory]
+        directories[directory] = [
+            (name, summaries.get(os.path.normpath(os.path.join(directory, name)), ""))
+            for name in files
+        ]
+    return directories
+
+def _render_directory(directory: str, files: List[Tuple[str, str]], summary_chars: Optional[int]) -> str:
+    lines = [f"{directory}/ ({len(files)} files)"]
+    for name, summary in files:
+        if not summary:
+            lines.append(f"- {name}")
+        elif summary_chars is None:
+            lines.append(f"- {name}: {' '.join(summary.split())}")
+        else:
+            lines.append(f"- {name}: {_first_sentence(summary, summary_chars)}")
+    return "\n".join(lines)
+
+def _render_rollup(directory: str, files: List[Tuple[str, str]], include_summaries: bool) -> str:
+    names = [name for name, _ in files]
+    shown = ", ".join(names[:ROLLUP_MAX_NAMES])
+    if len(names) > ROLLUP_MAX_NAMES:
+        shown += f", ... (+{len(names) - ROLLUP_MAX_NAMES} more)"
+    line = f"{directory}/ ({len(files)} files, rolled up): {shown}"
+    if include_summaries:
+        digest = "; ".join(_first_sentence(summary, 80) for _, summary in files if summary)
+        if digest:
+            if len(digest) > ROLLUP_SUMMARY_CHARS:
+                digest = digest[:ROLLUP_SUMMARY_CHARS - 3].rstrip() + "..."
+            line += f"\n  Contents: {digest}"
+    return line
+
+def _ancestor(directory: str, depth: int) -> str:
+    if directory == "." or depth == 0:
+        return "."
+    parts = directory.split(os.sep)
+    return os.sep.join(parts[:depth]) if len(parts) > depth else directory
+
+def compact_folder_context(
+    folder_path: str,
+    folder_tree: Dict[str, List[str]],
+    file_summaries: Dict[str, Optional[str]],
+    token_budget: int,
+    include_summaries: bool = True,
+) -> str:
+    """
+    Render folder tree + file summaries as the densest text that fits token_budget.
+
+    Paths are relative to folder_path. Representations are tried from most to
+    least detailed: full summaries, first-sentence summaries, per-directory
+    roll-ups (largest directories first), roll-ups merged into ancestor
+    directories at decreasing depth, and finally truncation.
+    """
+    directories = _group_by_directory(folder_path, folder_tree, file_summaries if include_summaries else {})
+
+    def join(sections: List[str]) -> str:
+        return "\n".join(sections)
+
+    # 1-2. Every file listed, with full then shortened summaries
+    for summary_chars in ((None, BRIEF_SUMMARY_CHARS) if include_summaries else (BRIEF_SUMMARY_CHARS,)):
+        sections = [_render_directory(d, files, summary_chars) for d, files in directories.items()]
+        text = join(sections)
+        if count_tokens(text) <= token_budget:
+            return text
+
+    # 3. Roll up the directories that save the most tokens until the rest fits
+    detailed = {d: _render_directory(d, files, BRIEF_SUMMARY_CHARS) for d, files in directories.items()}
+    rolled = {d: _render_rollup(d, files, include_summaries) for d, files in directories.items()}
+    costs = {d: (count_tokens(detailed[d]), count_tokens(rolled[d])) for d in directories}
+    total = sum(detail for detail, _ in costs.values())
+    use_rollup = set()
+    for directory in sorted(directories, key=lambda d: costs[d][0] - costs[d][1], reverse=True):
+        if total <= token_budget:
+            break
+        use_rollup.add(directory)
+        total -= costs[directory][0] - costs[directory][1]
+    text = join([rolled[d] if d in use_rollup else detailed[d] for d in directories])
+    if count_tokens(text) <= token_budget:
+        return text
+
+    # 4. Merge subdirectories into their ancestors, shallower each round
+    max_depth = max((len(d.split(os.sep)) for d in directories if d != "."), default=0)
+    for depth in range(max_depth - 1, -1, -1):
+        merged: "OrderedDict[str, List[Tuple[str, str]]]" = OrderedDict()
+        for directory, files in directories.items():
+            ancestor = _ancestor(directory, depth)
+            prefix = os.path.relpath(directory, ancestor)
+            merged.setdefault(ancestor, []).extend(
+                (name if prefix == "." else os.path.join(prefix, name), summary) for name, summary in files
+            )
+        text = join([_render_rollup(d, files, include_summaries) for d, files in merged.items()])
+        if count_tokens(text) <= token_budget:
+            return text
+
+    # 5. Nothing fits: keep whole sections from the top and say what was dropped
+    kept: List[str] = []
+    used = 0
+    sections = text.split("\n")
+    for i, section in enumerate(sections):
+        cost = count_tokens(section) + 1
+        if used + cost > token_budget - 20:
+            kept.append(f"... ({len(sections) - i} more lines omitted to fit the prompt budget)")
+            break
+        kept.append(section)
+        used += cost
+    return join(kept)
+
+def compact_changes(changes: Any, token_budget: int) -> str:
+    """
+    Render a reorg proposal as compact JSON within token_budget.
+
+    A list keeps as many leading changes as fit and says how many were
+    dropped; any other value is cut short.
+    """
+    def dump(value: Any) -> str:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+    text = dump(changes)
+    if count_tokens(text) <= token_budget:
+        return text
+
+    if isinstance(changes, list):
+        def render(kept: int) -> str:
+            return f"{dump(changes[:kept])} ... ({len(changes) - kept} more changes omitted to fit the prompt budget)"
+
+        low, high = 0, len(changes) - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if count_tokens(render(middle)) <= token_budget:
+                low = middle
+            else:
+                high = middle - 1
+        return render(low)
+
+    limit = len(text)
+    while limit > 0 and count_tokens(text[:limit] + "...") > token_budget:
+        limit = limit * 9 // 10
+    return text[:limit] + "..."
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+SESSION_ID_RE = re.compile(r"[0-9a-f]{32}")
+
+@dataclass
+class ReorgTurn:
+    message: str
+    proposed_changes: Any
+    created_at: float = field(default_factory=time.time)
+
+@dataclass
+class ReorgSession:
+    """Scanned folder context plus the conversation so far for one chat-reorg thread"""
+    id: str
+    folder_path: str
+    folder_tree: Dict[str, List[str]]
+    file_summaries: Dict[str, str]
+    context_ref: str
+    turns: List[ReorgTurn] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+    last_used_at: float = field(default_factory=time.time)
+
+    @property
+    def last_plan(self) -> Any:
+        return self.turns[-1].proposed_changes if self.turns else None
+
+    def add_turn(self, message: str, proposed_changes: Any) -> int:
+        self.turns.append(ReorgTurn(message=message, proposed_changes=proposed_changes))
+        return len(self.turns)
+
+def context_fingerprint(folder_tree: Dict[str, List[str]], file_summaries: Dict[str, str]) -> str:
+    payload = json.dumps([folder_tree, file_summaries], sort_keys=True, ensure_ascii=False)
+    return "ctx-" + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:12]
+
+class ReorgSessionStore:
+    """
+    Chat-reorg sessions persisted as one JSON file each under directory.
+
+    Every API worker reads the same directory, so a follow-up turn can land on
+    any worker. A file's mtime is its session's last use: sessions expire after
+    ttl_seconds without use, and when more than max_sessions exist the least
+    recently used are removed. Turns sent to one session at the same time all
+    run; the last one saved wins.
+    """
+
+    def __init__(self, directory: str, ttl_seconds: float, max_sessions: int):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, session_id: str) -> Optional[str]:
+        # Session ids come from clients; only ids this store could have issued map to a file
+        if not SESSION_ID_RE.fullmatch(session_id):
+            return None
+        return os.path.join(self.directory, f"{session_id}.json")
+
+    def _prune(self, now: float) -> None:
+        sessions = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                last_used_at = os.stat(path).st_mtime
+            except OSError:
+                continue
+            sessions.append((last_used_at, path))
+        sessions.sort(reverse=True)
+        # Leave room for the session being created
+        for position, (last_used_at, path) in enumerate(sessions):
+            if position >= self.max_sessions - 1 or now - last_used_at > self.ttl_seconds:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def create(self, folder_path: str, folder_tree: Dict[str, List[str]], file_summaries: Dict[str, str]) -> ReorgSession:
+        """Open a new session; it is stored by its first save"""
+        session = ReorgSession(
+            id=uuid.uuid4().hex,
+            folder_path=folder_path,
+            folder_tree=folder_tree,
+            file_summaries=file_summaries,
+            context_ref=context_fingerprint(folder_tree, file_summaries),
+        )
+        self._prune(session.created_at)
+        return session
+
+    def save(self, session: ReorgSession) -> None:
+        """Write the session through a temp file so readers never see it half written"""
+        session.last_used_at = time.time()
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=f"{session.id}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(asdict(session), f, ensure_ascii=False)
+            os.replace(temp_path, self._path(session.id))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def get(self, session_id: str) -> Optional[ReorgSession]:
+        path = self._path(session_id)
+        if path is None:
+            return None
+        now = time.time()
+        try:
+            if now - os.stat(path).st_mtime > self.ttl_seconds:
+                os.remove(path)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        turns = [ReorgTurn(**turn) for turn in data.pop("turns", [])]
+        data["last_used_at"] = now
+        return ReorgSession(**data, turns=turns)
+
+    def delete(self, session_id: str) -> bool:
+        path = self._path(session_id)
+        if path is None:
+            return False
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        return True
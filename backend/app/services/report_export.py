@@ -0,0 +1,118 @@
+import csv
+import io
+import os
+import tempfile
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Callable, List, Sequence
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# Produces the rows of a report a batch at a time, typically
+# (await db.stream(...)).partitions(settings.EXPORT_BATCH_SIZE)
+RowBatches = Callable[[], AsyncIterator[Sequence[Any]]]
+
+def _cell(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "value"):  # Enum
+        return value.value
+    return value
+
+# Spreadsheet apps run CSV text starting with these as a formula
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+def _csv_cell(value: Any) -> Any:
+    """Cell text is user/LLM-supplied: a leading quote keeps Excel from evaluating it"""
+    value = _cell(value)
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+async def _csv_chunks(columns: List[str], batches: RowBatches) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    # The header goes out before the query has produced its first row
+    yield buffer.getvalue()
+    async for rows in batches():
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([[_csv_cell(value) for value in row] for row in rows])
+        yield buffer.getvalue()
+
+async def _write_xlsx(columns: List[str], batches: RowBatches, sheet_name: str) -> str:
+    """
+    Write the rows to a temporary .xlsx and return its path.
+
+    XlsxWriter's constant_memory mode flushes each row to disk as it is
+    written, so memory stays flat however many rows there are. The zip
+    container can only be finished once every row is in, so XLSX is
+    streamed after the workbook is closed.
+    """
+    try:
+        import xlsxwriter
+    except ImportError:
+        raise HTTPException(
+            status_code=501,
+            detail="XLSX export requires the XlsxWriter package; use format=csv"
+        )
+
+    handle, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(handle)
+    try:
+        # Cell text is user/LLM-supplied: write it as strings, never as formulas or links
+        workbook = xlsxwriter.Workbook(path, {
+            "constant_memory": True,
+            "strings_to_formulas": False,
+            "strings_to_urls": False,
+        })
+        worksheet = workbook.add_worksheet(sheet_name)
+        worksheet.write_row(0, 0, columns, workbook.add_format({"bold": True}))
+        next_row = 1
+
+        def write_batch(rows, first_row):
+            for offset, row in enumerate(rows):
+                worksheet.write_row(first_row + offset, 0, [_cell(value) for value in row])
+
+        async for rows in batches():
+            await run_in_threadpool(write_batch, rows, next_row)
+            next_row += len(rows)
+        await run_in_threadpool(workbook.close)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+async def _file_chunks(path: str) -> AsyncIterator[bytes]:
+    try:
+        with open(path, "rb") as f:
+            while True:
+                chunk = await run_in_threadpool(f.read, settings.STORAGE_READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(path)
+
+async def export_response(
+    export_format: str,
+    filename: str,
+    columns: List[str],
+    batches: RowBatches,
+    sheet_name: str = "Report"
+) -> StreamingResponse:
+    """Stream a report as CSV (row batches straight from the cursor) or XLSX"""
+    headers = {"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'}
+    if export_format == "xlsx":
+        path = await _write_xlsx(columns, batches, sheet_name)
+        return StreamingResponse(_file_chunks(path), media_type=EXPORT_MEDIA_TYPES["xlsx"], headers=headers)
+    return StreamingResponse(_csv_chunks(columns, batches), media_type=EXPORT_MEDIA_TYPES["csv"], headers=headers)
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+class ResponseCache:
+    """
+    Two-tier cache for model responses.
+
+    Entries are content-addressed by a hash of model, prompt and generation
+    config. The memory tier is an LRU bounded by entry count and total bytes;
+    the optional SQLite tier survives restarts. Both tiers honour the TTL.
+    """
+
+    # How many disk writes between sweeps of expired rows
+    DISK_SWEEP_INTERVAL = 500
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: float = 7 * 24 * 3600,
+        db_path: Optional[str] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+
+        self._memory: "OrderedDict[str, Tuple[str, float, int]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "writes": 0,
+        }
+
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._disk_writes_since_sweep = 0
+        if db_path:
+            self._open_disk(db_path)
+
+    @staticmethod
+    def make_key(model: str, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        payload = json.dumps(
+            {"model": model, "prompt": prompt, "config": generation_config or {}},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _open_disk(self, db_path: str) -> None:
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+        self._sweep_disk()
+
+    def _sweep_disk(self) -> None:
+        with self._db_lock:
+            cursor = self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+            self._disk_writes_since_sweep = 0
+        with self._lock:
+            self._counters["expirations"] += max(cursor.rowcount, 0)
+
+    def _store_memory(self, key: str, value: str, expires_at: float) -> None:
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= previous[2]
+            self._memory[key] = (value, expires_at, size)
+            self._memory_bytes += size
+            while len(self._memory) > self.max_entries or self._memory_bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted_size
+                self._counters["evictions"] += 1
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at, size = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+                self._memory_bytes -= size
+                self._counters["expirations"] += 1
+
+        if self._db is not None:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+            if row is not None and row[1] > now:
+                self._store_memory(key, row[0], row[1])
+                with self._lock:
+                    self._counters["disk_hits"] += 1
+                return row[0]
+
+        with self._lock:
+            self._counters["misses"] += 1
+        return None
+
+    def set(self, key: str, value: str) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        self._store_memory(key, value, expires_at)
+        with self._lock:
+            self._counters["writes"] += 1
+
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, value, expires_at),
+                )
+                self._disk_writes_since_sweep += 1
+                sweep = self._disk_writes_since_sweep >= self.DISK_SWEEP_INTERVAL
+            if sweep:
+                self._sweep_disk()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            memory_entries = len(self._memory)
+            memory_bytes = self._memory_bytes
+
+        disk_entries = None
+        if self._db is not None:
+            with self._db_lock:
+                disk_entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+        lookups = counters["memory_hits"] + counters["disk_hits"] + counters["misses"]
+        hits = counters["memory_hits"] + counters["disk_hits"]
+        return {
+            **counters,
+            "hits": hits,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": memory_entries,
+            "memory_bytes": memory_bytes,
+            "disk_entries": disk_entries,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+        }
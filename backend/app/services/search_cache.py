@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from app.core.config import settings
+
+class SearchCache:
+    """
+    In-process LRU of search results, keyed by the data version they were computed at.
+
+    The version comes from the database (the table_change_markers rows that
+    triggers bump on every write), so a write through any API worker, script
+    or psql session invalidates every worker's cache on its next lookup.
+    Callers read the version before querying and store the result under it,
+    so a write that lands while a query is running makes its result stale
+    immediately. ttl_seconds only bounds how long an entry can sit unused.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[Hashable, float, Any]]" = OrderedDict()
+        self._version: Optional[Hashable] = None
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def make_key(query: str, **params: Any) -> Tuple:
+        """Key on the case- and whitespace-normalized query plus every other parameter"""
+        normalized = " ".join(query.lower().split())
+        return (normalized,) + tuple(sorted((name, str(value)) for name, value in params.items()))
+
+    def _observe(self, version: Hashable) -> None:
+        # Entries from an older version can never be served again
+        if version != self._version:
+            self._version = version
+            self._entries.clear()
+
+    def get(self, key: Hashable, version: Hashable) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            self._observe(version)
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version or now - entry[1] > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[2]
+
+    def set(self, key: Hashable, value: Any, version: Hashable) -> None:
+        with self._lock:
+            if version != self._version:
+                return
+            self._entries[key] = (version, time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "version": self._version,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
+
+search_cache = SearchCache(
+    max_entries=settings.SEARCH_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.SEARCH_CACHE_TTL_SECONDS,
+)
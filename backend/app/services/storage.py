@@ -0,0 +1,209 @@
+import asyncio
+import os
+import shutil
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+class BlobStorage(ABC):
+    """
+    Where uploaded document bytes live.
+
+    put_file returns a location string that is stored in documents.file_path;
+    the other methods take that location back.
+    """
+
+    @abstractmethod
+    async def put_file(self, local_path: str, key: str) -> str:
+        """Store a local file under key and return its location; the local file is left in place"""
+
+    @abstractmethod
+    async def size(self, location: str) -> int:
+        ...
+
+    @abstractmethod
+    async def read_range(self, location: str, start: int, end: int) -> bytes:
+        """Return bytes [start, end) of the blob"""
+
+    async def iter_chunks(self, location: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Yield bytes [start, end) in STORAGE_READ_CHUNK_SIZE ranged reads"""
+        if end is None:
+            end = await self.size(location)
+        position = start
+        while position < end:
+            stop = min(position + settings.STORAGE_READ_CHUNK_SIZE, end)
+            yield await self.read_range(location, position, stop)
+            position = stop
+
+class LocalBlobStorage(BlobStorage):
+    """Blobs as files under a root directory; the location is the file path"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    async def put_file(self, local_path: str, key: str) -> str:
+        location = os.path.join(self.root, key)
+
+        def store():
+            os.makedirs(os.path.dirname(location) or ".", exist_ok=True)
+            if os.path.exists(location):
+                return  # Content-addressed keys: same key, same bytes
+            try:
+                os.link(local_path, location)
+            except OSError:
+                shutil.copyfile(local_path, location)
+
+        await run_in_threadpool(store)
+        return location
+
+    async def size(self, location: str) -> int:
+        return os.path.getsize(location)
+
+    async def read_range(self, location: str, start: int, end: int) -> bytes:
+        def read():
+            with open(location, "rb") as f:
+                f.seek(start)
+                return f.read(end - start)
+        return await run_in_threadpool(read)
+
+class S3BlobStorage(BlobStorage):
+    """
+    Blobs in an S3-compatible bucket; the location is s3://bucket/key.
+
+    Files above S3_MULTIPART_THRESHOLD are sent as a multipart upload whose
+    parts go up concurrently (S3_MAX_CONCURRENCY at a time). Reads are one
+    (ranged) GET whose body is streamed back in STORAGE_READ_CHUNK_SIZE
+    pieces. Point AWS_S3_ENDPOINT_URL at MinIO, LocalStack or a moto server
+    to run against a local S3 stand-in (tests/test_storage.py uses moto).
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        region: str,
+        endpoint_url: Optional[str] = None,
+        part_size: int = 8 * 1024 * 1024,
+        multipart_threshold: int = 8 * 1024 * 1024,
+        max_concurrency: int = 8,
+    ):
+        import aioboto3
+
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url or None
+        # S3 rejects multipart parts under 5MB, except the last one
+        self.part_size = max(part_size, 5 * 1024 * 1024)
+        self.multipart_threshold = multipart_threshold
+        self.max_concurrency = max_concurrency
+        self.session = aioboto3.Session(
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID or None,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY or None,
+            region_name=region,
+        )
+
+    def _client(self):
+        return self.session.client("s3", endpoint_url=self.endpoint_url)
+
+    def _key(self, location: str) -> str:
+        prefix = f"s3://{self.bucket}/"
+        if not location.startswith(prefix):
+            raise ValueError(f"{location} is not in bucket {self.bucket}")
+        return location[len(prefix):]
+
+    async def put_file(self, local_path: str, key: str) -> str:
+        size = os.path.getsize(local_path)
+        async with self._client() as s3:
+            if size <= self.multipart_threshold:
+                body = await run_in_threadpool(_read_file_range, local_path, 0, size)
+                await s3.put_object(Bucket=self.bucket, Key=key, Body=body)
+            else:
+                await self._multipart_upload(s3, local_path, key, size)
+        return f"s3://{self.bucket}/{key}"
+
+    async def _multipart_upload(self, s3, local_path: str, key: str, size: int) -> None:
+        upload = await s3.create_multipart_upload(Bucket=self.bucket, Key=key)
+        upload_id = upload["UploadId"]
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def upload_part(part_number: int, start: int):
+            async with semaphore:
+                # Only max_concurrency parts are held in memory at once
+                body = await run_in_threadpool(_read_file_range, local_path, start, start + self.part_size)
+                response = await s3.upload_part(
+                    Bucket=self.bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=body,
+                )
+                return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+        try:
+            parts = await asyncio.gather(*[
+                upload_part(number, start)
+                for number, start in enumerate(range(0, size, self.part_size), start=1)
+            ])
+            await s3.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except BaseException:
+            await s3.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            raise
+
+    async def size(self, location: str) -> int:
+        async with self._client() as s3:
+            head = await s3.head_object(Bucket=self.bucket, Key=self._key(location))
+        return head["ContentLength"]
+
+    async def read_range(self, location: str, start: int, end: int) -> bytes:
+        if end <= start:
+            return b""
+        async with self._client() as s3:
+            response = await s3.get_object(Bucket=self.bucket, Key=self._key(location), Range=f"bytes={start}-{end - 1}")
+            async with response["Body"] as body:
+                return await body.read()
+
+    async def iter_chunks(self, location: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Yield bytes [start, end) from a single GET on one client, streaming its body"""
+        if end is not None and end <= start:
+            return
+        request = {"Bucket": self.bucket, "Key": self._key(location)}
+        if start > 0 or end is not None:
+            request["Range"] = f"bytes={start}-{end - 1 if end is not None else ''}"
+        async with self._client() as s3:
+            response = await s3.get_object(**request)
+            body = response["Body"]
+            async with body:
+                async for chunk in body.iter_chunks(settings.STORAGE_READ_CHUNK_SIZE):
+                    yield chunk
+
+def _read_file_range(path: str, start: int, end: int) -> bytes:
+    with open(path, "rb") as f:
+        f.seek(start)
+        return f.read(end - start)
+
+_storage: Optional[BlobStorage] = None
+
+def get_storage() -> BlobStorage:
+    """The configured blob storage backend (STORAGE_BACKEND = "local" or "s3")"""
+    global _storage
+    if _storage is None:
+        if settings.STORAGE_BACKEND == "s3":
+            if not settings.AWS_S3_BUCKET:
+                raise RuntimeError("STORAGE_BACKEND is 's3' but AWS_S3_BUCKET is not set")
+            _storage = S3BlobStorage(
+                bucket=settings.AWS_S3_BUCKET,
+                region=settings.AWS_REGION,
+                endpoint_url=settings.AWS_S3_ENDPOINT_URL,
+                part_size=settings.S3_PART_SIZE,
+                multipart_threshold=settings.S3_MULTIPART_THRESHOLD,
+                max_concurrency=settings.S3_MAX_CONCURRENCY,
+            )
+        else:
+            _storage = LocalBlobStorage(settings.LOCAL_STORAGE_DIR)
+    return _storage
@@ -0,0 +1,120 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
+
+from app.core.config import settings
+
+# Text placed between pages when they are joined into Document.content
+PAGE_SEPARATOR = "\n\n"
+
+@dataclass
+class ExtractedText:
+    text: str
+    page_offsets: List[int]  # Character offset in text where each page starts
+
+    @property
+    def page_count(self) -> int:
+        return len(self.page_offsets)
+
+def join_pages(pages: List[str]) -> ExtractedText:
+    offsets = []
+    position = 0
+    for i, page in enumerate(pages):
+        if i:
+            position += len(PAGE_SEPARATOR)
+        offsets.append(position)
+        position += len(page)
+    return ExtractedText(text=PAGE_SEPARATOR.join(pages), page_offsets=offsets)
+
+def pdf_page_count(file_path: str) -> int:
+    from PyPDF2 import PdfReader
+    return len(PdfReader(file_path).pages)
+
+def extract_pdf_pages(file_path: str, start: int = 0, stop: Optional[int] = None) -> List[str]:
+    """Extract pages [start, stop) of a PDF; each worker opens the file itself"""
+    from PyPDF2 import PdfReader
+    reader = PdfReader(file_path)
+    stop = len(reader.pages) if stop is None else min(stop, len(reader.pages))
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+def extract_docx_pages(file_path: str) -> List[str]:
+    """
+    Extract a DOCX split on page breaks.
+
+    DOCX has no fixed pagination, so pages follow explicit breaks and the
+    breaks Word recorded the last time it laid the document out.
+    """
+    import docx
+    pages: List[str] = []
+    current: List[str] = []
+    for paragraph in docx.Document(file_path).paragraphs:
+        xml = paragraph._p.xml
+        if "lastRenderedPageBreak" in xml and current:
+            pages.append("\n".join(current))
+            current = []
+        current.append(paragraph.text)
+        if 'w:type="page"' in xml:
+            pages.append("\n".join(current))
+            current = []
+    if current or not pages:
+        pages.append("\n".join(current))
+    return pages
+
+def extract_txt_pages(file_path: str) -> List[str]:
+    """Plain text has no pages except explicit form feeds"""
+    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read().split("\f")
+
+def extract_pages(file_path: str, file_type: str) -> List[str]:
+    """Extract every page of a document in the current process"""
+    file_type = file_type.lower().lstrip(".")
+    if file_type == "pdf":
+        return extract_pdf_pages(file_path)
+    if file_type == "docx":
+        return extract_docx_pages(file_path)
+    return extract_txt_pages(file_path)
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+def get_extraction_pool() -> ProcessPoolExecutor:
+    """Process pool shared by all uploads, so parsing is CPU-parallel and off the event loop"""
+    global _pool
+    if _pool is None:
+        # Spawned, not forked: a fork would copy the running event loop, DB pool and Gemini threads
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.TEXT_EXTRACTION_WORKERS or os.cpu_count(),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+def shutdown_extraction_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+async def extract_document_text(file_path: str, file_type: str) -> ExtractedText:
+    """
+    Extract a document's text page by page in the process pool.
+
+    Large PDFs are split into page ranges of PDF_PAGES_PER_TASK that are
+    parsed by several workers at once.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_extraction_pool()
+    file_type = file_type.lower().lstrip(".")
+
+    if file_type != "pdf":
+        pages = await loop.run_in_executor(pool, extract_pages, file_path, file_type)
+        return join_pages(pages)
+
+    page_count = await loop.run_in_executor(pool, pdf_page_count, file_path)
+    step = max(1, settings.PDF_PAGES_PER_TASK)
+    ranges = await asyncio.gather(*[
+        loop.run_in_executor(pool, extract_pdf_pages, file_path, start, start + step)
+        for start in range(0, page_count, step)
+    ])
+    return join_pages([page for pages in ranges for page in pages])
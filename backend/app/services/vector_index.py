@@ -0,0 +1,419 @@
+import asyncio
+import fcntl
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+
+from app.core.config import settings
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is",
+    "it", "of", "on", "or", "that", "the", "this", "to", "with",
+}
+# Rows seen by a refresh are re-checked this far back, so writes from
+# transactions that started before the last refresh but committed after it
+# are not missed. Unchanged rows are skipped by checksum.
+SYNC_LOOKBACK = timedelta(minutes=5)
+
+class HashingEmbedder:
+    """
+    Offline text embedder: signed feature hashing of words and word bigrams.
+
+    Term counts are dampened (1 + log tf) and vectors are L2-normalized, so a
+    dot product is the cosine similarity. No model download, no state.
+    """
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        words = [word for word in TOKEN_PATTERN.findall(text.lower()) if word not in STOP_WORDS]
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, count in Counter(self._features(text or "")).items():
+                h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+                sign = 1.0 if h >> 63 else -1.0
+                vectors[row, h % self.dim] += sign * (1.0 + math.log(count))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+class VectorIndex:
+    """
+    Approximate nearest-neighbour index over memory-mapped NumPy arrays.
+
+    Rows are append-only: an update tombstones the old row (id -1) and
+    appends a new one, and tombstones are compacted away once they make up
+    half the file. Once there are enough rows, a spherical k-means coarse
+    quantizer (IVF) is trained and queries only scan the n_probe closest
+    lists; it is retrained whenever the live row count doubles.
+
+    Files in directory: vectors.<gen>.npy, ids.<gen>.npy, lists.<gen>.npy,
+    checksums.<gen>.npy, centroids.npy, meta.json and index.lock. Several
+    API workers can share one directory: writes hold an exclusive flock on
+    index.lock and searches a shared one, and each process reloads when
+    meta.json has changed under it. Growing or compacting writes a new
+    generation of array files and switches to it by replacing meta.json, so
+    files another process has mapped are never truncated.
+    """
+
+    ARRAY_NAMES = ("vectors", "ids", "lists", "checksums")
+
+    def __init__(self, directory: str, dim: int, n_lists: int, n_probe: int, batch_size: int = 256):
+        self.directory = directory
+        self.dim = dim
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.batch_size = batch_size
+        self.embedder = HashingEmbedder(dim)
+        self._lock = threading.RLock()
+        self.revision = 0
+        self._stale_generations: List[int] = []
+        os.makedirs(directory, exist_ok=True)
+        with self._lock, self._file_lock(exclusive=True):
+            self._load()
+
+    # Persistence
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _array_path(self, name: str, generation: int) -> str:
+        return self._path(f"{name}.{generation}.npy")
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        """flock on index.lock, shared between processes using the same directory"""
+        with open(self._path("index.lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_meta(self) -> Optional[dict]:
+        try:
+            with open(self._path("meta.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _sync(self) -> None:
+        """Reload if another process has saved meta.json since this one last did; call with the file lock held"""
+        meta = self._read_meta()
+        if meta is None or meta.get("revision") != self.revision:
+            self._load(meta)
+
+    def sync(self) -> None:
+        """Pick up writes made by other processes"""
+        with self._lock, self._file_lock(exclusive=False):
+            self._sync()
+
+    def _new_arrays(self, capacity: int, generation: int) -> Dict[str, np.ndarray]:
+        """Empty arrays for a generation, written under temporary names until _install"""
+        specs = {"vectors": (np.float32, (capacity, self.dim)), "ids": (np.int64, (capacity,)),
+                 "lists": (np.int32, (capacity,)), "checksums": (np.uint32, (capacity,))}
+        arrays = {}
+        for name, (dtype, shape) in specs.items():
+            path = self._array_path(name, generation) + ".tmp"
+            array = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+            if name in ("ids", "lists"):
+                array[:] = -1
+            arrays[name] = array
+        return arrays
+
+    def _install(self, arrays: Dict[str, np.ndarray], generation: int) -> None:
+        """Rename a new generation's files into place and map them; meta.json still points at the old one"""
+        for name, array in arrays.items():
+            array.flush()
+            os.replace(self._array_path(name, generation) + ".tmp", self._array_path(name, generation))
+            setattr(self, f"_{name}", array)
+        if generation != self.generation:
+            self._stale_generations.append(self.generation)
+        self.generation = generation
+        self.capacity = len(arrays["ids"])
+
+    def _load(self, meta: Optional[dict] = None) -> None:
+        if meta is None:
+            meta = self._read_meta()
+
+        self._stale_generations = []
+        if meta is None or meta.get("dim") != self.dim or "generation" not in meta:
+            self.count = 0
+            self.deleted = 0
+            self.trained_count = 0
+            self.watermark: Optional[datetime] = None
+            self._centroids: Optional[np.ndarray] = None
+            self.revision = (meta or {}).get("revision", 0)
+            self.generation = (meta or {}).get("generation", 0) + 1
+            self._install(self._new_arrays(1024, self.generation), self.generation)
+            if meta and "generation" in meta:
+                self._stale_generations.append(meta["generation"])
+            self._save_meta()
+        else:
+            self.count = meta["count"]
+            self.deleted = meta["deleted"]
+            self.trained_count = meta["trained_count"]
+            self.watermark = datetime.fromisoformat(meta["watermark"]) if meta.get("watermark") else None
+            self.generation = meta["generation"]
+            for name in self.ARRAY_NAMES:
+                setattr(self, f"_{name}", np.load(self._array_path(name, self.generation), mmap_mode="r+"))
+            self.capacity = meta["capacity"]
+            self._centroids = np.load(self._path("centroids.npy")) if self.trained_count else None
+            self.revision = meta["revision"]
+
+        self._rows: Dict[int, int] = {
+            int(obligation_id): row
+            for row, obligation_id in enumerate(self._ids[:self.count]) if obligation_id >= 0
+        }
+
+    def _save_meta(self) -> None:
+        meta = {
+            "dim": self.dim,
+            "count": self.count,
+            "deleted": self.deleted,
+            "capacity": self.capacity,
+            "trained_count": self.trained_count,
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+            "generation": self.generation,
+            "revision": self.revision + 1,
+        }
+        temp_path = self._path("meta.json.tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(temp_path, self._path("meta.json"))
+        self.revision += 1
+
+        # Nothing points at older generations any more; processes that still map them keep their inodes
+        for generation in self._stale_generations:
+            for name in self.ARRAY_NAMES:
+                try:
+                    os.remove(self._array_path(name, generation))
+                except OSError:
+                    pass
+        self._stale_generations = []
+
+    def _flush(self) -> None:
+        for array in (self._vectors, self._ids, self._lists, self._checksums):
+            array.flush()
+        self._save_meta()
+
+    def _rewrite(self, capacity: int, rows: np.ndarray) -> None:
+        """Copy the given rows into a new generation of files with the given capacity"""
+        generation = self.generation + 1
+        arrays = self._new_arrays(capacity, generation)
+        n = len(rows)
+        for name in self.ARRAY_NAMES:
+            arrays[name][:n] = getattr(self, f"_{name}")[rows]
+        old_ids = arrays["ids"][:n]
+        self._install(arrays, generation)
+        self.count = n
+        self.deleted = int((old_ids < 0).sum())
+        self._rows = {int(obligation_id): row for row, obligation_id in enumerate(old_ids) if obligation_id >= 0}
+
+    # Writes
+
+    def upsert(self, ids: Sequence[int], texts: Sequence[str]) -> int:
+        """Embed and store texts under ids, replacing changed rows; returns rows written"""
+        with self._lock, self._file_lock(exclusive=True):
+            self._sync()
+            changed: List[Tuple[int, str, int]] = []
+            for obligation_id, text in zip(ids, texts):
+                checksum = zlib.crc32((text or "").encode("utf-8"))
+                row = self._rows.get(obligation_id)
+                if row is not None and self._checksums[row] == checksum:
+                    continue
+                changed.append((obligation_id, text, checksum))
+            if not changed:
+                return 0
+
+            for obligation_id, _, _ in changed:
+                row = self._rows.pop(obligation_id, None)
+                if row is not None:
+                    self._ids[row] = -1
+                    self.deleted += 1
+
+            if self.count + len(changed) > self.capacity:
+                capacity = self.capacity
+                while capacity < self.count + len(changed):
+                    capacity *= 2
+                self._rewrite(capacity, np.arange(self.count))
+
+            for start in range(0, len(changed), self.batch_size):
+                batch = changed[start:start + self.batch_size]
+                vectors = self.embedder.embed([text for _, text, _ in batch])
+                rows = slice(self.count, self.count + len(batch))
+                self._vectors[rows] = vectors
+                self._ids[rows] = [obligation_id for obligation_id, _, _ in batch]
+                self._checksums[rows] = [checksum for _, _, checksum in batch]
+                self._lists[rows] = self._assign(vectors) if self._centroids is not None else -1
+                for offset, (obligation_id, _, _) in enumerate(batch):
+                    self._rows[obligation_id] = self.count + offset
+                self.count += len(batch)
+
+            self._maintain()
+            self._flush()
+            return len(changed)
+
+    def remove(self, ids: Sequence[int]) -> int:
+        with self._lock, self._file_lock(exclusive=True):
+            self._sync()
+            removed = 0
+            for obligation_id in ids:
+                row = self._rows.pop(obligation_id, None)
+                if row is not None:
+                    self._ids[row] = -1
+                    self.deleted += 1
+                    removed += 1
+            if removed:
+                self._maintain()
+                self._flush()
+            return removed
+
+    def set_watermark(self, watermark: datetime) -> None:
+        with self._lock, self._file_lock(exclusive=True):
+            self._sync()
+            if self.watermark is not None and self.watermark >= watermark:
+                return  # Another process has already synced further
+            self.watermark = watermark
+            self._save_meta()
+
+    def _maintain(self) -> None:
+        live = len(self._rows)
+        if self.deleted > 1024 and self.deleted * 2 > self.count:
+            self._rewrite(max(1024, self.capacity), np.flatnonzero(self._ids[:self.count] >= 0))
+        if self.n_lists and live >= self.n_lists * 39 and (self._centroids is None or live >= 2 * self.trained_count):
+            self._train()
+
+    # IVF
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32)
+
+    def _train(self, iterations: int = 10) -> None:
+        live_rows = np.flatnonzero(self._ids[:self.count] >= 0)
+        rng = np.random.default_rng(0)
+        sample_rows = np.sort(rng.choice(live_rows, size=min(len(live_rows), self.n_lists * 256), replace=False))
+        sample = np.asarray(self._vectors[sample_rows])
+
+        centroids = sample[rng.choice(len(sample), size=self.n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for list_id in range(self.n_lists):
+                members = sample[assignment == list_id]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    norm = np.linalg.norm(centroid)
+                    centroids[list_id] = centroid / norm if norm else centroid
+
+        self._centroids = centroids.astype(np.float32)
+        temp_path = self._path("centroids.npy.tmp")
+        with open(temp_path, "wb") as f:
+            np.save(f, self._centroids)
+        os.replace(temp_path, self._path("centroids.npy"))
+        for start in range(0, self.count, 65536):
+            stop = min(start + 65536, self.count)
+            self._lists[start:stop] = self._assign(np.asarray(self._vectors[start:stop]))
+        self.trained_count = len(live_rows)
+
+    # Reads
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """Return up to k (id, cosine similarity) pairs, best first"""
+        vector = self.embedder.embed([query])[0]
+        with self._lock, self._file_lock(exclusive=False):
+            self._sync()
+            if not self._rows or not vector.any():
+                return []
+            live = self._ids[:self.count] >= 0
+            if self._centroids is not None:
+                probes = np.argsort(self._centroids @ vector)[-self.n_probe:]
+                live &= np.isin(self._lists[:self.count], probes)
+            rows = np.flatnonzero(live)
+            if not len(rows):
+                return []
+            scores = np.asarray(self._vectors[rows]) @ vector
+            if len(rows) > k:
+                top = np.argpartition(-scores, k)[:k]
+            else:
+                top = np.arange(len(rows))
+            top = top[np.argsort(-scores[top])]
+            return [(int(self._ids[rows[i]]), float(scores[i])) for i in top]
+
+_index: Optional[VectorIndex] = None
+_index_lock = threading.Lock()
+_refresh_lock: Optional[asyncio.Lock] = None
+
+def get_obligation_index() -> VectorIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = VectorIndex(
+                settings.VECTOR_INDEX_DIR,
+                dim=settings.VECTOR_DIM,
+                n_lists=settings.VECTOR_IVF_LISTS,
+                n_probe=settings.VECTOR_IVF_PROBES,
+                batch_size=settings.VECTOR_EMBED_BATCH_SIZE,
+            )
+        return _index
+
+async def refresh_obligation_index(db) -> int:
+    """
+    Embed obligations created or updated since the index's watermark.
+
+    Covers every write path (uploads, ingest, edits); deletes are applied by
+    unindex_obligations. Returns the number of rows (re-)embedded.
+    """
+    global _refresh_lock
+    if _refresh_lock is None:
+        _refresh_lock = asyncio.Lock()
+    index = get_obligation_index()
+
+    async with _refresh_lock:
+        # Start from the watermark other workers may have advanced
+        await run_in_threadpool(index.sync)
+        query = "SELECT id, text, COALESCE(updated_at, created_at) AS changed_at FROM obligations"
+        params = {}
+        if index.watermark is not None:
+            query += " WHERE COALESCE(updated_at, created_at) > :since"
+            params["since"] = index.watermark - SYNC_LOOKBACK
+        query += " ORDER BY changed_at"
+
+        written = 0
+        watermark = index.watermark
+        result = await db.stream(text(query), params)
+        async for rows in result.partitions(settings.VECTOR_EMBED_BATCH_SIZE):
+            written += await run_in_threadpool(index.upsert, [row.id for row in rows], [row.text for row in rows])
+            watermark = rows[-1].changed_at
+        if watermark is not None and watermark != index.watermark:
+            await run_in_threadpool(index.set_watermark, watermark)
+        return written
+
+async def index_obligations(ids: Sequence[int], texts: Sequence[str]) -> None:
+    """Apply an obligation write to the index right away; failures only delay it to the next refresh"""
+    try:
+        await run_in_threadpool(get_obligation_index().upsert, list(ids), list(texts))
+    except Exception as e:
+        print(f"Vector index update failed: {e}")
+
+async def unindex_obligations(ids: Sequence[int]) -> None:
+    try:
+        await run_in_threadpool(get_obligation_index().remove, list(ids))
+    except Exception as e:
+        print(f"Vector index removal failed: {e}")
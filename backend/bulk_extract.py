@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Offline bulk obligation extraction for InteliDoc
+Walks a document corpus, extracts obligations with AIService in parallel
+worker processes and writes a COPY-ready CSV plus a psql script that loads
+it into the obligations table.
+
+Per-file results are checkpointed, so re-running the same command after a
+crash only processes files that have no checkpoint or whose content changed.
+A file whose extraction fails gets no checkpoint and is retried next run.
+
+Rows are matched to documents by the SHA-256 of the file, which is the
+content_hash recorded when the same file is uploaded.
+
+Example:
+    python bulk_extract.py ../test_documents --workers 4 --output obligations.csv
+    psql "$DATABASE_URL" -f obligations.load.sql
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+DEFAULT_EXTENSIONS = [".txt", ".md", ".pdf", ".docx"]
+
+# source_file / document_title identify the file for humans; content_sha256 is
+# what the load script joins on (documents.content_hash) to resolve document_id.
+CSV_COLUMNS = [
+    "source_file", "document_title", "content_sha256", "text", "category", "priority",
+    "source_section", "confidence_score", "extracted_by",
+]
+
+# Loads the CSV through a staging table shaped like obligations (so COPY parses
+# the enum columns), then moves rows for registered documents across, skipping
+# text already stored for the document as POST /obligations/bulk does.
+LOAD_SQL = """\\set ON_ERROR_STOP on
+BEGIN;
+CREATE TEMP TABLE obligation_staging (LIKE obligations INCLUDING DEFAULTS) ON COMMIT DROP;
+ALTER TABLE obligation_staging
+    ALTER COLUMN id DROP DEFAULT, ALTER COLUMN id DROP NOT NULL,
+    ALTER COLUMN document_id DROP NOT NULL,
+    ADD COLUMN source_file TEXT, ADD COLUMN document_title TEXT, ADD COLUMN content_sha256 TEXT;
+\\copy obligation_staging ({columns}) FROM '{csv_path}' WITH (FORMAT csv, HEADER true, NULL '')
+
+UPDATE obligation_staging s
+SET document_id = COALESCE(d.canonical_document_id, d.id)
+FROM documents d
+WHERE d.content_hash = s.content_sha256;
+
+SELECT DISTINCT source_file AS unregistered_file FROM obligation_staging WHERE document_id IS NULL ORDER BY 1;
+
+INSERT INTO obligations (text, category, priority, source_section, confidence_score, document_id, extracted_by)
+SELECT DISTINCT ON (s.document_id, {staged_text})
+    s.text, s.category, s.priority, s.source_section, s.confidence_score, s.document_id, s.extracted_by
+FROM obligation_staging s
+WHERE s.document_id IS NOT NULL
+AND NOT EXISTS (
+    SELECT 1 FROM obligations o
+    WHERE o.document_id = s.document_id
+    AND {stored_text} = {staged_text}
+)
+ORDER BY s.document_id, {staged_text}, s.confidence_score DESC NULLS LAST;
+COMMIT;
+"""
+
+def read_text(file_path):
+    """Return the plain text of a corpus file, pages joined as on upload"""
+    from app.services.text_extraction import extract_pages, join_pages
+    extension = os.path.splitext(file_path)[1].lower()
+    return join_pages(extract_pages(file_path, extension)).text
+
+def checkpoint_path(checkpoint_dir, rel_path):
+    return os.path.join(checkpoint_dir, hashlib.sha256(rel_path.encode("utf-8")).hexdigest() + ".json")
+
+def file_digest(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_checkpoint(checkpoint_dir, rel_path, digest):
+    try:
+        with open(checkpoint_path(checkpoint_dir, rel_path), "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return checkpoint if checkpoint.get("sha256") == digest else None
+
+def extract_file(corpus_root, rel_path, digest, checkpoint_dir):
+    """Worker entry point: extract one file and write its checkpoint"""
+    # Imported here so each worker process builds its own AIService and Gemini client
+    from app.schemas.ai import ExtractionRequest
+    from app.services.ai_service import ai_service
+    from app.services.prompt_compaction import count_tokens
+
+    start_time = time.time()
+    text = read_text(os.path.join(corpus_root, rel_path))
+    title = os.path.splitext(os.path.basename(rel_path))[0]
+    # A failed chunk must fail the file, otherwise an incomplete result would be checkpointed
+    obligations = ai_service.extract_obligations(ExtractionRequest(
+        text=text,
+        document_title=title,
+    ), raise_errors=True)
+
+    checkpoint = {
+        "source_file": rel_path,
+        "document_title": title,
+        "sha256": digest,
+        "input_tokens": count_tokens(text),
+        "elapsed": time.time() - start_time,
+        "obligations": [obligation.model_dump(mode="json") for obligation in obligations],
+    }
+    target = checkpoint_path(checkpoint_dir, rel_path)
+    temp_path = f"{target}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(temp_path, target)
+    return checkpoint
+
+def walk_corpus(corpus_root, extensions):
+    for root, dirs, files in os.walk(corpus_root):
+        dirs.sort()
+        for file in sorted(files):
+            if os.path.splitext(file)[1].lower() in extensions:
+                yield os.path.relpath(os.path.join(root, file), corpus_root)
+
+def write_csv(output_path, checkpoints, extracted_by):
+    rows = 0
+    with open(output_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        for checkpoint in checkpoints:
+            for obligation in checkpoint["obligations"]:
+                writer.writerow([
+                    checkpoint["source_file"],
+                    checkpoint["document_title"],
+                    checkpoint["sha256"],
+                    obligation["obligation_text"],
+                    obligation["category"],
+                    obligation.get("priority") or "",
+                    obligation.get("source_section") or "",
+                    obligation.get("confidence_score") if obligation.get("confidence_score") is not None else "",
+                    extracted_by,
+                ])
+                rows += 1
+    return rows
+
+def write_load_script(script_path, csv_path):
+    from app.services.obligation_ingest import NORMALIZED_TEXT_SQL
+
+    with open(script_path, "w", encoding="utf-8") as f:
+        f.write(LOAD_SQL.format(
+            columns=", ".join(CSV_COLUMNS),
+            csv_path=os.path.abspath(csv_path).replace("'", "''"),
+            staged_text=NORMALIZED_TEXT_SQL.format(column="s.text"),
+            stored_text=NORMALIZED_TEXT_SQL.format(column="o.text"),
+        ))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-extract obligations from a document corpus")
+    parser.add_argument("corpus", help="Directory of documents to process")
+    parser.add_argument("--output", default="bulk_obligations.csv", help="CSV file to write")
+    parser.add_argument("--checkpoint-dir", default=".bulk_extract_checkpoints", help="Directory for per-file results")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--extensions", nargs="+", default=DEFAULT_EXTENSIONS, help="File extensions to include")
+    parser.add_argument("--extracted-by", type=int, default=1, help="User id recorded as extracted_by")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.corpus):
+        parser.error(f"{args.corpus} is not a directory")
+    os.makedirs(args.checkpoint_dir, exist_ok=True)
+    extensions = {extension.lower() for extension in args.extensions}
+
+    print(f"📂 Scanning corpus {args.corpus}...")
+    checkpoints = {}
+    todo = []
+    for rel_path in walk_corpus(args.corpus, extensions):
+        digest = file_digest(os.path.join(args.corpus, rel_path))
+        checkpoint = load_checkpoint(args.checkpoint_dir, rel_path, digest)
+        if checkpoint is not None:
+            checkpoints[rel_path] = checkpoint
+        else:
+            todo.append((rel_path, digest))
+
+    print(f"✅ {len(checkpoints)} files already checkpointed, {len(todo)} to extract with {args.workers} workers")
+
+    start_time = time.time()
+    processed = failed = tokens = 0
+    if todo:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = {
+                pool.submit(extract_file, args.corpus, rel_path, digest, args.checkpoint_dir): rel_path
+                for rel_path, digest in todo
+            }
+            for future in as_completed(futures):
+                rel_path = futures[future]
+                try:
+                    checkpoint = future.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"❌ {rel_path}: {e}")
+                    continue
+                checkpoints[rel_path] = checkpoint
+                processed += 1
+                tokens += checkpoint["input_tokens"]
+                elapsed = time.time() - start_time
+                print(
+                    f"   [{processed + failed}/{len(todo)}] {rel_path}: "
+                    f"{len(checkpoint['obligations'])} obligations in {checkpoint['elapsed']:.1f}s "
+                    f"({processed / elapsed * 60:.1f} files/min)"
+                )
+
+    elapsed = time.time() - start_time
+    rows = write_csv(args.output, (checkpoints[rel_path] for rel_path in sorted(checkpoints)), args.extracted_by)
+    script_path = os.path.splitext(args.output)[0] + ".load.sql"
+    write_load_script(script_path, args.output)
+
+    print(f"📊 Extracted {processed} files ({failed} failed) in {elapsed:.1f}s")
+    if processed and elapsed > 0:
+        print(f"   Throughput: {processed / elapsed * 60:.1f} files/min, {tokens / elapsed:.0f} tokens/s")
+    print(f"💾 Wrote {rows} obligations from {len(checkpoints)} files to {args.output}")
+    print(f"   Upload the documents first, then load with: psql \"$DATABASE_URL\" -f {script_path}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
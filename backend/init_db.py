@@ -11,6 +11,7 @@ from sqlalchemy import text
 from app.core.database import async_engine, sync_engine
 from app.models import User, Document, Obligation, Mapping
 from app.core.database import Base
+from app.core.schema import apply_schema_upgrades
 
 async def init_database():
     """Initialize the database with tables and sample data"""
@@ -20,6 +21,7 @@ async def init_database():
     # Create tables
     async with async_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await apply_schema_upgrades(conn)
     
     print("✅ Tables created successfully")
     
@@ -75,12 +77,12 @@ async def init_database():
             }
         ]
         
-        for obligation in sample_obligations:
-            await conn.execute(text("""
-                INSERT INTO obligations (text, category, priority, source_section, document_id, extracted_by)
-                VALUES (:text, :category, :priority, :source_section, :document_id, :extracted_by)
-                ON CONFLICT DO NOTHING
-            """), obligation)
+        # A list of parameter sets runs as one executemany batch
+        await conn.execute(text("""
+            INSERT INTO obligations (text, category, priority, source_section, document_id, extracted_by)
+            VALUES (:text, :category, :priority, :source_section, :document_id, :extracted_by)
+            ON CONFLICT DO NOTHING
+        """), sample_obligations)
         
         # Create sample mappings
         sample_mappings = [
@@ -102,12 +104,11 @@ async def init_database():
             }
         ]
         
-        for mapping in sample_mappings:
-            await conn.execute(text("""
-                INSERT INTO mappings (obligation_id, mapping_type, external_id, external_name, external_url, mapped_by)
-                VALUES (:obligation_id, :mapping_type, :external_id, :external_name, :external_url, :mapped_by)
-                ON CONFLICT DO NOTHING
-            """), mapping)
+        await conn.execute(text("""
+            INSERT INTO mappings (obligation_id, mapping_type, external_id, external_name, external_url, mapped_by)
+            VALUES (:obligation_id, :mapping_type, :external_id, :external_name, :external_url, :mapped_by)
+            ON CONFLICT DO NOTHING
+        """), sample_mappings)
     
     print("✅ Sample data inserted successfully")
     print("🎉 Database initialization complete!")
@@ -0,0 +1,103 @@
+import random
+import time
+
+from app.models.obligation import CategoryEnum
+from app.schemas.ai import ExtractedObligation
+from app.services.chunking import ObligationMerger, find_section_starts, split_into_chunks
+
+def _document(paragraphs: int, sentences: int = 6) -> str:
+    sentence = "The provider must retain audit logs for at least twelve months."
+    return "\n\n".join(" ".join([sentence] * sentences) for _ in range(paragraphs))
+
+def _obligation(text: str, confidence: int = 80) -> ExtractedObligation:
+    return ExtractedObligation(obligation_text=text, category=CategoryEnum.SECURITY, confidence_score=confidence)
+
+def test_empty_text_has_no_chunks():
+    assert split_into_chunks("", 1000, 100, 10) == []
+    assert split_into_chunks(None, 1000, 100, 10) == []
+
+def test_short_text_is_one_chunk():
+    chunks = split_into_chunks("Vendors must sign the NDA.", 1000, 100, 10)
+    assert len(chunks) == 1
+    assert chunks[0].start == 0 and chunks[0].end == len("Vendors must sign the NDA.")
+
+def test_chunks_cover_text_and_overlap():
+    text = _document(40)
+    chunks = split_into_chunks(text, 2000, 200, 0)
+    assert chunks[0].start == 0
+    assert chunks[-1].end == len(text)
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.start < previous.end  # Overlapping, no gaps
+        assert current.start > previous.start
+    assert all(len(chunk.text) <= 2000 for chunk in chunks)
+    assert [chunk.index for chunk in chunks] == list(range(len(chunks)))
+
+def test_cuts_prefer_section_headings():
+    sections = [f"Section {n}\n{_document(3)}\n" for n in range(1, 6)]
+    text = "".join(sections)
+    chunks = split_into_chunks(text, 1500, 0, 0)
+    starts = set(find_section_starts(text))
+    assert any(chunk.start in starts for chunk in chunks[1:])
+    assert chunks[0].section == "Section 1"
+
+def test_max_chunks_grows_chunk_size_without_oversized_tail():
+    text = _document(400)
+    chunk_size, chunk_overlap, max_chunks = 2000, 200, 8
+    chunks = split_into_chunks(text, chunk_size, chunk_overlap, max_chunks)
+
+    stride = -(-(len(text) - chunk_overlap) // max_chunks)
+    grown = stride + chunk_overlap
+    assert len(chunks) <= max_chunks
+    assert chunks[-1].end == len(text)
+    assert all(len(chunk.text) <= grown for chunk in chunks)
+
+def test_max_chunks_without_breaks_still_bounded():
+    text = "x" * 50000
+    chunks = split_into_chunks(text, 4000, 400, 5)
+    grown = -(-(len(text) - 400) // 5) + 400
+    assert len(chunks) <= 5
+    assert chunks[-1].end == len(text)
+    assert all(len(chunk.text) <= grown for chunk in chunks)
+
+def test_merger_collapses_near_duplicates_keeping_higher_confidence():
+    merger = ObligationMerger()
+    assert merger.add(_obligation("All customer data must be encrypted at rest.", 70))
+    assert not merger.add(_obligation("All customer data must be encrypted at rest", 90))
+    assert not merger.add(_obligation("all customer data MUST be encrypted at rest!", 60))
+    assert len(merger.obligations) == 1
+    assert merger.obligations[0].confidence_score == 90
+
+def test_merger_keeps_distinct_obligations_and_skips_blank():
+    merger = ObligationMerger()
+    added = merger.extend([
+        _obligation("Payment data must be tokenized."),
+        _obligation("Access logs must be kept for a year."),
+        _obligation("   "),
+        _obligation("Payment data must be tokenized."),
+    ])
+    assert [o.obligation_text for o in added] == [
+        "Payment data must be tokenized.",
+        "Access logs must be kept for a year.",
+    ]
+    assert len(merger.obligations) == 2
+
+def test_merger_collapses_reworded_duplicate():
+    merger = ObligationMerger()
+    merger.add(_obligation("The vendor must notify the customer of any breach within 72 hours of discovery."))
+    assert not merger.add(_obligation("The vendor shall notify the customer of any breach within 72 hours of discovery."))
+    assert merger.add(_obligation("The customer must approve every subcontractor before any data is shared."))
+
+def test_merger_time_is_bounded_for_distinct_obligations():
+    rng = random.Random(0)
+    vocabulary = (
+        "vendor customer supplier must shall retain encrypt review report delete audit monitor "
+        "logs data records credentials backups patches accounts within days hours years of after "
+        "each breach incident termination request written notice annual policy training access"
+    ).split()
+    texts = [" ".join(rng.choice(vocabulary) for _ in range(rng.randint(12, 24))) for _ in range(400)]
+
+    start = time.perf_counter()
+    merger = ObligationMerger()
+    merger.extend([_obligation(text) for text in texts])
+    assert time.perf_counter() - start < 2.0
+    assert len(merger.obligations) == len(set(texts))
@@ -0,0 +1,59 @@
+import json
+import os
+import threading
+
+from app.services.folder_manifest import FolderManifest
+
+def _folder(tmp_path, files: int) -> str:
+    folder = tmp_path / "documents"
+    (folder / "contracts").mkdir(parents=True)
+    for i in range(files):
+        (folder / "contracts" / f"msa_{i}.txt").write_text(f"Master services agreement {i}")
+    return str(folder)
+
+def test_rescan_only_returns_new_or_changed_files(tmp_path):
+    folder = _folder(tmp_path, 3)
+    manifest_dir = str(tmp_path / "manifests")
+
+    manifest = FolderManifest(folder, manifest_dir)
+    scan = manifest.scan()
+    assert len(scan.pending) == 3 and scan.folder_tree["contracts"] == ["msa_0.txt", "msa_1.txt", "msa_2.txt"]
+    for pending in scan.pending:
+        pending.entry.summary = f"Summary of {os.path.basename(pending.file_path)}"
+    manifest.save()
+
+    with open(os.path.join(folder, "contracts", "msa_1.txt"), "a") as f:
+        f.write(" amended")
+    os.remove(os.path.join(folder, "contracts", "msa_2.txt"))
+
+    rescan = FolderManifest(folder, manifest_dir).scan()
+    assert [os.path.basename(p.file_path) for p in rescan.pending] == ["msa_1.txt"]
+    assert rescan.unchanged == 1
+    assert rescan.removed == {os.path.join("contracts", "msa_2.txt")}
+
+def test_concurrent_saves_of_one_folder_all_succeed(tmp_path):
+    folder = _folder(tmp_path, 20)
+    manifest_dir = str(tmp_path / "manifests")
+    errors = []
+    barrier = threading.Barrier(8)
+
+    def scan_and_save():
+        try:
+            manifest = FolderManifest(folder, manifest_dir)
+            manifest.scan()
+            barrier.wait()
+            for _ in range(20):
+                manifest.save()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=scan_and_save) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert os.listdir(manifest_dir) == [os.path.basename(FolderManifest(folder, manifest_dir).manifest_path)]
+    with open(os.path.join(manifest_dir, os.listdir(manifest_dir)[0])) as f:
+        assert len(json.load(f)["files"]) == 20
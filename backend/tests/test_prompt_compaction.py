@@ -0,0 +1,67 @@
+import os
+
+from app.services.prompt_compaction import compact_changes, compact_folder_context, count_tokens
+
+ROOT = "/data/folder"
+
+def _folder(directories: int, files: int, summary: str):
+    folder_tree = {}
+    file_summaries = {}
+    for d in range(directories):
+        directory = "." if d == 0 else os.path.join(f"team{d % 4}", f"project{d}")
+        names = [f"report_{d}_{f}.docx" for f in range(files)]
+        folder_tree[directory] = names
+        for name in names:
+            file_summaries[os.path.join(ROOT, directory, name)] = summary
+    return folder_tree, file_summaries
+
+SUMMARY = (
+    "Quarterly compliance report covering vendor risk reviews and open audit findings. "
+    "It also lists remediation owners, due dates and the status of every control exception."
+)
+
+def test_small_folder_keeps_full_summaries():
+    folder_tree, file_summaries = _folder(2, 2, SUMMARY)
+    text = compact_folder_context(ROOT, folder_tree, file_summaries, 2000)
+    assert "./ (2 files)" in text
+    assert f"- report_1_0.docx: {SUMMARY}" in text
+
+def test_tighter_budget_shortens_summaries_to_first_sentence():
+    folder_tree, file_summaries = _folder(2, 4, SUMMARY)
+    full = compact_folder_context(ROOT, folder_tree, file_summaries, 100_000)
+    budget = count_tokens(full) - 1
+    text = compact_folder_context(ROOT, folder_tree, file_summaries, budget)
+    assert count_tokens(text) <= budget
+    assert "remediation owners" not in text
+    assert "- report_1_3.docx: Quarterly compliance report" in text
+
+def test_large_folder_rolls_up_within_budget():
+    folder_tree, file_summaries = _folder(40, 30, SUMMARY)
+    for budget in (4000, 1000, 300):
+        text = compact_folder_context(ROOT, folder_tree, file_summaries, budget)
+        assert count_tokens(text) <= budget
+        assert "rolled up" in text
+
+def test_unfittable_folder_is_truncated_with_a_note():
+    folder_tree, file_summaries = _folder(400, 5, SUMMARY)
+    text = compact_folder_context(ROOT, folder_tree, file_summaries, 60)
+    assert count_tokens(text) <= 60
+    assert text.endswith("omitted to fit the prompt budget)")
+
+def test_without_summaries_only_names_are_listed():
+    folder_tree, file_summaries = _folder(2, 2, SUMMARY)
+    text = compact_folder_context(ROOT, folder_tree, file_summaries, 2000, include_summaries=False)
+    assert "- report_0_1.docx" in text
+    assert "Quarterly" not in text
+
+def test_previous_proposal_is_cut_to_budget():
+    changes = [{"action": "move", "source": f"report_{i}.docx", "destination": f"archive/report_{i}.docx"} for i in range(200)]
+    assert compact_changes(changes[:2], 1000).startswith('[{"action":"move"')
+
+    text = compact_changes(changes, 300)
+    assert count_tokens(text) <= 300
+    assert text.startswith('[{"action":"move","source":"report_0.docx"')
+    assert "more changes omitted to fit the prompt budget" in text
+
+    raw = compact_changes("not json " * 500, 50)
+    assert count_tokens(raw) <= 50 and raw.endswith("...")
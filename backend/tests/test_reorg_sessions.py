@@ -0,0 +1,59 @@
+import os
+import time
+
+from app.services.reorg_sessions import ReorgSessionStore
+
+TREE = {".": ["a.txt"], "contracts": ["msa.docx"]}
+SUMMARIES = {"docs/a.txt": "Notes", "docs/contracts/msa.docx": "Master services agreement"}
+
+def _store(tmp_path, **kwargs) -> ReorgSessionStore:
+    options = {"ttl_seconds": 60, "max_sessions": 10}
+    options.update(kwargs)
+    return ReorgSessionStore(str(tmp_path / "sessions"), **options)
+
+def test_sessions_are_shared_between_store_instances(tmp_path):
+    first = _store(tmp_path)
+    second = _store(tmp_path)  # Another worker on the same directory
+
+    session = first.create("docs", TREE, SUMMARIES)
+    session.add_turn("group contracts", [{"action": "move", "source": "contracts/msa.docx"}])
+    first.save(session)
+
+    loaded = second.get(session.id)
+    assert loaded.folder_tree == TREE and loaded.file_summaries == SUMMARIES
+    assert loaded.context_ref == session.context_ref
+    assert loaded.add_turn("rename it", []) == 2
+    second.save(loaded)
+
+    assert [turn.message for turn in first.get(session.id).turns] == ["group contracts", "rename it"]
+    assert second.delete(session.id)
+    assert first.get(session.id) is None and not first.delete(session.id)
+
+def test_idle_sessions_expire(tmp_path):
+    store = _store(tmp_path)
+    session = store.create("docs", TREE, SUMMARIES)
+    store.save(session)
+    path = os.path.join(store.directory, f"{session.id}.json")
+    os.utime(path, (time.time() - 120, time.time() - 120))
+
+    assert store.get(session.id) is None
+    assert not os.path.exists(path)
+
+def test_least_recently_used_sessions_are_pruned(tmp_path):
+    store = _store(tmp_path, max_sessions=2)
+    sessions = []
+    for age in (30, 20, 10):
+        session = store.create("docs", TREE, SUMMARIES)
+        store.save(session)
+        path = os.path.join(store.directory, f"{session.id}.json")
+        os.utime(path, (time.time() - age, time.time() - age))
+        sessions.append(session)
+
+    store.save(store.create("docs", TREE, SUMMARIES))
+    assert store.get(sessions[0].id) is None and store.get(sessions[1].id) is None
+    assert store.get(sessions[2].id) is not None
+
+def test_foreign_session_ids_never_touch_the_filesystem(tmp_path):
+    store = _store(tmp_path)
+    assert store.get("../../etc/passwd") is None
+    assert not store.delete("../sessions")
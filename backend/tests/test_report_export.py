@@ -0,0 +1,62 @@
+import csv
+import enum
+import io
+import os
+import zipfile
+from datetime import datetime
+
+import pytest
+
+from app.services.report_export import _csv_chunks, _write_xlsx
+
+COLUMNS = ["id", "text", "priority", "created_at"]
+
+class Priority(enum.Enum):
+    HIGH = "high"
+
+ROWS = [
+    (1, "=HYPERLINK(\"http://evil.example\",\"click\")", Priority.HIGH, datetime(2024, 5, 1, 9, 30)),
+    (2, "+1+2", None, None),
+    (3, "-2+3", None, None),
+    (4, "@SUM(A1:A2)", None, None),
+    (5, "\t=1+1", None, None),
+    (6, "\r=1+1", None, None),
+    (7, "Vendors must sign the NDA - before onboarding", None, None),
+    (8, "https://example.com/policy", None, None),
+]
+
+def _batches():
+    async def batches():
+        yield ROWS[:3]
+        yield ROWS[3:]
+    return batches
+
+@pytest.mark.asyncio
+async def test_csv_escapes_formula_cells():
+    body = "".join([chunk async for chunk in _csv_chunks(COLUMNS, _batches())])
+    rows = list(csv.reader(io.StringIO(body)))
+
+    assert rows[0] == COLUMNS
+    assert [row[1] for row in rows[1:7]] == [
+        "'=HYPERLINK(\"http://evil.example\",\"click\")", "'+1+2", "'-2+3", "'@SUM(A1:A2)", "'\t=1+1", "'\r=1+1",
+    ]
+    assert rows[7][1] == "Vendors must sign the NDA - before onboarding"
+    assert rows[1][2:] == ["high", "2024-05-01T09:30:00"]
+
+@pytest.mark.asyncio
+async def test_xlsx_writes_formula_like_text_as_strings():
+    pytest.importorskip("xlsxwriter")
+    path = await _write_xlsx(COLUMNS, _batches(), "Report")
+    try:
+        with zipfile.ZipFile(path) as workbook:
+            sheet = workbook.read("xl/worksheets/sheet1.xml").decode("utf-8")
+            strings = "".join(
+                workbook.read(name).decode("utf-8") for name in workbook.namelist() if name == "xl/sharedStrings.xml"
+            )
+            names = workbook.namelist()
+    finally:
+        os.remove(path)
+
+    assert "<f>" not in sheet  # No formula cells
+    assert not any("worksheets/_rels" in name for name in names)  # No hyperlinks
+    assert "SUM(A1:A2)" in sheet + strings
@@ -0,0 +1,75 @@
+import pytest
+
+from app.services import response_cache
+from app.services.response_cache import ResponseCache
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Frozen time.time that tests advance by hand"""
+    now = [1_000_000.0]
+    monkeypatch.setattr(response_cache.time, "time", lambda: now[0])
+    return now
+
+def test_make_key_depends_on_model_prompt_and_config():
+    key = ResponseCache.make_key("gemini", "prompt", {"temperature": 0.1, "max_output_tokens": 10})
+    assert key == ResponseCache.make_key("gemini", "prompt", {"max_output_tokens": 10, "temperature": 0.1})
+    assert key != ResponseCache.make_key("gemini", "prompt", {"temperature": 0.2, "max_output_tokens": 10})
+    assert key != ResponseCache.make_key("other", "prompt", {"temperature": 0.1, "max_output_tokens": 10})
+
+def test_memory_tier_evicts_least_recently_used(clock):
+    cache = ResponseCache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"  # b is now the oldest
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+    assert cache.stats()["evictions"] == 1
+
+def test_memory_tier_is_bounded_by_bytes(clock):
+    cache = ResponseCache(max_entries=100, max_bytes=10)
+    cache.set("a", "x" * 6)
+    cache.set("b", "y" * 6)
+    cache.set("huge", "z" * 11)  # Larger than the whole tier; never stored
+
+    stats = cache.stats()
+    assert cache.get("a") is None and cache.get("b") == "y" * 6
+    assert cache.get("huge") is None
+    assert stats["memory_bytes"] == 6 and stats["memory_entries"] == 1
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResponseCache(ttl_seconds=60)
+    cache.set("a", "1")
+    clock[0] += 59
+    assert cache.get("a") == "1"
+    clock[0] += 2
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert stats["expirations"] == 1 and stats["memory_entries"] == 0
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["hit_rate"] == 0.5
+
+def test_disk_tier_survives_restart_and_honours_ttl(tmp_path, clock):
+    db_path = str(tmp_path / "cache" / "responses.db")
+    cache = ResponseCache(ttl_seconds=60, db_path=db_path)
+    cache.set("a", "1")
+    clock[0] += 30
+    cache.set("b", "2")
+
+    restarted = ResponseCache(ttl_seconds=60, db_path=db_path)
+    assert restarted.get("a") == "1"
+    assert restarted.stats()["disk_hits"] == 1
+    assert restarted.get("a") == "1"  # Promoted to memory
+    assert restarted.stats()["memory_hits"] == 1
+
+    clock[0] += 31
+    assert ResponseCache(ttl_seconds=60, db_path=db_path).stats()["disk_entries"] == 1  # a swept on open
+    assert restarted.get("b") == "2"
+
+def test_clear_empties_both_tiers(tmp_path, clock):
+    cache = ResponseCache(db_path=str(tmp_path / "responses.db"))
+    cache.set("a", "1")
+    cache.clear()
+    assert cache.get("a") is None
+    assert cache.stats()["disk_entries"] == 0
@@ -0,0 +1,110 @@
+import asyncio
+import gzip
+import json
+from datetime import datetime
+from typing import List
+
+import pytest
+from fastapi import Depends, FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.core import responses
+from app.core.responses import CompressionMiddleware, fast_json, json_rows_response
+
+class Item(BaseModel):
+    id: int
+    text: str
+    created_at: datetime
+
+ROWS = [{"id": i, "text": f"Vendors must encrypt backups, clause {i}", "created_at": datetime(2024, 1, 1)} for i in range(200)]
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+
+    @app.get("/items", response_model=List[Item])
+    async def items(request: Request, response: Response, fast: bool = Depends(fast_json)):
+        if fast:
+            return await json_rows_response(request, response, ROWS)
+        return ROWS
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/stream")
+    async def stream():
+        async def lines():
+            for row in ROWS:
+                yield json.dumps({"id": row["id"]}) + "\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return app
+
+async def _get(app, path: str, query: str = "", accept_encoding: str = "gzip"):
+    """Drive the ASGI app directly and return (status, headers, body)"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": query.encode(), "server": ("test", 80), "client": ("test", 1234),
+        "headers": [(b"host", b"test"), (b"accept-encoding", accept_encoding.encode())],
+    }
+    messages = []
+    requested = False
+    finished = asyncio.Event()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+        if message["type"] == "http.response.body" and not message.get("more_body", False):
+            finished.set()
+
+    await app(scope, receive, send)
+    start = messages[0]
+    headers = {name.decode().lower(): value.decode() for name, value in start["headers"]}
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return start["status"], headers, body
+
+@pytest.fixture(autouse=True)
+def gzip_only(monkeypatch):
+    monkeypatch.setattr(responses, "brotli", None)
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("serializer", ["orjson", "pydantic"])
+async def test_both_serializers_are_compressed(serializer):
+    if serializer == "orjson":
+        pytest.importorskip("orjson")
+    status, headers, body = await _get(_app(), "/items", f"serializer={serializer}")
+
+    assert status == 200
+    assert headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in headers["vary"]
+    assert int(headers["content-length"]) == len(body)
+    assert len(json.loads(gzip.decompress(body))) == len(ROWS)
+
+@pytest.mark.asyncio
+async def test_brotli_is_preferred_when_available(monkeypatch):
+    monkeypatch.setattr(responses, "brotli", pytest.importorskip("brotli"))
+    status, headers, body = await _get(_app(), "/items", "serializer=pydantic", "gzip, br")
+    assert headers["content-encoding"] == "br"
+    assert len(json.loads(responses.brotli.decompress(body))) == len(ROWS)
+
+@pytest.mark.asyncio
+async def test_small_unaccepted_and_streamed_bodies_are_left_alone():
+    _, headers, body = await _get(_app(), "/small")
+    assert "content-encoding" not in headers and json.loads(body) == {"ok": True}
+
+    _, headers, body = await _get(_app(), "/items", "serializer=pydantic", "identity")
+    assert "content-encoding" not in headers and len(json.loads(body)) == len(ROWS)
+
+    _, headers, body = await _get(_app(), "/stream")
+    assert "content-encoding" not in headers
+    assert len(body.splitlines()) == len(ROWS)
@@ -0,0 +1,88 @@
+import os
+import socket
+
+import pytest
+
+from app.core.config import settings
+from app.services.storage import LocalBlobStorage, S3BlobStorage
+
+BUCKET = "intelidoc-test"
+
+def _write(path, size: int) -> bytes:
+    data = os.urandom(size)
+    with open(path, "wb") as f:
+        f.write(data)
+    return data
+
+async def _read_all(storage, location, start=0, end=None) -> bytes:
+    return b"".join([chunk async for chunk in storage.iter_chunks(location, start, end)])
+
+@pytest.fixture(scope="module")
+def s3_endpoint():
+    """A moto S3 server on a free local port, with an empty test bucket"""
+    pytest.importorskip("aioboto3")
+    moto_server = pytest.importorskip("moto.server")
+    import boto3
+
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    server = moto_server.ThreadedMotoServer(ip_address="127.0.0.1", port=port, verbose=False)
+    server.start()
+    endpoint_url = f"http://127.0.0.1:{port}"
+    boto3.client("s3", endpoint_url=endpoint_url, region_name="us-east-1").create_bucket(Bucket=BUCKET)
+    yield endpoint_url
+    server.stop()
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_READ_CHUNK_SIZE", 64 * 1024)
+
+@pytest.mark.asyncio
+async def test_local_put_and_ranged_reads(tmp_path, small_chunks):
+    source = tmp_path / "upload.pdf"
+    data = _write(source, 300 * 1024)
+    storage = LocalBlobStorage(str(tmp_path / "blobs"))
+
+    location = await storage.put_file(str(source), "abc.pdf")
+    assert os.path.exists(source)  # The staged file is left in place
+    assert await storage.size(location) == len(data)
+    assert await storage.read_range(location, 10, 20) == data[10:20]
+    assert await _read_all(storage, location) == data
+    assert await _read_all(storage, location, 1000, 200000) == data[1000:200000]
+
+@pytest.mark.asyncio
+async def test_s3_single_put_and_streamed_reads(tmp_path, s3_endpoint, small_chunks):
+    source = tmp_path / "small.txt"
+    data = _write(source, 200 * 1024)
+    storage = S3BlobStorage(BUCKET, "us-east-1", endpoint_url=s3_endpoint)
+
+    location = await storage.put_file(str(source), "small.txt")
+    assert location == f"s3://{BUCKET}/small.txt"
+    assert await storage.size(location) == len(data)
+    assert await storage.read_range(location, 5, 50) == data[5:50]
+    assert await _read_all(storage, location) == data
+    assert await _read_all(storage, location, 1, 150001) == data[1:150001]
+    assert await _read_all(storage, location, 100000) == data[100000:]
+    assert await _read_all(storage, location, 10, 10) == b""
+
+@pytest.mark.asyncio
+async def test_s3_multipart_put(tmp_path, s3_endpoint):
+    source = tmp_path / "large.pdf"
+    data = _write(source, 11 * 1024 * 1024)  # Three 5MB parts, the last one short
+    storage = S3BlobStorage(
+        BUCKET, "us-east-1", endpoint_url=s3_endpoint,
+        part_size=5 * 1024 * 1024, multipart_threshold=1024 * 1024, max_concurrency=2,
+    )
+
+    location = await storage.put_file(str(source), "large.pdf")
+    assert await storage.size(location) == len(data)
+    assert await _read_all(storage, location) == data
+
+def test_s3_rejects_foreign_locations(s3_endpoint):
+    storage = S3BlobStorage(BUCKET, "us-east-1", endpoint_url=s3_endpoint)
+    with pytest.raises(ValueError):
+        storage._key("s3://other-bucket/file.pdf")
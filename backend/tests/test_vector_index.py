@@ -0,0 +1,88 @@
+import glob
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.services.vector_index import HashingEmbedder, VectorIndex
+
+TOPICS = ["encryption", "retention", "breach notification", "access review", "vendor audit", "backup", "training", "payments"]
+
+def _texts(n: int, offset: int = 0):
+    return [
+        f"Obligation {i}: the provider must handle {TOPICS[i % len(TOPICS)]} for system s{i} in region r{i % 13}"
+        for i in range(offset, offset + n)
+    ]
+
+def _index(directory, **kwargs) -> VectorIndex:
+    options = {"dim": 256, "n_lists": 0, "n_probe": 4}
+    options.update(kwargs)
+    return VectorIndex(str(directory), **options)
+
+def test_embedder_is_normalized_and_ranks_related_text_higher():
+    vectors = HashingEmbedder(256).embed([
+        "Encrypt customer data at rest",
+        "Customer data must be encrypted at rest",
+        "Submit the quarterly expense report",
+        "",
+    ])
+    assert np.allclose(np.linalg.norm(vectors[:3], axis=1), 1.0)
+    assert not vectors[3].any()
+    assert vectors[0] @ vectors[1] > vectors[0] @ vectors[2]
+
+def test_upsert_skips_unchanged_rows_and_replaces_changed_ones(tmp_path):
+    index = _index(tmp_path)
+    assert index.upsert([1, 2], ["Encrypt backups nightly", "Review vendor access yearly"]) == 2
+    assert index.upsert([1, 2], ["Encrypt backups nightly", "Review vendor access yearly"]) == 0
+    assert index.upsert([2], ["Rotate payment keys every quarter"]) == 1
+
+    assert index.search("payment keys rotation", 1)[0][0] == 2
+    assert index.search("vendor access review", 2)[0][0] == 1  # The old text of 2 is gone
+    assert len(index._rows) == 2 and index.deleted == 1
+
+def test_rows_and_watermark_persist_across_instances(tmp_path):
+    watermark = datetime(2024, 1, 1, 12, 0)
+    index = _index(tmp_path)
+    index.upsert(list(range(100)), _texts(100))
+    index.set_watermark(watermark)
+    index.set_watermark(watermark - timedelta(hours=1))  # Never moves backwards
+
+    reopened = _index(tmp_path)
+    assert reopened.watermark == watermark
+    assert len(reopened._rows) == 100
+    assert reopened.search(_texts(1, 42)[0], 1)[0][0] == 42
+
+def test_growth_and_compaction_switch_generations(tmp_path):
+    index = _index(tmp_path)
+    index.upsert(list(range(3000)), _texts(3000))  # Grows past the initial 1024 rows
+    assert index.capacity >= 3000
+    assert index.remove(list(range(2000))) == 2000
+
+    assert index.count == 1000 and index.deleted == 0  # Tombstones compacted away
+    assert len(glob.glob(os.path.join(tmp_path, "ids.*.npy"))) == 1  # Stale generations removed
+    assert index.search(_texts(1, 2500)[0], 1)[0][0] == 2500
+    assert all(obligation_id >= 2000 for obligation_id, _ in index.search("provider must handle encryption", 20))
+
+def test_ivf_search_keeps_recall(tmp_path):
+    index = _index(tmp_path, n_lists=8, n_probe=3)
+    texts = _texts(2000)
+    index.upsert(list(range(2000)), texts)
+    assert index._centroids is not None and index.trained_count == 2000
+
+    queries = range(0, 2000, 37)
+    found = sum(index.search(texts[i], 1)[0][0] == i for i in queries)
+    assert found / len(queries) >= 0.9
+
+def test_instances_sharing_a_directory_see_each_others_writes(tmp_path):
+    first = _index(tmp_path)
+    second = _index(tmp_path)
+
+    first.upsert([1], ["Encrypt backups nightly"])
+    assert second.search("encrypt backups", 1)[0][0] == 1
+
+    second.upsert(list(range(10, 2010)), _texts(2000))  # Second switches to a larger generation
+    first.remove([1])
+    assert first.count == 2001 and len(first._rows) == 2000
+    assert 1 not in {obligation_id for obligation_id, _ in second.search("encrypt backups", 5)}
+    assert first.search(_texts(1, 700)[0], 1)[0][0] == 710
@@ -4,18 +4,25 @@ export default function ChatReorg() {
   const [input, setInput] = useState('')
   const [history, setHistory] = useState<{role: 'user'|'ai', message: string, changes?: any}[]>([])
   const [loading, setLoading] = useState(false)
+  const [sessionId, setSessionId] = useState<string | null>(null)
 
   const sendMessage = async () => {
     if (!input.trim()) return
     setLoading(true)
     setHistory(h => [...h, { role: 'user', message: input }])
     try {
-      const res = await fetch('http://localhost:8000/api/v1/ai/chat-reorg', {
+      const send = (session_id: string | null) => fetch('http://localhost:8000/api/v1/ai/chat-reorg', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ message: input })
+        body: JSON.stringify(session_id ? { message: input, session_id } : { message: input })
       })
+      let res = await send(sessionId)
+      if (res.status === 404 && sessionId) {
+        // Session expired: start over with a fresh folder scan
+        res = await send(null)
+      }
       const data = await res.json()
+      if (data.session_id) setSessionId(data.session_id)
       setHistory(h => [...h, { role: 'ai', message: 'Here are the proposed changes:', changes: data.proposed_changes }])
     } catch (e) {
       setHistory(h => [...h, { role: 'ai', message: 'Error: Could not get a response from the AI.' }])
@@ -7,6 +7,7 @@ export interface Obligation {
   confidence_score?: number
   document_id: number
   extracted_by: number
+  version?: number
   created_at: string
   updated_at?: string
 }
@@ -34,6 +35,7 @@ export interface Mapping {
   external_url?: string
   notes?: string
   mapped_by: number
+  version?: number
   created_at: string
   updated_at?: string
 }
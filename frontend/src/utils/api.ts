@@ -58,6 +58,24 @@ api.interceptors.response.use(
   }
 )
 
+// List endpoints return one page per request and the next page's cursor in X-Next-Cursor
+const NEXT_CURSOR_HEADER = 'x-next-cursor'
+const PAGE_SIZE = 200
+
+const getAllPages = async <T>(url: string, params: Record<string, unknown> = {}): Promise<T[]> => {
+  const items: T[] = []
+  let cursor: string | undefined
+  do {
+    const response = await api.get(url, { params: { ...params, limit: PAGE_SIZE, ...(cursor ? { cursor } : {}) } })
+    items.push(...response.data)
+    cursor = response.headers[NEXT_CURSOR_HEADER] || undefined
+  } while (cursor)
+  return items
+}
+
+// Writes to a single row send the version it was read at; a 412 means someone changed it since
+const ifMatch = (version?: number) => (version != null ? { headers: { 'If-Match': `"v${version}"` } } : {})
+
 // AI Endpoints
 export const aiApi = {
   extractObligations: async (request: ExtractionRequest): Promise<ExtractionResponse> => {
@@ -87,8 +105,7 @@ export const documentApi = {
   },
 
   getDocuments: async (): Promise<Document[]> => {
-    const response = await api.get('/documents')
-    return response.data
+    return getAllPages<Document>('/documents')
   },
 
   getDocument: async (id: number): Promise<Document> => {
@@ -101,35 +118,33 @@ export const documentApi = {
 export const obligationApi = {
   getObligations: async (documentId?: number): Promise<Obligation[]> => {
     const params = documentId ? { document_id: documentId } : {}
-    const response = await api.get('/obligations', { params })
-    return response.data
+    return getAllPages<Obligation>('/obligations', params)
   },
 
-  updateObligation: async (id: number, updates: Partial<Obligation>): Promise<Obligation> => {
-    const response = await api.put(`/obligations/${id}`, updates)
+  updateObligation: async (id: number, updates: Partial<Obligation>, version?: number): Promise<Obligation> => {
+    const response = await api.put(`/obligations/${id}`, updates, ifMatch(version))
     return response.data
   },
 
-  deleteObligation: async (id: number): Promise<void> => {
-    await api.delete(`/obligations/${id}`)
+  deleteObligation: async (id: number, version?: number): Promise<void> => {
+    await api.delete(`/obligations/${id}`, ifMatch(version))
   },
 }
 
 // Mapping Endpoints
 export const mappingApi = {
-  createMapping: async (mapping: Omit<Mapping, 'id' | 'created_at' | 'updated_at'>): Promise<Mapping> => {
+  createMapping: async (mapping: Omit<Mapping, 'id' | 'version' | 'created_at' | 'updated_at'>): Promise<Mapping> => {
     const response = await api.post('/mappings', mapping)
     return response.data
   },
 
   getMappings: async (obligationId?: number): Promise<Mapping[]> => {
     const params = obligationId ? { obligation_id: obligationId } : {}
-    const response = await api.get('/mappings', { params })
-    return response.data
+    return getAllPages<Mapping>('/mappings', params)
   },
 
-  deleteMapping: async (id: number): Promise<void> => {
-    await api.delete(`/mappings/${id}`)
+  deleteMapping: async (id: number, version?: number): Promise<void> => {
+    await api.delete(`/mappings/${id}`, ifMatch(version))
   },
 }
 